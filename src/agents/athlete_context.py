@@ -0,0 +1,29 @@
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Slowly changing athlete data served as MCP resources; read once per session instead of via tool calls
+ATHLETE_RESOURCES = ("athlete://name", "athlete://profile", "athlete://ftp", "athlete://goals")
+
+
+async def load_athlete_context(mcp_session, uris=ATHLETE_RESOURCES):
+    """Reads the athlete resources concurrently: {"name": {...}, "profile": {...}, ...}. Unreadable ones are left out."""
+    async def read(uri):
+        try:
+            result = await mcp_session.read_resource(uri)
+            return json.loads(result.contents[0].text)
+        except Exception as e:
+            logger.warning(f"Could not read resource {uri}: {e}")
+            return None
+
+    values = await asyncio.gather(*(read(uri) for uri in uris))
+    return {uri.split("://", 1)[1]: value for uri, value in zip(uris, values) if value is not None}
+
+
+def athlete_context_block(context):
+    """Prompt section with the athlete context, or an empty string."""
+    if not context:
+        return ""
+    return f"\n\n### ATHLETE CONTEXT (loaded at session start, no need to fetch it with tools)\n{json.dumps(context, indent=2)}\n"
@@ -6,35 +6,35 @@ from fastmcp import Client
 from google import genai
 from google.genai import types
 from ..history_manager import PersistentHistoryManager
+from .streaming import stream_reply
+from .tool_subsets import AgentToolbox
+from .history_compaction import compact_chat
+from ..logging_setup import configure_logging
+from .structured_output import HEALTH_CLEARANCE_SCHEMA
 
 import datetime
+import json
 
 import logging
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-logging.basicConfig(
-    filename='thoughts_health_specialist.log',
-    level=logging.INFO,
-    format='%(asctime)s - [%(levelname)s] - %(message)s',
-    filemode='a' # 'a' to append, 'w' to overwrite each session
-)
-logger = logging.getLogger("ThoughtLogger")
+# Thoughts go to the process-wide JSON log (logs/agents.jsonl), filterable by logger name
+configure_logging("agents.jsonl")
+logger = logging.getLogger("thoughts.health_specialist")
 
 class HealthSpecialistAgent:
-    def __init__(self, mcp_session):
+    def __init__(self, mcp_session, specialist_name="Health Specialist"):
         self.client = genai.Client(api_key=GEMINI_API_KEY)
         self.mcp_session = mcp_session
+        self.specialist_name = specialist_name
         self.memory = PersistentHistoryManager(self.client, max_messages=20, filename="memory/health_specialist.json")
         
-        self.chat = self.client.aio.chats.create(
-            model="gemini-2.5-flash",
-            history=self.memory.get_loadable_history(),
-            config=types.GenerateContentConfig(
-                tools=[self.mcp_session],
-                temperature=1.0,
-                system_instruction="""
+        self.model_id = "gemini-2.5-flash"
+        self.config = types.GenerateContentConfig(
+            temperature=1.0,
+            system_instruction="""
                 ### ROLE
                 You are a Cycling World Tour Sports Physician. Your goal is to analyze the athlete's biometrics (HRV, RHR, Sleep, Body Battery) via Garmin tools and provide a Health Clearance assessment.
 
@@ -55,40 +55,59 @@ class HealthSpecialistAgent:
                     "biometric_red_flags": [],
                     "coach_restrictions": "Explicit constraints for the training coach"
                 }
+                """ + f"""
+                ### RESPONSE SCHEMA
+                The final JSON object must validate against this JSON schema:
+                {json.dumps(HEALTH_CLEARANCE_SCHEMA)}
                 """
-            )
+        )
+        # Only the health tools are declared to the model and callable
+        self.toolbox = AgentToolbox(self.mcp_session, "health_specialist", self.config)
+        self.chat = self.client.aio.chats.create(
+            model=self.model_id,
+            history=self.memory.get_loadable_history(),
+            config=self.config,
         )
 
     async def analyze_health(self, user_input=None):
         """Interactive loop for health clearance."""
         if user_input is None:
+            screening = await self.screen_wellness()
+            if screening is not None and not screening["flagged"]:
+                # Every biometric is within its baseline: the local draft is the clearance, no dialogue needed
+                print(f"[{self.specialist_name}]: All biometrics are within your normal range, you are cleared to train.")
+                return json.dumps(screening["draft_clearance"])
             prompt = "Please analyze my health data for the last 14 days. Use your tools to check HRV, RHR, and Sleep."
+            if screening is not None:
+                prompt += ("\n\nThe local wellness screening (last 3 days vs. 28-day baseline) flagged the following. "
+                           "Start from it and its draft clearance:\n" + json.dumps(screening, indent=2))
         else:
             prompt = user_input
 
-        # 1. Send the message
-        response = await self.chat.send_message(prompt)
-        
-        # 2. Safety check: Ensure candidates and content exist
-        if not response.candidates or not response.candidates[0].content:
-            # This happens if the model is only doing a tool call with no text preamble
-            # The SDK usually handles the tool loop, but we need to return something
-            return "Thinking... (Tool call in progress)"
+        # Old tool responses are compacted so the resent history stays bounded
+        self.chat = compact_chat(self.client, self.chat, self.model_id, self.config)
+
+        # 1. Stream the reply to the console as it arrives
+        full_text = await stream_reply(self.chat, prompt, self.specialist_name, logger,
+                                       agent="health_specialist", model=self.model_id, toolbox=self.toolbox)
+
+        # 2. Safety check: the model may only have done tool calls without text
+        if not full_text:
+            full_text = "Thinking... (Tool call in progress)"
+            print(f"\n[{self.specialist_name}]: {full_text}")
+            return full_text
 
-        full_text = ""
-        # 3. Iterate safely through parts
-        parts = response.candidates[0].content.parts
-        if parts:
-            for part in parts:
-                if part.thought:
-                    logger.info(f"THOUGHT: {part.text}")
-                if part.text:
-                    full_text += part.text
-        
-        # If the model didn't return text but did a tool call, 
-        # full_text might be empty. Return the clean output of what we have.
         return self._clean_output(full_text)
     
+    async def screen_wellness(self):
+        """Runs the local wellness anomaly detector on the MCP server; None if it is unavailable."""
+        try:
+            result = await self.mcp_session.call_tool("get_wellness_anomalies", {})
+            return json.loads(result.content[0].text)
+        except Exception as e:
+            logger.warning(f"Wellness screening unavailable ({e}), falling back to the full analysis")
+            return None
+
     def _clean_output(self, text):
         """
         Extracts JSON from the response if present, 
@@ -0,0 +1,118 @@
+"""
+Compaction of tool traffic in long chat sessions.
+
+A chat resends its whole history on every turn, including every function call and full
+function response. compact_chat() rewrites the history of a chat before a new turn:
+tool responses older than the last KEEP_TURNS user turns are cut down to a short excerpt,
+or dropped together with their call when the same call (tool and arguments) was made again
+later. The chat is then recreated with the compacted history.
+"""
+import json
+import logging
+
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+KEEP_TURNS = 2
+MAX_RESPONSE_CHARS = 400
+
+
+def call_key(function_call):
+    return function_call.name, json.dumps(dict(function_call.args or {}), sort_keys=True, default=str)
+
+
+def is_user_turn(content):
+    """A user message with text (as opposed to a message that only carries function responses)."""
+    parts = content.parts or []
+    return content.role == "user" and any(p.text for p in parts) and not any(p.function_response for p in parts)
+
+
+def compact_response(function_response, max_chars=MAX_RESPONSE_CHARS):
+    """A shorter replacement part, or None if the response is small enough or already compacted."""
+    if (function_response.response or {}).get("compacted"):
+        return None
+    payload = json.dumps(function_response.response, default=str)
+    excerpt = f"{payload[:max_chars]}... [older tool response compacted from {len(payload)} characters]"
+    compacted = {"summary": excerpt, "compacted": True}
+    if len(json.dumps(compacted)) >= len(payload):
+        return None
+    return types.Part.from_function_response(name=function_response.name, response=compacted)
+
+
+def compact_history(history, keep_turns=KEEP_TURNS, max_chars=MAX_RESPONSE_CHARS):
+    """Returns (compacted history, characters saved). The history is not modified."""
+    turn_starts = [i for i, content in enumerate(history) if is_user_turn(content)]
+    if len(turn_starts) <= keep_turns:
+        return history, 0
+    cutoff = turn_starts[-keep_turns]
+
+    # Pair each function response with its call (responses follow the calls of the previous model message)
+    call_sites, response_sites = {}, {}   # (content index, part index) -> call key
+    pending = []
+    for i, content in enumerate(history):
+        for j, part in enumerate(content.parts or []):
+            if part.function_call:
+                pending.append(((i, j), call_key(part.function_call)))
+            elif part.function_response:
+                match = next((n for n, (_, key) in enumerate(pending) if key[0] == part.function_response.name), None)
+                if match is None:
+                    continue
+                call_site, key = pending.pop(match)
+                call_sites[call_site] = key
+                response_sites[(i, j)] = (key, call_site)
+    last_response = {}
+    for (i, _), (key, _) in response_sites.items():
+        last_response[key] = max(i, last_response.get(key, -1))
+
+    dropped, replaced = set(), {}
+    saved = 0
+    for (i, j), (key, call_site) in response_sites.items():
+        if i >= cutoff:
+            continue
+        response = history[i].parts[j].function_response
+        size = len(json.dumps(response.response, default=str))
+        if last_response[key] > i:
+            # Superseded by the same call later in the session
+            dropped.update({(i, j), call_site})
+            saved += size
+        else:
+            part = compact_response(response, max_chars)
+            if part is not None:
+                replaced[(i, j)] = part
+                saved += size - len(json.dumps(part.function_response.response))
+
+    if saved <= 0:
+        return history, 0
+    compacted = []
+    for i, content in enumerate(history):
+        parts = [replaced.get((i, j), part) for j, part in enumerate(content.parts or []) if (i, j) not in dropped]
+        if parts:
+            compacted.append(types.Content(role=content.role, parts=parts))
+    return compacted, saved
+
+
+def compact_chat(client, chat, model, config, keep_turns=KEEP_TURNS):
+    """The chat itself, or a new chat with the same config and a compacted history."""
+    history, saved = compact_history(chat.get_history(curated=True), keep_turns)
+    if saved <= 0:
+        return chat
+    logger.info(f"Compacted old tool responses in the chat history ({saved} characters)")
+    return client.aio.chats.create(model=model, config=config, history=history)
+
+
+def text_only_history(history):
+    """
+    The history without function calls and responses (e.g. for a request without tool
+    declarations). Adjacent contents of the same role are merged, empty ones dropped.
+    """
+    stripped = []
+    for content in history:
+        parts = [p for p in content.parts or [] if not (p.function_call or p.function_response)]
+        if not parts:
+            continue
+        if stripped and stripped[-1].role == content.role:
+            stripped[-1] = types.Content(role=content.role, parts=stripped[-1].parts + parts)
+        else:
+            stripped.append(types.Content(role=content.role, parts=parts))
+    return stripped
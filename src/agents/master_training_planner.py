@@ -1,25 +1,47 @@
 import asyncio
 import json
 import os
+import time
 from fastmcp import Client
 from dotenv import load_dotenv
 
 from src.agents.season_planner_agent import Agent as SeasonAgent
 from src.agents.season_planner_verification_agent import SeasonContentCheckerAgent
 from src.agents.health_specialist import HealthSpecialistAgent
+from src.agents.tool_memo import MemoizedSession
+from src.agents.structured_output import StructuredOutputParser, HEALTH_CLEARANCE_SCHEMA, MACROCYCLE_SCHEMA
+from src.planning.plan_rules import validate_plan_locally
+from src.planning.plan_diff import IncrementalVerification
+from src.planning.load_simulator import LoadSimulator
+from src.planning.candidate_ranking import rank_candidates
+from src.planning.plan_library import PlanLibrary
+from src.usage_tracking import UsageBudgetExceeded, tracker
 
 season_coach_name = "Tom"
 season_coach_2_name = "Lars"
 health_specialist_name = "Lisa"
 
+# Automatic correction requests per reply when the JSON fails schema validation;
+# after that the errors are shown and the user takes over
+MAX_AUTO_REPROMPTS = 2
+
 class OverallPlanner:
-    def __init__(self, mcp_session):
+    def __init__(self, mcp_session, plan_candidates=1):
         self.mcp_session = mcp_session
+        # > 1: draft this many season plans concurrently and verify only the best-scoring one
+        self.plan_candidates = plan_candidates
         # Initialize specialized agents
-        self.health_specialist = HealthSpecialistAgent(mcp_session)
+        self.health_specialist = HealthSpecialistAgent(mcp_session, specialist_name=health_specialist_name)
         # self.longterm_performance_analyst = LongTermPerformanceAgent(mcp_session)
         self.season_coach = SeasonAgent(mcp_session, coach_name=season_coach_name)
         self.season_checker = SeasonContentCheckerAgent()
+        # Schema validation + local repair of the agents' JSON outputs
+        self.health_output = StructuredOutputParser(HEALTH_CLEARANCE_SCHEMA, "Health Clearance")
+        self.season_output = StructuredOutputParser(MACROCYCLE_SCHEMA, "Macrocycle")
+        self.llm_verifications_skipped = 0
+        self.plan_verification = IncrementalVerification()
+        # Accepted plans are versioned here and warm-start the next session
+        self.plan_library = PlanLibrary()
 
     async def orchestrate_planning(self):
         """
@@ -29,21 +51,40 @@ class OverallPlanner:
         print(f"Please wait while {health_specialist_name} is analyzing your health data...")
         health_response = await self.health_specialist.analyze_health()
         
-        while not self._is_json(health_response):
-            print(f"\n[{health_specialist_name}]: {health_response}")
-            user_msg = input("You: ")
+        # Questions were already streamed to the console by the agent
+        reprompts = 0
+        while True:
+            health_report, errors = self.health_output.parse(health_response)
+            if health_report is not None and not errors:
+                break
+            if errors and reprompts < MAX_AUTO_REPROMPTS:
+                # Local repair was not enough, ask the specialist to correct the JSON
+                reprompts += 1
+                user_msg = self.health_output.reprompt_message(errors)
+            else:
+                if errors:
+                    self.print_schema_errors(self.health_output.name, errors)
+                reprompts = 0
+                user_msg = input("You: ")
             health_response = await self.health_specialist.analyze_health(user_msg)
 
-        health_report = json.loads(health_response)
         print(f"\n✅ Health Report:\n{json.dumps(health_report, indent=4)}")
 
         with open("memory/health_report.json", "w") as f:
             json.dump(health_report, f, indent=4)
         print("Health report saved to memory/health_report.json\n")
 
-        history = {"ftp": 290,
-                   "vo2max": 60
-                   } # Placeholder for history gathering logic
+        # One call to the materialized digest instead of many per-month tool calls
+        history = await self.load_athlete_history()
+
+        # Past accepted plans closest to the current situation are the coach's starting point
+        with open("memory/goals.json", "r") as f:
+            athlete_goals = json.load(f)
+        self.season_coach.reference_plans = self.plan_library.warm_start(history, athlete_goals)
+        if self.season_coach.reference_plans:
+            closest = self.season_coach.reference_plans[0]
+            print(f"Warm start: {len(self.season_coach.reference_plans)} past plan(s) from the library "
+                  f"(closest: version {closest['version']}, accepted {closest['accepted_at']}).")
 
         # initialize season_validation dict
         season_validation = {}
@@ -57,10 +98,16 @@ class OverallPlanner:
             
             if season_validation["recommendation"] != "":
                 print(f"{season_coach_name} is revising the plan based on the feedback...")
-                season_json = await self.run_season_phase(season_validation["recommendation"], season_json, health_report)
+                if self.plan_candidates > 1:
+                    season_json = await self.run_candidate_phase(history, season_validation["recommendation"], season_json)
+                else:
+                    season_json = await self.run_season_phase(season_validation["recommendation"], season_json, health_report)
             else:
                 print(f"--- [Appointment 2] Macrocycle Planning with Coach {season_coach_name} ---")
-                season_json = await self.run_season_phase(health_report=health_report)
+                if self.plan_candidates > 1:
+                    season_json = await self.run_candidate_phase(history, health_report=health_report)
+                else:
+                    season_json = await self.run_season_phase(health_report=health_report)
 
             if not season_json:
                 print("Planning cancelled or failed.")
@@ -72,8 +119,27 @@ class OverallPlanner:
             print(f"\n--- [Season plan updated] ---")
             
 
-            print(f"\n--- {season_coach_2_name} is verifying the plan ---")
-            season_validation = await self.season_checker.check_plan(season_json, history, health_report)
+            # Hard rules (load ramp, race date, hours, stats) are checked locally first;
+            # only plans that pass them are sent to the LLM verifier.
+            with open("memory/goals.json", "r") as f:
+                athlete_goals = json.load(f)
+            season_validation = validate_plan_locally(season_json, history, athlete_goals)
+            load_projection = LoadSimulator.from_context(history, athlete_goals).project(season_json)
+            self.print_load_projection(load_projection)
+
+            if season_validation["is_valid"]:
+                # Only changed phases and their neighbours are re-verified, other verdicts are reused
+                phases_to_check = self.plan_verification.phases_to_check(season_json)
+                print(f"\n--- {season_coach_2_name} is verifying the plan "
+                      f"({len(phases_to_check)}/{len(season_json['phases'])} phases changed or adjacent) ---")
+                local_warnings = season_validation["flags"]
+                season_validation = await self.season_checker.check_plan(season_json, history, health_report, phases_to_check,
+                                                                         load_projection)
+                season_validation = self.plan_verification.merge(season_json, phases_to_check, season_validation)
+                season_validation["flags"] = local_warnings + season_validation["flags"]
+            else:
+                self.llm_verifications_skipped += 1
+                print(f"\n--- Plan rejected by the local rule check, skipping {season_coach_2_name}'s review ---")
 
             if not season_validation["is_valid"]:
                 print(f"❌ Safety Issue Detected: {season_validation['flags']}")
@@ -94,6 +160,8 @@ class OverallPlanner:
                 user_recommendation = input("\n You: ")
 
                 if user_recommendation.lower() == "accept":
+                    entry = self.plan_library.add(season_json, history, athlete_goals)
+                    print(f"Plan stored in the plan library as version {entry['version']}.")
                     return season_json
                 else:
                     season_planning_attempts = 0
@@ -102,43 +170,117 @@ class OverallPlanner:
                     continue 
 
     
+    def print_schema_errors(self, name, errors):
+        """Shown when automatic correction requests are used up; the user decides how to continue."""
+        print(f"\n[{name} still invalid after {MAX_AUTO_REPROMPTS} correction requests]")
+        for error in errors[:10]:
+            print(f"  - {error}")
+        print("Reply to the agent to continue (or type 'exit' during season planning to cancel).")
+
+    def print_load_projection(self, projection):
+        """Shows the simulated fitness/fatigue outcome of the current plan to the athlete."""
+        print(f"\n--- Load projection to {projection['race_date'] or 'end of plan'} ---")
+        print(f"Fitness (CTL) {projection['initial_fitness']} -> {projection['race_day_fitness']} on race day, "
+              f"race-day form (TSB) {projection['race_day_form']}, peak ramp {projection['peak_ramp_per_week']} CTL/week")
+        for flag in projection["flags"]:
+            print(f"⚠️  {flag}")
+
+    async def load_athlete_history(self):
+        """Fetches the athlete digest (FTP, VO2max, volume, load trend, races) from the MCP server."""
+        try:
+            result = await self.mcp_session.call_tool("get_athlete_digest", {})
+            return json.loads(result.content[0].text)
+        except Exception as e:
+            print(f"Could not load the athlete digest ({e}), verifying without history.")
+            return {}
+
     async def run_season_phase(self, user_input=None, season_json=None, health_report=None):
         """Manages the interactive loop for season planning."""
         response = await self.season_coach.plan_season(user_input, season_json, health_report)
-        
+        reprompts = 0
+
         while True:
-            # Check if we have a valid JSON plan
-            if self._is_json(response):
-                print("\n✅ Macrocycle Finalized:")
-                print(response)
-                return json.loads(response)
-            
-            # If not JSON, it's Coach Tom asking for info
-            print(f"\n[{season_coach_name}]: {response}")
+            # Check if we have a valid JSON plan (near misses are repaired locally)
+            season_json, errors = self.season_output.parse(response)
+            if season_json is not None and not errors:
+                print("\n✅ Macrocycle Finalized.")
+                return season_json
+
+            if errors and reprompts < MAX_AUTO_REPROMPTS:
+                reprompts += 1
+                response = await self.season_coach.plan_season(self.season_output.reprompt_message(errors))
+                continue
+            if errors:
+                self.print_schema_errors(self.season_output.name, errors)
+
+            # If not JSON, it's Coach Tom asking for info (already streamed to the console)
+            reprompts = 0
             user_msg = input("You: ")
             
             if user_msg.lower() in ["exit", "quit", "cancel"]:
                 return None
                 
             response = await self.season_coach.plan_season(user_msg)
-    
-    def _is_json(self, text):
-        try:
-            json.loads(text)
-            return True
-        except:
-            return False
-        
 
+    async def run_candidate_phase(self, history, user_input=None, season_json=None, health_report=None):
+        """
+        Drafts several macrocycles concurrently, scores them locally (rule check + simulated
+        race-day form and ramp) and returns the best one. Falls back to the interactive
+        planner if no draft is usable.
+        """
+        with open("memory/goals.json", "r") as f:
+            athlete_goals = json.load(f)
+        await self.season_coach.load_context()
+        prompt = self.season_coach.season_prompt(user_input, season_json, health_report)
+        prompt += f"\n\nAthlete history digest: {json.dumps(history)}\nAthlete goals: {json.dumps(athlete_goals)}"
+
+        print(f"{season_coach_name} is drafting {self.plan_candidates} season plans in parallel...")
+        start = time.perf_counter()
+        drafts = await self.season_coach.draft_candidates(prompt, self.plan_candidates)
+        candidates = []
+        for draft in drafts:
+            if draft is None:
+                continue
+            plan, errors = self.season_output.parse(draft)
+            if plan is not None and not errors:
+                candidates.append(plan)
+        if not candidates:
+            print("No usable candidate plan, continuing with the interactive planner.")
+            return await self.run_season_phase(user_input, season_json, health_report)
+
+        ranked = rank_candidates(candidates, history, athlete_goals, LoadSimulator.from_context(history, athlete_goals))
+        print(f"\n{len(candidates)}/{len(drafts)} candidates usable after {time.perf_counter() - start:.1f}s:")
+        for rank, (plan, score) in enumerate(ranked, 1):
+            projection = score["projection"]
+            print(f"  {rank}. score {score['score']:>6} | {len(plan['phases'])} phases, "
+                  f"{sum(p['duration_weeks'] for p in plan['phases'])} weeks | race-day form {projection['race_day_form']}, "
+                  f"peak ramp {projection['peak_ramp_per_week']} | local check {'passed' if score['validation']['is_valid'] else 'failed'}")
+        print("\n✅ Macrocycle Finalized.")
+        return ranked[0][0]
+
+    def report_output_stats(self):
+        """Prints how many LLM round trips the local JSON repair saved."""
+        for parser in (self.health_output, self.season_output):
+            print(f"{parser.name} outputs: {parser.stats} -> {parser.round_trips_saved} round trip(s) saved")
+        print(f"LLM verifications skipped by local rule check: {self.llm_verifications_skipped}")
+    
 
 # --- Main Entry Point for the Overall System ---
-async def main():
+async def main(plan_candidates=1):
     load_dotenv()
     SERVER_FILE = r"C:\Users\sburm\ai_coach\src\mcp_server.py"
 
     async with Client(SERVER_FILE) as mcp_client:
-        planner = OverallPlanner(mcp_client.session)
-        final_plan = await planner.orchestrate_planning()
+        # One tool-result memo shared by all agents of this planning session
+        mcp_session = MemoizedSession(mcp_client.session)
+        planner = OverallPlanner(mcp_session, plan_candidates=plan_candidates)
+        try:
+            final_plan = await planner.orchestrate_planning()
+        except UsageBudgetExceeded as e:
+            print(f"\n[STOPPED]: {e} Raise LLM_SESSION_TOKEN_BUDGET / LLM_SESSION_COST_BUDGET_USD to continue.")
+        planner.report_output_stats()
+        mcp_session.print_report()
+        tracker.print_session_report()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -6,20 +6,23 @@ from fastmcp import Client
 from google import genai
 from google.genai import types
 from ..history_manager import PersistentHistoryManager
+from .streaming import stream_reply
+from .tool_subsets import AgentToolbox
+from .history_compaction import compact_chat, text_only_history
+from .athlete_context import load_athlete_context, athlete_context_block
+from ..planning.plan_library import reference_plans_block
+from ..logging_setup import configure_logging
+from ..usage_tracking import UsageBudgetExceeded, tracker
+from .structured_output import MACROCYCLE_SCHEMA
 
 import json
 import datetime
 
 import logging
 
-# Configure logging to save thoughts to a file
-logging.basicConfig(
-    filename='thoughts_season_planner.log',
-    level=logging.INFO,
-    format='%(asctime)s - [%(levelname)s] - %(message)s',
-    filemode='a' # 'a' to append, 'w' to overwrite each session
-)
-logger = logging.getLogger("ThoughtLogger")
+# Thoughts go to the process-wide JSON log (logs/agents.jsonl), filterable by logger name
+configure_logging("agents.jsonl")
+logger = logging.getLogger("thoughts.season_planner")
 
 # --- 1. Load Configuration ---
 load_dotenv()
@@ -28,6 +31,14 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 today = datetime.date.today().strftime("%Y-%m-%d")
 
+# (temperature, planning emphasis) per candidate draft
+CANDIDATE_SEEDS = [
+    (0.7, "Classic linear periodization."),
+    (1.0, "A long aerobic base and a conservative load ramp."),
+    (1.2, "A polarized build with more VO2max work close to the race."),
+    (1.4, "Block periodization with short, focused build blocks."),
+]
+
 class Agent:
     def __init__(self, mcp_session, coach_name="Season Coach"):
         if not GEMINI_API_KEY:
@@ -35,106 +46,162 @@ class Agent:
         
         self.client = genai.Client(api_key=GEMINI_API_KEY)
         self.mcp_session = mcp_session
+        self.coach_name = coach_name
         self.memory = PersistentHistoryManager(self.client, max_messages=30, filename=f"memory/season_planner.json")
         
         # 1. Enable Thinking in the Config
         # include_thoughts=True allows us to see the reasoning parts.
-        self.chat = self.client.aio.chats.create(
-            model="gemini-2.5-flash",
-            history=self.memory.get_loadable_history(),
-            config=types.GenerateContentConfig(
-                tools=[self.mcp_session],
-                temperature=1.0, 
-                thinking_config=types.ThinkingConfig(
-                    include_thoughts=False,
-                    # Optional: budget_tokens=1024 # How much it's allowed to "think"
-                ),
-                system_instruction="""
-                ### ROLE
-                You are a World-Tour Cycling Coach and Exercise Physiologist specializing in periodization utilizing the most modern approaches. Your goal is to create a high-level Season Macrocycle for your athlete.
-
-                ### Data AVAILABLE
-                You have access to tools that can fetch the athlete's physiological and activity data from Garmin and the users goals and constraints.
-                
-                ### Query Parameters to consider:
-                1. Athlete Profile: (Age, Sex, Weight, VO2 Max, FTP).
-                2. The Goals: Main race, FTP goal etc.
-                3. Current Training State: (Avg. weekly hours over last 6 weeks, current fatigue).
-                4. Constraints: (Max hours/week available).
-                5. History: (Previous months training data).
-                6. Athletes Health Report: (Recent health status and any restrictions).
-
-                ### GUIDING PRINCIPLES
-                1. PERIODIZATION: Divide the season into distinct phases: 
-                - BASE: Focus on aerobic capacity and technique.
-                - BUILD: Focus on sport-specific power/pace and threshold.
-                - PEAK: Focus on race-pace intervals and maximum specificity.
-                - TAPER: Volume reduction to shed fatigue while maintaining intensity.
-                2. Ask clarifying questions if any parameters are missing or additional context is needed.
-
-                ### OUTPUT RULES
-                - If you are asking clarifying questions keep it brief and output only the questions.
-                - If you are providing the finalized plan: Return ONLY a JSON object. No conversational filler.
-
-                ### MACROCYCLE JSON STRUCTURE
+        self.model_id = "gemini-2.5-flash"
+        self.config = types.GenerateContentConfig(
+            temperature=1.0, 
+            thinking_config=types.ThinkingConfig(
+                include_thoughts=False,
+                # Optional: budget_tokens=1024 # How much it's allowed to "think"
+            ),
+            system_instruction="""
+            ### ROLE
+            You are a World-Tour Cycling Coach and Exercise Physiologist specializing in periodization utilizing the most modern approaches. Your goal is to create a high-level Season Macrocycle for your athlete.
+
+            ### Data AVAILABLE
+            You have access to tools that can fetch the athlete's physiological and activity data from Garmin and the users goals and constraints.
+            Start with get_athlete_digest: one call returns FTP, VO2 Max, weekly volume over the last 6/12/52 weeks,
+            monthly volume, the training load trend, the longest rides and recent races.
+            
+            ### Query Parameters to consider:
+            1. Athlete Profile: (Age, Sex, Weight, VO2 Max, FTP).
+            2. The Goals: Main race, FTP goal etc.
+            3. Current Training State: (Avg. weekly hours over last 6 weeks, current fatigue).
+            4. Constraints: (Max hours/week available).
+            5. History: (Previous months training data).
+            6. Athletes Health Report: (Recent health status and any restrictions).
+
+            ### GUIDING PRINCIPLES
+            1. PERIODIZATION: Divide the season into distinct phases: 
+            - BASE: Focus on aerobic capacity and technique.
+            - BUILD: Focus on sport-specific power/pace and threshold.
+            - PEAK: Focus on race-pace intervals and maximum specificity.
+            - TAPER: Volume reduction to shed fatigue while maintaining intensity.
+            2. Ask clarifying questions if any parameters are missing or additional context is needed.
+
+            ### OUTPUT RULES
+            - If you are asking clarifying questions keep it brief and output only the questions.
+            - If you are providing the finalized plan: Return ONLY a JSON object. No conversational filler.
+
+            ### MACROCYCLE JSON STRUCTURE
+            {
+            "macrocycle_id": "season_2024_2025",
+            "phases": [
+                {
+                "phase_name": "Base 1",
+                "duration_weeks": 4,
+                "objective": "Aerobic foundation and fat metabolism",
+                "priority_zones": [1, 2],
+                "target_weekly_hours_range": [6, 8],
+                "key_physiological_marker": "Lowering resting HR"
+                },
                 {
-                "macrocycle_id": "season_2024_2025",
-                "phases": [
-                    {
-                    "phase_name": "Base 1",
-                    "duration_weeks": 4,
-                    "objective": "Aerobic foundation and fat metabolism",
-                    "priority_zones": [1, 2],
-                    "target_weekly_hours_range": [6, 8],
-                    "key_physiological_marker": "Lowering resting HR"
-                    },
-                    {
-                    "phase_name": "Build 1",
-                    "duration_weeks": 4,
-                    "objective": "Threshold power and muscular endurance",
-                    "priority_zones": [3, 4],
-                    "target_weekly_hours_range": [8, 10],
-                    "key_physiological_marker": "Functional Threshold Power (FTP)"
-                    }
-                ]
+                "phase_name": "Build 1",
+                "duration_weeks": 4,
+                "objective": "Threshold power and muscular endurance",
+                "priority_zones": [3, 4],
+                "target_weekly_hours_range": [8, 10],
+                "key_physiological_marker": "Functional Threshold Power (FTP)"
                 }
-                """
-            )
+            ]
+            }
+            """ + f"""
+            ### RESPONSE SCHEMA
+            The final JSON object must validate against this JSON schema:
+            {json.dumps(MACROCYCLE_SCHEMA)}
+            """
+        )
+        # Only the profile, performance, goal and training summary tools are declared and callable
+        self.toolbox = AgentToolbox(self.mcp_session, "season_planner", self.config)
+        # Name, profile, FTP and goals, read once from the MCP resources (see load_context)
+        self.athlete_context = None
+        # Closest past accepted plans, set by the orchestrator (see PlanLibrary.warm_start)
+        self.reference_plans = []
+        self.chat = self.client.aio.chats.create(
+            model=self.model_id,
+            history=self.memory.get_loadable_history(),
+            config=self.config,
         )
 
 
 
+    async def load_context(self):
+        """Reads the athlete resources once per session."""
+        if self.athlete_context is None:
+            self.athlete_context = await load_athlete_context(self.mcp_session)
+        return self.athlete_context
+
+    def season_prompt(self, user_input=None, season_json=None, health_report=None):
+        """Builds the planning prompt: initial analysis, revision of a previous plan, or a plain reply."""
+        if season_json is not None:
+            return f"""
+            Based on the previous plan: {json.dumps(season_json)}, please revise it considering the following input: {user_input}
+            Return the updated Season Macrocycle JSON or ask clarifying questions if needed.
+            """
+        if user_input is None:
+            return (f"I want to do my season planning. Here is the health report: {json.dumps(health_report)} Based on your system instructions, please start the analysis."
+                    + athlete_context_block(self.athlete_context)
+                    + reference_plans_block(self.reference_plans))
+        return user_input
+
     async def plan_season(self, user_input=None, season_json=None, health_report=None):
         """
         Handles the conversation loop. 
         If user_input is None, it triggers the initial analysis.
         """
-        if season_json is not None:
-            prompt = f"""
-            Based on the previous plan: {json.dumps(season_json)}, please revise it considering the following input: {user_input}
-            Return the updated Season Macrocycle JSON or ask clarifying questions if needed.
-            """
-        elif user_input is None:
-            prompt = f"I want to do my season planning. Here is the health report: {json.dumps(health_report)} Based on your system instructions, please start the analysis."
-        else:
-            prompt = user_input
-
-        full_response_text = ""
-        # Using send_message instead of stream for easier tool-interaction handling in loops
-        response = await self.chat.send_message(prompt)
-        
-        # Log thoughts for debugging the "Anti-Hallucination" reasoning
-        if response.candidates[0].grounding_metadata:
-            logger.info(f"Grounding Metadata used: {response.candidates[0].grounding_metadata}")
+        await self.load_context()
+        prompt = self.season_prompt(user_input, season_json, health_report)
+
+        # Old tool responses are compacted so the resent history stays bounded
+        self.chat = compact_chat(self.client, self.chat, self.model_id, self.config)
 
-        for part in response.candidates[0].content.parts:
-            if part.thought:
-                logger.info(f"THOUGHT: {part.text}")
-            if part.text:
-                full_response_text += part.text
+        # Stream tokens to the console; thoughts and grounding metadata go to the log
+        full_response_text = await stream_reply(self.chat, prompt, self.coach_name, logger,
+                                                agent="season_planner", model=self.model_id, toolbox=self.toolbox)
 
         return self._clean_output(full_response_text)
     
+    async def draft_candidates(self, prompt, n=len(CANDIDATE_SEEDS)):
+        """
+        Drafts n macrocycles concurrently as single JSON-only calls with varied temperature and
+        planning emphasis. The conversation so far (e.g. answered questions) is passed as context;
+        tools are disabled so every draft costs exactly one request, and the tool call turns are
+        left out of the context (function calls without declarations are rejected). Failed drafts
+        are returned as None.
+        """
+        history = text_only_history(self.chat.get_history(curated=True))
+        seeds = [CANDIDATE_SEEDS[i % len(CANDIDATE_SEEDS)] for i in range(n)]
+
+        async def draft(temperature, emphasis):
+            contents = history + [types.Content(role="user", parts=[types.Part(text=(
+                f"{prompt}\n\nPlanning emphasis for this draft: {emphasis}\n"
+                "Do not ask questions. Return ONLY the Season Macrocycle JSON."
+            ))])]
+            try:
+                started = tracker.start()
+                response = await self.client.aio.models.generate_content(
+                    model=self.model_id,
+                    contents=contents,
+                    config=self.config.model_copy(update={
+                        "tools": None,
+                        "temperature": temperature,
+                        "response_mime_type": "application/json",
+                    }),
+                )
+                tracker.finish(started, "season_planner_candidate", self.model_id, response.usage_metadata, "generate_content")
+                return response.text
+            except UsageBudgetExceeded:
+                raise
+            except Exception as e:
+                logger.warning(f"Candidate draft (temperature {temperature}) failed: {e}")
+                return None
+
+        return await asyncio.gather(*(draft(temperature, emphasis) for temperature, emphasis in seeds))
+
     def _clean_output(self, text):
         """
         Extracts JSON from the response if present, 
@@ -153,11 +220,10 @@ async def main():
     print("--- Starting Season Planner (Tom) ---")
     
     async with Client(SERVER_FILE) as mcp_client:
-        agent = Agent(mcp_client.session)
+        agent = Agent(mcp_client.session, coach_name="Tom")
 
         # Initial Turn
         response = await agent.plan_season()
-        print(f"\nCoach Tom: {response}\n")
 
         # Interactive loop to allow for clarifying questions
         while True:
@@ -171,7 +237,6 @@ async def main():
                 break
                 
             response = await agent.plan_season(user_msg)
-            print(f"\nCoach Tom: {response}\n")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import sys
 import os
@@ -6,6 +7,31 @@ from fastmcp import Client
 from google import genai
 from google.genai import types
 from ..history_manager import PersistentHistoryManager
+from ..usage_tracking import UsageBudgetExceeded, tracker
+
+
+# Focused checks run concurrently: (flag label, criterion, input sections)
+CHECKS = {
+    "load_spike": (
+        "Load spike",
+        """LOAD SPIKE: Does any phase to check increase weekly hours too rapidly compared to its neighbours or to the
+        athlete's recent weekly hours, or push the fitness ramp above 8 CTL/week in the projection? Is the load
+        compatible with the health report's restrictions?""",
+        ("overview", "phases", "volume", "health", "projection"),
+    ),
+    "objective": (
+        "Objective mismatch",
+        """OBJECTIVE MISMATCH: Does the plan align with the stated main race goal (date, distance, demands)? Use the
+        projected race-day form (fresh at +5 to +25) and the peak fitness ramp instead of estimating them.""",
+        ("overview", "phases", "goals", "projection"),
+    ),
+    "hallucination": (
+        "Hallucination",
+        """HALLUCINATION: Does a phase to check reference stats (like a VO2 max or FTP), past races or training
+        volumes that are NOT in the athlete history or goals?""",
+        ("phases", "history", "goals"),
+    ),
+}
 
 
 class SeasonContentCheckerAgent:
@@ -20,35 +46,92 @@ class SeasonContentCheckerAgent:
             global athlete_goals
             athlete_goals = json.loads(f.read())
 
-    async def check_plan(self, season_plan_json, athlete_history_summary, athlete_health_report):
+    async def check_plan(self, season_plan_json, athlete_history_summary, athlete_health_report, phases_to_check=None,
+                         load_projection=None):
         """
         Compares the proposed plan against actual history to detect hallucinations.
+        The load spike, objective and hallucination criteria are judged by three small
+        concurrent calls, each with only the inputs it needs, and merged into one verdict.
+        If phases_to_check (list of phase indices) is given, only those phases are sent
+        in full; the rest of the plan is summarized as an overview for context.
+        load_projection is the simulated fitness/fatigue outcome (LoadSimulator.project).
         """
+        phases = season_plan_json.get("phases", [])
+        if phases_to_check is None:
+            phases_to_check = list(range(len(phases)))
+
+        plan_overview = [
+            {
+                "phase_index": i,
+                "phase_name": phase.get("phase_name"),
+                "duration_weeks": phase.get("duration_weeks"),
+                "target_weekly_hours_range": phase.get("target_weekly_hours_range"),
+            }
+            for i, phase in enumerate(phases)
+        ]
+        phases_under_review = [dict(phase, phase_index=i) for i, phase in enumerate(phases) if i in phases_to_check]
+        projection_summary = {k: v for k, v in (load_projection or {}).items() if k != "weekly"}
+        history = athlete_history_summary or {}
+
+        sections = {
+            "overview": ("PLAN OVERVIEW (all phases, for context)", plan_overview),
+            "phases": ("PHASES TO CHECK (changed phases and their neighbours)", phases_under_review),
+            "history": ("ATHLETE HISTORY (Ground Truth)", history),
+            "volume": ("ATHLETE TRAINING VOLUME AND LOAD (Ground Truth)",
+                       # The projection is on the TSS scale of tss_load, not Garmin's EPOC-based load
+                       {"volume": history.get("volume"), "load": history.get("load"),
+                        "tss_load": history.get("tss_load")}),
+            "goals": ("ATHLETE GOALS", athlete_goals),
+            "health": ("ATHLETE HEALTH REPORT", athlete_health_report),
+            "projection": ("SIMULATED LOAD PROJECTION (Banister fitness/fatigue model, computed not guessed)",
+                           projection_summary),
+        }
+
+        results = await asyncio.gather(*(
+            self.run_check(name, sections) for name in CHECKS
+        ), return_exceptions=True)
+        for result in results:
+            if isinstance(result, UsageBudgetExceeded):
+                raise result
+        # A check that could not run counts as not passed, with the reason as its flag
+        return merge_checks({
+            name: {"passed": False, "safety_score": None, "flags": [f"Check failed: {result}"]}
+            if isinstance(result, Exception) else result
+            for name, result in zip(CHECKS, results)
+        })
+
+    async def run_check(self, name, sections):
+        """One focused verification call. Returns its JSON verdict."""
+        label, criterion, inputs = CHECKS[name]
+        input_data = "\n".join(
+            f"        {n}. {sections[key][0]}: {json.dumps(sections[key][1])}" for n, key in enumerate(inputs, start=1)
+        )
         prompt = f"""
         ### ROLE
-        You are a World-Tour Physiologist. Your job is to FACT-CHECK a proposed Season Macrocycle.
+        You are a World-Tour Physiologist. Your job is to FACT-CHECK one aspect of a proposed Season Macrocycle.
 
         ### INPUT DATA
-        1. PROPOSED PLAN: {json.dumps(season_plan_json)}
-        2. ATHLETE HISTORY (Ground Truth): {json.dumps(athlete_history_summary)}
-        3. ATHLETE GOALS: {json.dumps(athlete_goals)}
-        4. ATHLETE HEALTH REPORT: {json.dumps(athlete_health_report)}
+{input_data}
 
-        ### VALIDATION CRITERIA
-        - LOAD SPIKE: Does any phase increase weekly hours too rapidly?
-        - OBJECTIVE MISMATCH: Does the plan align with the stated main race goal?
-        - HALLUCINATION: Does the plan reference stats (like a VO2 max or FTP) that are NOT in the history?
+        ### VALIDATION CRITERION
+        {criterion}
+        Judge ONLY this criterion. Be specific: name the phase and the number that is wrong, and what it should be.
 
         ### OUTPUT FORMAT
         Return a JSON object:
         {{
-            "is_valid": bool,
+            "passed": bool,
             "safety_score": int (1-10),
             "flags": ["list of specific issues found"],
-            "recommendation": "Brief fix for the Season Planner"
+            "recommendation": "Concrete fix for the Season Planner, empty if passed",
+            "phase_verdicts": [
+                {{"phase_index": int, "is_valid": bool, "flags": ["issues specific to this phase"]}}
+            ]
         }}
+        Include one phase_verdicts entry for every phase to check.
         """
-        
+
+        started = tracker.start()
         response = await self.client.aio.models.generate_content(
             model=self.model_id,
             contents=prompt,
@@ -57,4 +140,40 @@ class SeasonContentCheckerAgent:
                 response_mime_type="application/json"
             )
         )
-        return json.loads(response.text)
\ No newline at end of file
+        tracker.finish(started, f"season_verifier:{name}", self.model_id, response.usage_metadata, "generate_content")
+        return json.loads(response.text)
+
+
+def merge_checks(results):
+    """
+    Combines the focused check verdicts into the check_plan shape: valid only if every check
+    passed, the lowest known safety score, labelled flags and per-phase verdicts, and the fixes of the
+    failed checks as the recommendation. A phase verdict is only emitted when every check returned
+    one for that phase; other phases are left out, so the caller treats them as unverified.
+    """
+    flags, recommendations, phase_verdicts, judged_by = [], [], {}, {}
+    for name, result in results.items():
+        label = CHECKS[name][0]
+        flags += [f"[{label}] {flag}" for flag in result.get("flags", [])]
+        if not result.get("passed", False) and result.get("recommendation"):
+            recommendations.append(f"{label}: {result['recommendation']}")
+        for verdict in result.get("phase_verdicts", []):
+            index = verdict.get("phase_index")
+            if index is None or "is_valid" not in verdict:
+                continue
+            merged = phase_verdicts.setdefault(index, {"phase_index": index, "is_valid": True, "flags": []})
+            merged["is_valid"] = merged["is_valid"] and bool(verdict["is_valid"])
+            merged["flags"] += [f"[{label}] {flag}" for flag in verdict.get("flags", [])]
+            judged_by.setdefault(index, set()).add(name)
+
+    # Checks that failed or omitted a usable score do not count; if none has one, assume the worst
+    scores = [int(score) for score in (result.get("safety_score", 10) for result in results.values())
+              if isinstance(score, (int, float))]
+    return {
+        "is_valid": all(bool(result.get("passed", False)) for result in results.values()),
+        "safety_score": min(scores) if scores else 1,
+        "flags": flags,
+        "recommendation": " ".join(recommendations),
+        "phase_verdicts": [phase_verdicts[index] for index in sorted(phase_verdicts)
+                           if judged_by[index] == set(results)],
+    }
@@ -0,0 +1,121 @@
+import time
+
+from ..usage_tracking import tracker
+
+
+class IncrementalReplyParser:
+    """
+    Classifies a streamed reply as a clarifying question or a JSON object
+    from the first few characters, instead of waiting for the full response.
+    """
+    QUESTION = "question"
+    JSON = "json"
+
+    def __init__(self):
+        self.text = ""
+        self.kind = None
+
+    def feed(self, chunk_text):
+        """Appends a chunk and returns the reply kind (None while still undecided)."""
+        tail_start = max(0, len(self.text) - len("```json"))
+        self.text += chunk_text
+
+        if self.kind == self.JSON:
+            return self.kind
+
+        # A short text preamble can still be followed by a ```json block
+        if "```json" in self.text[tail_start:]:
+            self.kind = self.JSON
+        else:
+            self.kind = self._classify_head(self.text.lstrip())
+        return self.kind
+
+    def _classify_head(self, head):
+        if not head:
+            return None
+        if head.startswith("{"):
+            return self.JSON
+        if head.startswith("`"):
+            # Wait until the fence language (or the opening brace) has arrived
+            fence_body = head.lstrip("`").lstrip()
+            if not fence_body:
+                return None
+            if fence_body.startswith("{") or fence_body.startswith("json"):
+                return self.JSON
+            if "json".startswith(fence_body):
+                return None
+        return self.QUESTION
+
+
+async def stream_reply(chat, message, speaker, logger, agent=None, model=None, toolbox=None):
+    """
+    Sends a message on a chat session and prints the reply token by token.
+    Clarifying questions are printed as conversation, JSON plans are printed
+    under a progress header. With a toolbox, function calls of the model are
+    run through it and their responses sent back until the model answers in text.
+    Token usage and latency are recorded for `agent` per request.
+    Returns the text of the model's final round; text written before tool calls
+    (e.g. "Let me pull your data first.") is shown and logged, but not returned.
+    """
+    config = await toolbox.request_config() if toolbox else None
+
+    while True:
+        # Each model round is classified on its own, so a preamble cannot mask a JSON answer
+        parser = IncrementalReplyParser()
+        announced_kind = None
+        printed = 0
+        usage_metadata = None
+        first_token_at = None
+        function_calls = []
+
+        started = tracker.start()
+        stream = await chat.send_message_stream(message, config=config)
+        async for chunk in stream:
+            # Counts are cumulative, the last chunk carries the totals of the reply
+            if chunk.usage_metadata:
+                usage_metadata = chunk.usage_metadata
+            if not chunk.candidates or not chunk.candidates[0].content:
+                continue
+            candidate = chunk.candidates[0]
+            if candidate.grounding_metadata:
+                logger.info(f"Grounding Metadata used: {candidate.grounding_metadata}")
+            if not candidate.content.parts:
+                continue
+
+            for part in candidate.content.parts:
+                if part.function_call:
+                    function_calls.append(part.function_call)
+                    continue
+                if part.thought:
+                    logger.info(f"THOUGHT: {part.text}")
+                    continue
+                if not part.text:
+                    continue
+
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                kind = parser.feed(part.text)
+                if kind is None:
+                    continue
+
+                if kind != announced_kind:
+                    if kind == IncrementalReplyParser.JSON:
+                        print(f"\n[{speaker} is writing the JSON...]")
+                    else:
+                        print(f"\n[{speaker}]: ", end="")
+                    announced_kind = kind
+
+                print(parser.text[printed:], end="", flush=True)
+                printed = len(parser.text)
+
+        tracker.finish(started, agent or speaker, model, usage_metadata, "chat_stream", first_token_at)
+        if printed:
+            print()
+        if not (function_calls and toolbox):
+            break
+        if parser.text.strip():
+            logger.info(f"Text before tool calls: {parser.text.strip()}")
+        logger.info(f"Tool calls: {[call.name for call in function_calls]}")
+        message = await toolbox.call_all(function_calls)
+
+    return parser.text
@@ -0,0 +1,325 @@
+import json
+import re
+
+# --- Response schemas (JSON Schema subset: type, enum, properties, required, items, min/max) ---
+
+HEALTH_CLEARANCE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "health_status": {"type": "string", "enum": ["Green", "Yellow", "Red"]},
+        "readiness_score (0-100)": {"type": "integer", "minimum": 0, "maximum": 100},
+        "biometric_red_flags": {"type": "array", "items": {"type": "string"}},
+        "coach_restrictions": {"type": "string"},
+    },
+    "required": ["health_status", "readiness_score (0-100)", "biometric_red_flags", "coach_restrictions"],
+}
+
+MACROCYCLE_PHASE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "phase_name": {"type": "string"},
+        "duration_weeks": {"type": "integer", "minimum": 1},
+        "objective": {"type": "string"},
+        "priority_zones": {"type": "array", "items": {"type": "integer", "minimum": 1, "maximum": 7}, "minItems": 1},
+        "target_weekly_hours_range": {"type": "array", "items": {"type": "number", "minimum": 0}, "minItems": 2, "maxItems": 2},
+        "key_physiological_marker": {"type": "string"},
+    },
+    "required": ["phase_name", "duration_weeks", "priority_zones", "target_weekly_hours_range"],
+}
+
+MACROCYCLE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "macrocycle_id": {"type": "string"},
+        "phases": {"type": "array", "items": MACROCYCLE_PHASE_SCHEMA, "minItems": 1},
+    },
+    "required": ["phases"],
+}
+
+
+# --- Compiled validator ---
+
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+}
+
+def compile_validator(schema):
+    """
+    Compiles a schema into a closure tree once, so validating an output is a
+    plain function call without re-interpreting the schema.
+    The returned function takes (value, path="$") and returns a list of error strings.
+    """
+    checks = []
+    schema_type = schema.get("type")
+
+    if schema_type:
+        type_ok = _TYPE_CHECKS[schema_type]
+        checks.append(lambda v, path: [] if type_ok(v) else [f"{path}: expected {schema_type}, got {type(v).__name__}"])
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+        checks.append(lambda v, path: [] if v in allowed else [f"{path}: {v!r} is not one of {allowed}"])
+
+    if "minimum" in schema:
+        minimum = schema["minimum"]
+        checks.append(lambda v, path: [f"{path}: {v} is below {minimum}"] if _is_number(v) and v < minimum else [])
+
+    if "maximum" in schema:
+        maximum = schema["maximum"]
+        checks.append(lambda v, path: [f"{path}: {v} is above {maximum}"] if _is_number(v) and v > maximum else [])
+
+    if schema_type == "object":
+        required = schema.get("required", [])
+        properties = {key: compile_validator(sub) for key, sub in schema.get("properties", {}).items()}
+
+        def check_object(v, path):
+            if not isinstance(v, dict):
+                return []
+            errors = [f"{path}: missing required key '{key}'" for key in required if key not in v]
+            for key, validate in properties.items():
+                if key in v:
+                    errors.extend(validate(v[key], f"{path}.{key}"))
+            return errors
+        checks.append(check_object)
+
+    if schema_type == "array":
+        min_items = schema.get("minItems")
+        max_items = schema.get("maxItems")
+        validate_item = compile_validator(schema["items"]) if "items" in schema else None
+
+        def check_array(v, path):
+            if not isinstance(v, list):
+                return []
+            errors = []
+            if min_items is not None and len(v) < min_items:
+                errors.append(f"{path}: expected at least {min_items} items, got {len(v)}")
+            if max_items is not None and len(v) > max_items:
+                errors.append(f"{path}: expected at most {max_items} items, got {len(v)}")
+            if validate_item:
+                for i, item in enumerate(v):
+                    errors.extend(validate_item(item, f"{path}[{i}]"))
+            return errors
+        checks.append(check_array)
+
+    def validate(value, path="$"):
+        errors = []
+        for check in checks:
+            errors.extend(check(value, path))
+        return errors
+
+    return validate
+
+def _is_number(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+# --- Schema-guided coercion of near misses ---
+
+def coerce_to_schema(value, schema):
+    """
+    Fixes common near misses in place of a re-prompt: numeric strings,
+    wrong-case enum values, integral floats and scalars where a list is expected.
+    Returns (value, changed).
+    """
+    schema_type = schema.get("type")
+
+    if schema_type == "object" and isinstance(value, dict):
+        changed = False
+        for key, sub in schema.get("properties", {}).items():
+            if key in value:
+                value[key], sub_changed = coerce_to_schema(value[key], sub)
+                changed = changed or sub_changed
+        return value, changed
+
+    if schema_type == "array":
+        changed = False
+        if not isinstance(value, list) and value is not None:
+            value, changed = [value], True
+        if isinstance(value, list) and "items" in schema:
+            for i, item in enumerate(value):
+                value[i], item_changed = coerce_to_schema(item, schema["items"])
+                changed = changed or item_changed
+        return value, changed
+
+    if schema_type in ("integer", "number") and isinstance(value, str):
+        match = re.search(r"-?\d+(\.\d+)?", value)
+        if match:
+            value = float(match.group(0))
+            return (int(value) if schema_type == "integer" and value.is_integer() else value), True
+
+    if schema_type == "integer" and isinstance(value, float) and value.is_integer():
+        return int(value), True
+
+    if "enum" in schema and isinstance(value, str) and value not in schema["enum"]:
+        for option in schema["enum"]:
+            if value.strip().lower() == str(option).lower():
+                return option, True
+
+    return value, False
+
+
+# --- Tolerant JSON repair ---
+
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+def looks_like_json(text):
+    head = text.strip()
+    return head.startswith("{") or head.startswith("```")
+
+def repair_json(text):
+    """
+    Repairs typical LLM JSON mistakes without another model call: code fences,
+    trailing text, trailing commas, single quotes, Python literals, comments,
+    raw newlines in strings and output truncated before the closing brackets.
+    Raises ValueError when the text cannot be turned into a JSON object.
+    """
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("no JSON object found")
+    source = text[start:].translate(_SMART_QUOTES)
+
+    out = []
+    stack = []
+    safe_points = []  # (len(out), open brackets) after each complete member
+    quote = None
+    i = 0
+    while i < len(source):
+        ch = source[i]
+
+        if quote:
+            if ch == "\\" and i + 1 < len(source):
+                out.append(source[i:i + 2])
+                i += 2
+                continue
+            if ch == quote:
+                out.append('"')
+                quote = None
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if stack:
+                out.append(stack.pop())
+            if not stack:
+                break  # ignore anything after the outermost object
+        elif ch == ",":
+            safe_points.append((len(out), list(stack)))
+            out.append(ch)
+        elif ch == "/" and source.startswith("//", i):
+            end = source.find("\n", i)
+            i = len(source) if end < 0 else end
+            continue
+        elif ch == "#":
+            end = source.find("\n", i)
+            i = len(source) if end < 0 else end
+            continue
+        elif ch.isalpha():
+            word = re.match(r"[A-Za-z_][A-Za-z0-9_]*", source[i:]).group(0)
+            i += len(word)
+            if source[i:].lstrip().startswith(":"):
+                out.append(f'"{word}"')  # unquoted key
+            else:
+                out.append(_LITERALS.get(word, word))
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    if quote:
+        out.append('"')
+
+    candidate = _close(out, stack)
+    try:
+        return json.loads(candidate, strict=False)
+    except ValueError:
+        pass
+
+    # Truncated mid-member: fall back to the last complete member and close from there
+    for length, open_brackets in reversed(safe_points):
+        try:
+            return json.loads(_close(out[:length], open_brackets), strict=False)
+        except ValueError:
+            continue
+    raise ValueError("JSON could not be repaired")
+
+def _drop_trailing_comma(out):
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+
+def _close(out, open_brackets):
+    out = list(out)
+    _drop_trailing_comma(out)
+    return "".join(out) + "".join(reversed(open_brackets))
+
+
+class StructuredOutputParser:
+    """
+    Parses agent output against a response schema. Valid output passes straight
+    through, near misses are repaired locally, and only unrecoverable output
+    needs a re-prompt. Keeps counters so the saved round trips can be reported.
+    """
+    def __init__(self, schema, name):
+        self.schema = schema
+        self.name = name
+        self._validate = compile_validator(schema)
+        self.stats = {"valid": 0, "repaired_locally": 0, "reprompted": 0}
+
+    def parse(self, text):
+        """
+        Returns (obj, errors). obj is None with no errors if the text is
+        conversation (e.g. a clarifying question) rather than JSON.
+        """
+        repaired = False
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            if not looks_like_json(text):
+                return None, []
+            try:
+                obj = repair_json(text)
+                repaired = True
+            except ValueError as e:
+                return None, [f"$: {e}"]
+
+        obj, coerced = coerce_to_schema(obj, self.schema)
+        errors = self._validate(obj)
+        if errors:
+            return obj, errors
+
+        if repaired or coerced:
+            self.stats["repaired_locally"] += 1
+        else:
+            self.stats["valid"] += 1
+        return obj, []
+
+    def reprompt_message(self, errors):
+        """Builds the correction request sent back to the agent when local repair was not enough."""
+        self.stats["reprompted"] += 1
+        issues = "\n".join(f"- {e}" for e in errors[:10])
+        return f"Your {self.name} JSON does not match the required structure:\n{issues}\nReturn ONLY the corrected JSON object."
+
+    @property
+    def round_trips_saved(self):
+        return self.stats["repaired_locally"]
@@ -0,0 +1,129 @@
+"""
+Client-side memo of MCP tool results for one planning session.
+
+MemoizedSession wraps the MCP ClientSession that all agents share and answers repeated
+call_tool requests (same tool, same canonical arguments) from memory. How long a result
+stays valid depends on the data it covers:
+- historical dates/months and finished activities never change: kept for the session
+- today, the current month or open date ranges: kept for TODAY_TTL_S
+- undated tools: per-tool TTL from TOOL_TTLS, else the whole session
+Write tools are never memoized and drop the results they make stale.
+"""
+import asyncio
+import datetime
+import json
+import re
+import time
+
+TODAY_TTL_S = 10 * 60
+
+TOOL_TTLS = {
+    "get_todays_date": 60,
+    "get_wellness_anomalies": TODAY_TTL_S,
+    "get_athlete_digest": TODAY_TTL_S,
+}
+
+# Tools that change server state, with the tools whose results they make stale
+INVALIDATES = {
+    "update_user_goals": ("get_user_goals",),
+    "add_race_goal": ("get_user_goals",),
+    "refresh_athlete_resources": ("get_user_profile", "get_cycling_ftp", "get_user_name"),
+    "sync_activities": (
+        "get_recent_activities_by_type", "list_activities_between_dates", "get_athlete_digest",
+        "get_time_in_zones_for_range", "get_heat_exposure", "get_power_curve_for_range",
+    ),
+    "cache_activity_streams": ("get_power_curve_for_range", "get_activity_stream_summary"),
+    "batch_call": (),
+}
+
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def memo_key(name, arguments):
+    return name, json.dumps(arguments or {}, sort_keys=True, default=str)
+
+
+def result_ttl(name, arguments, today=None):
+    """Seconds a result stays valid (None: the whole session)."""
+    today = today or datetime.date.today()
+    arguments = arguments or {}
+    if name in TOOL_TTLS:
+        return TOOL_TTLS[name]
+
+    dates = [datetime.date.fromisoformat(v) for v in arguments.values() if isinstance(v, str) and DATE_PATTERN.match(v)]
+    if "year" in arguments and "month" in arguments:
+        try:
+            year, month = int(arguments["year"]), int(arguments["month"])
+            dates.append(datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1))
+        except (TypeError, ValueError):
+            pass
+    if any(day >= today for day in dates):
+        return TODAY_TTL_S
+    return None
+
+
+class MemoizedSession:
+    """
+    Drop-in wrapper of an MCP ClientSession that memoizes call_tool. Everything else
+    (list_tools, read_resource, ...) goes straight to the wrapped session.
+    """
+    def __init__(self, session):
+        self.session = session
+        self.entries = {}   # key -> (result, expires_at or None)
+        self.pending = {}   # key -> task, so concurrent identical calls share one request
+        self.stats = {}     # tool -> {"hits": n, "misses": n}
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    async def call_tool(self, name, arguments=None, **kwargs):
+        if name in INVALIDATES:
+            result = await self.session.call_tool(name, arguments, **kwargs)
+            stale = set(INVALIDATES[name])
+            if name == "batch_call":
+                # Batches are not memoized, but may contain write tools
+                for call in (arguments or {}).get("calls", []):
+                    stale.update(INVALIDATES.get(call.get("tool"), ()))
+            self.invalidate(stale)
+            return result
+
+        key = memo_key(name, arguments)
+        stats = self.stats.setdefault(name, {"hits": 0, "misses": 0})
+        entry = self.entries.get(key)
+        if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+            stats["hits"] += 1
+            return entry[0]
+        if key in self.pending:
+            stats["hits"] += 1
+            return await self.pending[key]
+
+        stats["misses"] += 1
+        task = asyncio.ensure_future(self.session.call_tool(name, arguments, **kwargs))
+        self.pending[key] = task
+        try:
+            result = await task
+        finally:
+            del self.pending[key]
+        if not (getattr(result, "is_error", None) or getattr(result, "isError", False)):
+            ttl = result_ttl(name, arguments)
+            self.entries[key] = (result, None if ttl is None else time.monotonic() + ttl)
+        return result
+
+    def invalidate(self, tool_names):
+        for key in [key for key in self.entries if key[0] in tool_names]:
+            del self.entries[key]
+
+    def format_report(self):
+        """Hits and misses per tool, plus totals."""
+        lines = [f"{'tool':<36}{'hits':>6}{'misses':>8}"]
+        hits = misses = 0
+        for name, s in sorted(self.stats.items(), key=lambda item: -item[1]["hits"]):
+            lines.append(f"{name:<36}{s['hits']:>6}{s['misses']:>8}")
+            hits, misses = hits + s["hits"], misses + s["misses"]
+        rate = hits / (hits + misses) if hits + misses else 0.0
+        lines.append(f"{'TOTAL':<36}{hits:>6}{misses:>8}  ({rate:.0%} served from memo)")
+        return "\n".join(lines)
+
+    def print_report(self):
+        print("\n--- Tool result memo ---")
+        print(self.format_report())
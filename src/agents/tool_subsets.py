@@ -0,0 +1,185 @@
+"""
+Per-agent MCP tool subsets.
+
+Passing the MCP session as a tool sends the declarations of every server tool on every
+request. Instead, each agent gets an AgentToolbox that declares only the tools listed for it
+in AGENT_TOOLS, with automatic function calling disabled; stream_reply runs the tool loop and
+every call is checked against the subset before it reaches the server.
+
+Declaration overhead per request, all tools vs. each agent's subset:
+    python -m src.agents.tool_subsets
+"""
+import asyncio
+import json
+import os
+
+from dotenv import load_dotenv
+from fastmcp import Client
+from google import genai
+from google.genai import types
+
+# Function calls of one model turn run concurrently, at most this many at a time
+MAX_CONCURRENT_TOOL_CALLS = 4
+
+SERVER_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mcp_server.py")
+
+AGENT_TOOLS = {
+    "health_specialist": (
+        "get_todays_date",
+        "get_wellness_anomalies",
+        "get_resting_hr",
+        "get_stress_level",
+        "get_sleep_data",
+        "get_hrv_data",
+        "get_training_readiness",
+        "batch_call",
+    ),
+    "season_planner": (
+        # Name, profile, FTP and goals come from the athlete resources at session start
+        "get_todays_date",
+        "get_athlete_digest",
+        "get_vo2_max",
+        "get_training_status",
+        "get_training_load",
+        "get_user_goals",
+        "update_user_goals",
+        "add_race_goal",
+        "get_monthly_training_summary",
+        "get_weekly_training_summary_by_date",
+        "get_time_in_zones_for_range",
+        "get_power_curve_for_range",
+        "get_heat_exposure",
+        "batch_call",
+    ),
+}
+
+
+def function_declaration(tool):
+    """Gemini function declaration for an MCP tool (its input schema is passed through as JSON schema)."""
+    return types.FunctionDeclaration(
+        name=tool.name,
+        description=tool.description,
+        # MCP SDK v2 renamed inputSchema to input_schema
+        parameters_json_schema=getattr(tool, "input_schema", None) or tool.inputSchema,
+    )
+
+
+class AgentToolbox:
+    """
+    The MCP tools one agent may use. request_config() adds their declarations to the agent's
+    config (without automatic function calling); call() executes a model function call after
+    checking it against the subset.
+    """
+    def __init__(self, mcp_session, agent, base_config, allowed=None, max_concurrency=MAX_CONCURRENT_TOOL_CALLS):
+        self.mcp_session = mcp_session
+        self.agent = agent
+        self.base_config = base_config
+        self.allowed = set(allowed if allowed is not None else AGENT_TOOLS[agent])
+        self.max_concurrency = max_concurrency
+        self._config = None
+
+    async def request_config(self):
+        """The agent's config with the subset's declarations; tools are listed once per toolbox."""
+        if self._config is None:
+            listed = await self.mcp_session.list_tools()
+            declarations = [function_declaration(tool) for tool in listed.tools if tool.name in self.allowed]
+            self._config = self.base_config.model_copy(update={
+                "tools": [types.Tool(function_declarations=declarations)],
+                "automatic_function_calling": types.AutomaticFunctionCallingConfig(disable=True),
+            })
+        return self._config
+
+    async def call_all(self, function_calls):
+        """
+        Runs the function calls of one model turn concurrently (capped at max_concurrency) and
+        returns their response parts in call order, ready to be sent back as one message.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def call_one(function_call):
+            async with semaphore:
+                return await self.call(function_call)
+
+        return await asyncio.gather(*(call_one(function_call) for function_call in function_calls))
+
+    async def call(self, function_call):
+        """Runs one function call on the MCP server and returns the function response part."""
+        name = function_call.name
+        args = dict(function_call.args or {})
+        try:
+            if name not in self.allowed:
+                response = {"error": f"Tool {name} not available to the {self.agent}."}
+            elif name == "batch_call":
+                response = await self.call_batch(args.get("calls"))
+            else:
+                result = await self.mcp_session.call_tool(name, args)
+                text = "\n".join(c.text for c in result.content if getattr(c, "text", None))
+                response = {"error": text} if result.is_error else {"result": text}
+        except Exception as e:
+            response = {"error": f"Tool '{name}' failed: {e}"}
+        return types.Part.from_function_response(name=name, response=response)
+
+    def batch_item_error(self, call):
+        """Why one batched call may not run, or None."""
+        if not isinstance(call, dict):
+            return f'Each call must be an object {{"tool": ..., "arguments": {{...}}}}, got {type(call).__name__}.'
+        if call.get("tool") not in self.allowed:
+            return f"Tool {call.get('tool')} not available to the {self.agent}."
+        return None
+
+    async def call_batch(self, calls):
+        """
+        Runs a batch_call with the calls that pass the subset check; the others get a per-item
+        error in the same {"tool", "ok", "error"} form the server uses, at their position.
+        """
+        if not isinstance(calls, list):
+            return {"error": "'calls' must be a list of {\"tool\": ..., \"arguments\": {...}} objects."}
+        errors = [self.batch_item_error(call) for call in calls]
+        valid = [call for call, error in zip(calls, errors) if error is None]
+        results = iter([])
+        if valid:
+            result = await self.mcp_session.call_tool("batch_call", {"calls": valid})
+            text = "\n".join(c.text for c in result.content if getattr(c, "text", None))
+            if result.is_error:
+                return {"error": text}
+            results = iter(json.loads(text))
+        merged = [
+            next(results) if error is None
+            else {"tool": call.get("tool") if isinstance(call, dict) else None, "ok": False, "error": error}
+            for call, error in zip(calls, errors)
+        ]
+        return {"result": json.dumps(merged)}
+
+
+async def declaration_report(mcp_session, client, model="gemini-2.5-flash"):
+    """Tokens of the function declarations sent per request: all server tools vs. each agent's subset."""
+    listed = await mcp_session.list_tools()
+    declarations = {tool.name: function_declaration(tool).model_dump(exclude_none=True) for tool in listed.tools}
+
+    async def count(names):
+        payload = json.dumps([declarations[name] for name in names if name in declarations])
+        response = await client.aio.models.count_tokens(model=model, contents=payload)
+        return response.total_tokens
+
+    full = await count(list(declarations))
+    rows = [("all tools", len(declarations), full)]
+    for agent, names in AGENT_TOOLS.items():
+        rows.append((agent, len([n for n in names if n in declarations]), await count(names)))
+
+    lines = [f"{'declarations':<22}{'tools':>6}{'tokens/turn':>13}{'saved':>8}"]
+    for label, tools, tokens in rows:
+        saved = f"{1 - tokens / full:.0%}" if full and label != "all tools" else ""
+        lines.append(f"{label:<22}{tools:>6}{tokens:>13}{saved:>8}")
+    return "\n".join(lines)
+
+
+async def main():
+    load_dotenv()
+    client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+    async with Client(SERVER_FILE) as mcp_client:
+        print(await declaration_report(mcp_client.session, client))
+    print("Measured prompt tokens per call: python -m src.usage_tracking")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
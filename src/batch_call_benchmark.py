@@ -0,0 +1,58 @@
+"""
+Benchmark: N tool calls as sequential MCP round trips vs. one batch_call.
+
+    python src/batch_call_benchmark.py [--tool get_resting_hr] [--days 14]
+
+The tool is called once per date for the last --days days (tools without a date argument
+are called with no arguments). Both runs go through the same stdio MCP server.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import time
+
+from fastmcp import Client
+
+SERVER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_server.py")
+
+
+async def benchmark(tool, days):
+    today = datetime.date.today()
+    async with Client(SERVER_FILE) as client:
+        listed = {t.name: t for t in await client.list_tools()}
+        takes_date = "date_str" in (listed[tool].input_schema.get("properties") or {})
+        calls = [
+            {"tool": tool, "arguments": {"date_str": (today - datetime.timedelta(days=i)).isoformat()} if takes_date else {}}
+            for i in range(days)
+        ]
+        # Warm-up: login and imports are not part of either measurement
+        await client.call_tool(tool, calls[0]["arguments"], raise_on_error=False)
+
+        started = time.perf_counter()
+        for call in calls:
+            await client.call_tool(call["tool"], call["arguments"], raise_on_error=False)
+        sequential = time.perf_counter() - started
+
+        started = time.perf_counter()
+        result = await client.call_tool("batch_call", {"calls": calls})
+        batched = time.perf_counter() - started
+        failed = sum(1 for item in json.loads(result.content[0].text) if not item["ok"])
+
+    print(f"{len(calls)} x {tool}")
+    print(f"  sequential round trips: {sequential:7.2f} s")
+    print(f"  one batch_call:         {batched:7.2f} s  ({failed} failed items)")
+    print(f"  speedup:                {sequential / batched:7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential tool calls vs. batch_call.")
+    parser.add_argument("--tool", default="get_resting_hr")
+    parser.add_argument("--days", type=int, default=14)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.tool, args.days))
+
+
+if __name__ == "__main__":
+    main()
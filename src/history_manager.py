@@ -2,6 +2,7 @@ import json
 import os
 from google import genai
 from google.genai import types
+from .usage_tracking import tracker
 
 class PersistentHistoryManager:
     def __init__(self, client, filename="memory/agent_memory.json", max_messages=30):
@@ -43,10 +44,13 @@ class PersistentHistoryManager:
         Task: Update the summary. Preserve events like illness, injuries or similar data NOT related to goals or performance metrics. Do NOT include specific details about goals or performance metrics since those can be looked up separately.
         Keep it concise. No unnecessary elaboration. Can be empty if no relevant info.
         """
+        started = tracker.start()
         response = self.client.models.generate_content(
             model="gemini-2.5-flash",
             contents=prompt
         )
+        agent = f"memory_summary:{os.path.splitext(os.path.basename(self.filename))[0]}"
+        tracker.finish(started, agent, "gemini-2.5-flash", response.usage_metadata, "summarize")
         self.summary = response.text.strip()
         print(" [System]: Memory updated.")
 
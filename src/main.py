@@ -1,6 +1,15 @@
 import asyncio
+import json
+import os
 import sys
+import time
 from src.agents.master_training_planner import main as run_season_planner
+from src.planning.workout_generator import WorkoutGenerator
+from src.storage.activity_store import DB_FILE, ActivityStore
+from src.storage.athlete_digest import AthleteDigest
+
+SEASON_PLAN_FILE = "memory/master_season_plan.json"
+WORKOUTS_FILE = "memory/weekly_workouts.json"
 
 # Assume you might have other standalone scripts
 
@@ -9,11 +18,45 @@ async def show_menu():
     print("   AI COACHING COMMAND CENTER")
     print("="*30)
     print("1. Run Master Training Planner (Health + Season)")
-    print("2. [Coming Soon] Weekly Workout Planner")
+    print("2. Weekly Workout Planner (daily sessions from the season plan)")
     print("3. [Coming Soon] View Training")
+    print("4. Run Master Training Planner with parallel season plan candidates")
     print("q. Exit")
     print("-"*30)
 
+def load_zone_anchors():
+    """FTP and threshold HR cached by the athlete digest; asks for the FTP if it was never synced."""
+    stats = {}
+    if os.path.exists(DB_FILE):
+        with ActivityStore(DB_FILE) as store:
+            stats = AthleteDigest(store).stats()
+    ftp = stats.get("ftp")
+    if not ftp:
+        ftp = float(input("No FTP synced yet. Enter your FTP in watts: "))
+    return ftp, stats.get("lthr")
+
+def run_workout_planner():
+    if not os.path.exists(SEASON_PLAN_FILE):
+        print("No season plan found. Run the Master Training Planner (option 1) first.")
+        return
+    with open(SEASON_PLAN_FILE, "r") as f:
+        season_plan = json.load(f)
+
+    ftp, lthr = load_zone_anchors()
+    start = time.perf_counter()
+    workouts = WorkoutGenerator(ftp, lthr).generate(season_plan)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    with open(WORKOUTS_FILE, "w") as f:
+        json.dump(workouts, f, indent=4)
+    sessions = sum(1 for week in workouts["weeks"] for day in week["days"] if day["workout"] != "Rest")
+    print(f"\nGenerated {len(workouts['weeks'])} weeks / {sessions} sessions in {elapsed_ms:.1f} ms "
+          f"(FTP {ftp:g} W). Saved to {WORKOUTS_FILE}")
+    for week in workouts["weeks"][:2]:
+        print(f"\nWeek of {week['week_start']} ({week['phase']}, {week['planned_hours']} h, TSS {week['planned_tss']}):")
+        for day in week["days"]:
+            print(f"  {day['day']:<10} {day['workout']:<22} {day['duration_min']:>4} min")
+
 async def main():
     while True:
         await show_menu()
@@ -28,11 +71,21 @@ async def main():
                 print(f"An error occurred: {e}")
         
         elif choice == '2':
-            print("\nFeature in development: Weekly Planning.")
+            try:
+                run_workout_planner()
+            except Exception as e:
+                print(f"An error occurred: {e}")
         
         elif choice == '3':
             print("\nFeature in development: .")
 
+        elif choice == '4':
+            print("\nInitializing Master Training Planner (4 parallel candidates)...")
+            try:
+                await run_season_planner(plan_candidates=4)
+            except Exception as e:
+                print(f"An error occurred: {e}")
+
         elif choice == 'q':
             print("Exiting Coaching. Stay safe out there!")
             break
@@ -13,19 +13,17 @@ from tools.garmin_activity_tools import register_garmin_activity_tools
 from tools.garmin_performance_tools import register_garmin_performance_tools
 from tools.generic_tools import register_generic_tools
 from tools.goal_tools import register_goal_tools
+from tools.activity_index_tools import register_activity_index_tools
+from tools.stream_tools import register_stream_tools
+from tools.batch_tools import register_batch_tools
+from tools.resource_tools import register_athlete_resources
+from logging_setup import configure_logging
 
 load_dotenv()
 
 # --- STEP 1: ROBUST LOGGING SETUP ---
-log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-logging.basicConfig(
-    level=logging.INFO,
-    format=log_format,
-    handlers=[
-        logging.StreamHandler(), # This goes to stderr by default in MCP
-        logging.FileHandler("mcp_server_debug.log") # This saves to your folder
-    ]
-)
+# Queue-based: tool calls never wait for disk I/O; JSON lines in logs/mcp_server.jsonl (+ stderr)
+configure_logging("mcp_server.jsonl", console=True)
 logger = logging.getLogger("mcp_server")
 logger.info("Server script started initialized.")
 
@@ -37,7 +35,11 @@ register_garmin_activity_tools(mcp)
 register_garmin_performance_tools(mcp)
 register_generic_tools(mcp)
 register_goal_tools(mcp)
-print("Tools registered.")
+register_activity_index_tools(mcp)
+register_stream_tools(mcp)
+register_batch_tools(mcp)
+register_athlete_resources(mcp)
+print("Tools and resources registered.")
 
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
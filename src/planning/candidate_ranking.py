@@ -0,0 +1,35 @@
+from .load_simulator import MAX_SAFE_RAMP, TARGET_RACE_FORM
+from .plan_rules import validate_plan_locally
+
+# Score weights: rule check first, then the simulated race-day outcome
+HARD_VIOLATION_PENALTY = 100
+RAMP_PENALTY_PER_CTL = 5
+
+
+def score_plan(plan, history, goals, simulator):
+    """
+    Local score of one macrocycle (higher is better): the rule check's safety score, minus the
+    distance of the projected race-day form from the fresh window and any excess fitness ramp.
+    Plans with hard rule violations always rank below valid ones.
+    """
+    validation = validate_plan_locally(plan, history, goals)
+    projection = simulator.project(plan)
+    low, high = TARGET_RACE_FORM
+    form = projection["race_day_form"]
+    form_miss = max(0.0, low - form, form - high)
+    ramp_excess = max(0.0, projection["peak_ramp_per_week"] - MAX_SAFE_RAMP)
+
+    score = 10 * validation["safety_score"] - form_miss - RAMP_PENALTY_PER_CTL * ramp_excess
+    if not validation["is_valid"]:
+        score -= HARD_VIOLATION_PENALTY
+    return {
+        "score": round(score, 1),
+        "validation": validation,
+        "projection": projection,
+    }
+
+
+def rank_candidates(plans, history, goals, simulator):
+    """Scores candidate plans and returns (plan, score dict) pairs, best first."""
+    scored = [(plan, score_plan(plan, history, goals, simulator)) for plan in plans]
+    return sorted(scored, key=lambda item: item[1]["score"], reverse=True)
@@ -0,0 +1,173 @@
+import datetime
+
+import numpy as np
+
+from .plan_rules import get_main_race, parse_race_date
+from .workout_generator import WorkoutGenerator, weekly_hours
+
+CTL_DAYS = 42  # fitness time constant
+ATL_DAYS = 7   # fatigue time constant
+# Share of the weekly load per weekday, following the workout generator's layout (Mon rest ... Sat long ride)
+DAY_SHARE = np.array([0.0, 0.17, 0.14, 0.17, 0.05, 0.30, 0.17])
+# Race-day form (CTL - ATL) considered fresh but not detrained, and a sustainable CTL ramp per week
+TARGET_RACE_FORM = (5.0, 25.0)
+MAX_SAFE_RAMP = 8.0
+
+_kernels = {}
+
+
+def ewma_kernel(days, time_constant):
+    """
+    Lower-triangular (days x days) matrix K with K[t, k] = (1 - a) * a^(t - k), a = 1 - 1/time_constant,
+    so the whole Banister recursion for many variants is one matrix product: loads @ K.T.
+    """
+    key = (days, time_constant)
+    if key not in _kernels:
+        decay = 1 - 1 / time_constant
+        lags = np.arange(days)[:, None] - np.arange(days)[None, :]
+        _kernels[key] = np.where(lags >= 0, (1 - decay) * decay ** np.maximum(lags, 0), 0.0)
+    return _kernels[key]
+
+
+def simulate(loads, ctl0, atl0):
+    """
+    Projects fitness (CTL), fatigue (ATL) and form (TSB = CTL - ATL, morning of each day) for a
+    (variants x days) matrix of daily training stress. Returns float arrays of the same shape.
+    """
+    loads = np.atleast_2d(np.asarray(loads, dtype=float))
+    days = loads.shape[1]
+    steps = np.arange(1, days + 1)
+    ctl = loads @ ewma_kernel(days, CTL_DAYS).T + ctl0 * (1 - 1 / CTL_DAYS) ** steps
+    atl = loads @ ewma_kernel(days, ATL_DAYS).T + atl0 * (1 - 1 / ATL_DAYS) ** steps
+    # Form on a day is yesterday's fitness minus yesterday's fatigue
+    ctl_before = np.concatenate((np.full((len(loads), 1), float(ctl0)), ctl[:, :-1]), axis=1)
+    atl_before = np.concatenate((np.full((len(loads), 1), float(atl0)), atl[:, :-1]), axis=1)
+    return ctl, atl, ctl_before - atl_before
+
+
+def phase_tss_per_hour(plan, ftp=250):
+    """Training stress per hour for each phase, from one mid-phase week of the workout generator (independent of FTP)."""
+    generator = WorkoutGenerator(ftp)
+    monday = datetime.date(2000, 1, 3)
+    rates = []
+    for phase in plan["phases"]:
+        week = generator.plan_week(phase, min(1, phase["duration_weeks"] - 1), monday, rotation=0)
+        rates.append(week["planned_tss"] / week["planned_hours"] if week["planned_hours"] else 0.0)
+    return np.array(rates)
+
+
+def weekly_plan_arrays(plan):
+    """Per-week phase index and target hours of a macrocycle (loading weeks, recovery weeks, taper)."""
+    phase_index, hours = [], []
+    for i, phase in enumerate(plan["phases"]):
+        for week in range(phase["duration_weeks"]):
+            phase_index.append(i)
+            hours.append(weekly_hours(phase, week))
+    return np.array(phase_index), np.array(hours)
+
+
+def daily_loads(week_tss, days):
+    """Spreads (variants x weeks) weekly stress over the weekdays and pads/cuts to `days` (rest after the plan)."""
+    week_tss = np.atleast_2d(week_tss)
+    loads = (week_tss[:, :, None] * DAY_SHARE[None, None, :]).reshape(len(week_tss), -1)
+    if loads.shape[1] < days:
+        loads = np.pad(loads, ((0, 0), (0, days - loads.shape[1])))
+    return loads[:, :days]
+
+
+def summarize(ctl, atl, tsb, race_day):
+    """Race-day form and fitness, peak weekly CTL ramp and lowest form per variant (arrays)."""
+    ramp = ctl[:, 7:] - ctl[:, :-7] if ctl.shape[1] > 7 else np.zeros((len(ctl), 1))
+    race = min(race_day, ctl.shape[1] - 1)
+    return {
+        "race_day_form": tsb[:, race],
+        "race_day_fitness": ctl[:, race],
+        "peak_ramp_per_week": ramp.max(axis=1),
+        "lowest_form": tsb[:, : race + 1].min(axis=1),
+    }
+
+
+class LoadSimulator:
+    """
+    Banister fitness/fatigue projection of a macrocycle from the athlete's current CTL/ATL to race day.
+    Weekly hours come from the same rules as the workout generator; variants (e.g. scaled phase hours)
+    are simulated together as one matrix, so thousands can be scored per call.
+    """
+    def __init__(self, ctl0, atl0, start_date=None, race_date=None):
+        self.ctl0 = ctl0 or 0.0
+        self.atl0 = atl0 or 0.0
+        today = start_date or datetime.date.today()
+        # Plans start on the next Monday, like the workout generator
+        self.start_date = today + datetime.timedelta(days=(7 - today.weekday()) % 7)
+        self.race_date = race_date
+
+    @classmethod
+    def from_context(cls, history, goals, start_date=None):
+        """
+        Uses the athlete digest's TSS-scale load trend and the main race in goals.json. The plan
+        is simulated in TSS (hours x phase_tss_per_hour), so the start values must be on the same
+        scale: the digest's "tss_load" estimates TSS per activity from duration and intensity,
+        Garmin's EPOC-based "load" is not used. Without it the projection starts from zero.
+        """
+        load = (history or {}).get("tss_load") or {}
+        race = get_main_race(goals or {})
+        race_date = parse_race_date(race.get("date")) if race else None
+        return cls(load.get("ctl"), load.get("atl"), start_date, race_date)
+
+    def horizon(self, plan_weeks):
+        """Days simulated and the race-day index (the plan end when no race date is known)."""
+        plan_days = plan_weeks * 7
+        if self.race_date is None or self.race_date < self.start_date:
+            return plan_days, plan_days - 1
+        race_day = (self.race_date - self.start_date).days
+        return max(plan_days, race_day + 1), race_day
+
+    def simulate_variants(self, plan, phase_hour_scales):
+        """
+        Scores variants of one plan that scale each phase's weekly hours.
+        phase_hour_scales: (variants x phases) array. Returns the summarize() dict of arrays.
+        """
+        phase_index, hours = weekly_plan_arrays(plan)
+        tss_per_hour = phase_tss_per_hour(plan)
+        scales = np.atleast_2d(phase_hour_scales)
+        week_tss = scales[:, phase_index] * (hours * tss_per_hour[phase_index])[None, :]
+        days, race_day = self.horizon(len(hours))
+        ctl, atl, tsb = simulate(daily_loads(week_tss, days), self.ctl0, self.atl0)
+        return summarize(ctl, atl, tsb, race_day)
+
+    def project(self, plan):
+        """Projection of one plan for the verifier and the athlete: race-day numbers, flags and a weekly series."""
+        phase_index, hours = weekly_plan_arrays(plan)
+        week_tss = hours * phase_tss_per_hour(plan)[phase_index]
+        days, race_day = self.horizon(len(hours))
+        ctl, atl, tsb = simulate(daily_loads(week_tss, days), self.ctl0, self.atl0)
+        summary = {key: round(float(value[0]), 1) for key, value in summarize(ctl, atl, tsb, race_day).items()}
+
+        flags = []
+        low, high = TARGET_RACE_FORM
+        if summary["race_day_form"] < low:
+            flags.append(f"Projected race-day form {summary['race_day_form']} is below {low:g}: taper too short or too late.")
+        elif summary["race_day_form"] > high:
+            flags.append(f"Projected race-day form {summary['race_day_form']} is above {high:g}: fitness is lost before the race.")
+        if summary["peak_ramp_per_week"] > MAX_SAFE_RAMP:
+            flags.append(f"Peak fitness ramp of {summary['peak_ramp_per_week']} CTL/week exceeds {MAX_SAFE_RAMP:g}.")
+
+        weekly = [
+            {
+                "week_start": (self.start_date + datetime.timedelta(weeks=w)).isoformat(),
+                "phase": plan["phases"][phase_index[w]]["phase_name"] if w < len(phase_index) else None,
+                "tss": round(float(week_tss[w])) if w < len(week_tss) else 0,
+                "fitness": round(float(ctl[0, min(w * 7 + 6, days - 1)]), 1),
+                "form": round(float(tsb[0, min(w * 7 + 6, days - 1)]), 1),
+            }
+            for w in range((days + 6) // 7)
+        ]
+        return {
+            "start_date": self.start_date.isoformat(),
+            "race_date": self.race_date.isoformat() if self.race_date else None,
+            "initial_fitness": round(self.ctl0, 1),
+            "initial_fatigue": round(self.atl0, 1),
+            **summary,
+            "flags": flags,
+            "weekly": weekly,
+        }
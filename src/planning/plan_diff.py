@@ -0,0 +1,123 @@
+import copy
+import json
+
+
+def _phase_keys(phases):
+    """Identifies phases by (phase_name, occurrence) so repeated names like 'Build' stay distinct."""
+    seen = {}
+    keys = []
+    for phase in phases:
+        name = phase.get("phase_name", "")
+        seen[name] = seen.get(name, 0) + 1
+        keys.append((name, seen[name]))
+    return keys
+
+def _canonical(phase):
+    return json.dumps(phase, sort_keys=True)
+
+
+def diff_plans(previous, current):
+    """
+    Structural diff between two macrocycle versions.
+    Returns current-plan phase indices grouped into added/modified/unchanged/new_neighbour
+    (predecessor changed), and the names of removed phases.
+    """
+    previous_phases = previous.get("phases", []) if previous else []
+    current_phases = current.get("phases", [])
+    previous_by_key = dict(zip(_phase_keys(previous_phases), previous_phases))
+    previous_keys = _phase_keys(previous_phases)
+    current_keys = _phase_keys(current_phases)
+
+    diff = {"added": [], "removed": [], "modified": [], "unchanged": [], "new_neighbour": []}
+    for index, (key, phase) in enumerate(zip(current_keys, current_phases)):
+        old = previous_by_key.get(key)
+        if old is None:
+            diff["added"].append(index)
+        elif _canonical(old) != _canonical(phase):
+            diff["modified"].append(index)
+        else:
+            diff["unchanged"].append(index)
+
+        # A phase that now follows a different phase needs a fresh ramp check
+        if key in previous_by_key:
+            old_index = previous_keys.index(key)
+            old_predecessor = previous_keys[old_index - 1] if old_index > 0 else None
+            new_predecessor = current_keys[index - 1] if index > 0 else None
+            if old_predecessor != new_predecessor:
+                diff["new_neighbour"].append(index)
+
+    current_key_set = set(current_keys)
+    diff["removed"] = [key[0] for key in previous_keys if key not in current_key_set]
+    return diff
+
+def verification_scope(diff, phase_count):
+    """Indices of changed phases plus their direct neighbours (for load ramp checks)."""
+    changed = set(diff["added"]) | set(diff["modified"]) | set(diff["new_neighbour"])
+    scope = set()
+    for index in changed:
+        scope.update(i for i in (index - 1, index, index + 1) if 0 <= i < phase_count)
+    return sorted(scope)
+
+
+class IncrementalVerification:
+    """
+    Keeps the last LLM-verified plan and its per-phase verdicts, so a revised
+    plan only sends the changed phases (and their neighbours) to the verifier.
+    """
+    def __init__(self):
+        self.previous_plan = None
+        self.phase_verdicts = {}  # (phase_name, occurrence) -> {"is_valid": bool, "flags": [...]}
+
+    def phases_to_check(self, season_json):
+        phases = season_json.get("phases", [])
+        if self.previous_plan is None:
+            return list(range(len(phases)))
+
+        diff = diff_plans(self.previous_plan, season_json)
+        scope = set(verification_scope(diff, len(phases)))
+        # Phases without a stored verdict (e.g. never seen by the verifier) are always checked
+        for index, key in enumerate(_phase_keys(phases)):
+            if key not in self.phase_verdicts:
+                scope.add(index)
+        return sorted(scope)
+
+    def merge(self, season_json, checked_indices, result):
+        """
+        Stores the verdicts for the checked phases and combines the verifier result
+        with the reused verdicts of untouched phases into the check_plan shape.
+        A checked phase the verifier returned no verdict for counts as unverified: the
+        plan is not valid yet and the phase is checked again next round.
+        """
+        keys = _phase_keys(season_json.get("phases", []))
+        verdicts_by_index = {v.get("phase_index"): v for v in result.get("phase_verdicts", [])}
+        unverified = []
+        for index in checked_indices:
+            verdict = verdicts_by_index.get(index)
+            if verdict is None or "is_valid" not in verdict:
+                unverified.append(index)
+                self.phase_verdicts.pop(keys[index], None)
+                continue
+            self.phase_verdicts[keys[index]] = {
+                "is_valid": bool(verdict["is_valid"]),
+                "flags": list(verdict.get("flags", [])),
+            }
+
+        reused = [self.phase_verdicts[key] for index, key in enumerate(keys)
+                  if index not in checked_indices and key in self.phase_verdicts]
+        # Forget verdicts of phases that no longer exist
+        self.phase_verdicts = {key: self.phase_verdicts[key] for key in keys if key in self.phase_verdicts}
+        self.previous_plan = copy.deepcopy(season_json)
+
+        merged = dict(result)
+        merged["is_valid"] = bool(result.get("is_valid")) and all(v["is_valid"] for v in reused) and not unverified
+        merged["flags"] = list(result.get("flags", [])) + [
+            flag for verdict in reused if not verdict["is_valid"] for flag in verdict["flags"]
+        ]
+        if unverified:
+            merged["flags"].append(f"The verifier returned no verdict for phase(s) {unverified}.")
+            if not merged.get("recommendation"):
+                merged["recommendation"] = (f"Phase(s) {unverified} could not be verified; "
+                                            "resubmit the plan so they are checked again.")
+        merged["unverified_phases"] = unverified
+        merged["reused_phase_verdicts"] = len(reused)
+        return merged
@@ -0,0 +1,174 @@
+"""
+Library of accepted season plans for warm-starting new planning sessions.
+
+Every accepted macrocycle is appended to memory/plan_library.jsonl as a new version, together
+with the situation it was planned for (weeks to the main race, race profile, athlete level)
+and a summary of the plan itself (weekly hours, phase mix). A new session looks up the past
+plans closest to the current situation and hands them to the season coach, already stretched
+or shrunk to the weeks now available, so the coach edits a draft instead of starting blank.
+"""
+import datetime
+import json
+import os
+
+import numpy as np
+
+from .plan_rules import get_main_race, parse_race_date, phase_hours_midpoint
+from .workout_generator import phase_kind
+
+LIBRARY_FILE = "memory/plan_library.jsonl"
+
+# Situation features used for the lookup, with the scale of a "meaningful" difference
+FEATURE_SCALES = {
+    "weeks_to_race": 4.0,
+    "race_distance_km": 50.0,
+    "race_elevation_m": 1000.0,
+    "ftp": 20.0,
+    "vo2max": 3.0,
+    "fitness_ctl": 10.0,
+    "recent_weekly_hours": 2.0,
+}
+
+PHASE_KINDS = ("base", "build", "peak", "taper", "recovery", "transition")
+
+
+def situation_features(history, goals, today=None):
+    """The planning situation as {feature: value} (None where unknown)."""
+    today = today or datetime.date.today()
+    history = history or {}
+    race = get_main_race(goals or {}) or {}
+    race_date = parse_race_date(race.get("date"))
+    return {
+        "weeks_to_race": round((race_date - today).days / 7, 1) if race_date and race_date > today else None,
+        "race_distance_km": race.get("distance_km"),
+        "race_elevation_m": race.get("elevation_gain_m"),
+        "ftp": history.get("ftp"),
+        "vo2max": history.get("vo2max"),
+        "fitness_ctl": (history.get("load") or {}).get("ctl"),
+        "recent_weekly_hours": (history.get("volume") or {}).get("avg_weekly_hours_12w"),
+    }
+
+
+def plan_features(plan):
+    """Total weeks, mean and peak weekly hours and the share of weeks per phase kind."""
+    phases = plan.get("phases") or []
+    weeks = np.array([phase["duration_weeks"] for phase in phases], dtype=float)
+    hours = np.array([phase_hours_midpoint(phase) for phase in phases], dtype=float)
+    total = weeks.sum()
+    kinds = [phase_kind(phase) for phase in phases]
+    return {
+        "total_weeks": int(total),
+        "mean_weekly_hours": round(float(weeks @ hours / total), 1) if total else 0.0,
+        "peak_weekly_hours": float(hours.max()) if len(hours) else 0.0,
+        "phase_mix": {kind: round(float(weeks[[k == kind for k in kinds]].sum() / total), 2)
+                      for kind in PHASE_KINDS if total and kind in kinds},
+    }
+
+
+def feature_matrix(situations):
+    """(plans x features) scaled values and a mask of the known ones."""
+    names = list(FEATURE_SCALES)
+    values = np.array([[s.get(name) if s.get(name) is not None else np.nan for name in names] for s in situations],
+                      dtype=float)
+    return values / np.array([FEATURE_SCALES[name] for name in names]), ~np.isnan(values)
+
+
+def adapt_plan(plan, weeks_available):
+    """
+    The plan with its phase durations rescaled to the weeks now available (every phase keeps at
+    least one week, the rest is shared by largest remainder rounding, taper phases keep their length).
+    """
+    if not weeks_available:
+        return plan
+    phases = [dict(phase) for phase in plan["phases"]]
+    fixed = [phase_kind(phase) == "taper" for phase in phases]
+    flexible_weeks = sum(p["duration_weeks"] for p, f in zip(phases, fixed) if not f)
+    target = int(weeks_available) - sum(p["duration_weeks"] for p, f in zip(phases, fixed) if f)
+    n_flexible = sum(1 for f in fixed if not f)
+    if flexible_weeks <= 0 or target < n_flexible:
+        return plan
+
+    # One week per flexible phase up front, the rest spread in proportion to the original lengths
+    spare = target - n_flexible
+    exact = [p["duration_weeks"] * spare / flexible_weeks if not f else None for p, f in zip(phases, fixed)]
+    rounded = [int(e) if e is not None else None for e in exact]
+    remainder = spare - sum(r for r in rounded if r is not None)
+    by_fraction = sorted((i for i, e in enumerate(exact) if e is not None), key=lambda i: -(exact[i] - rounded[i]))
+    for i in by_fraction[:remainder]:
+        rounded[i] += 1
+    for phase, weeks in zip(phases, rounded):
+        if weeks is not None:
+            phase["duration_weeks"] = 1 + weeks
+    return {**plan, "phases": phases}
+
+
+class PlanLibrary:
+    """Versioned accepted plans (JSON lines) with a nearest-neighbour lookup on the planning situation."""
+    def __init__(self, filename=LIBRARY_FILE):
+        self.filename = filename
+
+    def entries(self):
+        if not os.path.exists(self.filename):
+            return []
+        with open(self.filename, "r") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def add(self, plan, history, goals, today=None):
+        """Stores an accepted plan as the next version. Returns the stored entry."""
+        today = today or datetime.date.today()
+        entry = {
+            "version": len(self.entries()) + 1,
+            "accepted_at": today.isoformat(),
+            "macrocycle_id": plan.get("macrocycle_id"),
+            "situation": situation_features(history, goals, today),
+            "plan_features": plan_features(plan),
+            "plan": plan,
+        }
+        os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+        with open(self.filename, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def nearest(self, history, goals, k=2, today=None):
+        """
+        The k library entries closest to the current situation, closest first, each with its
+        "distance" (RMS of the scaled differences over the features known on both sides).
+        """
+        entries = self.entries()
+        if not entries:
+            return []
+        query, query_known = feature_matrix([situation_features(history, goals, today)])
+        library, library_known = feature_matrix([entry["situation"] for entry in entries])
+        known = library_known & query_known
+        squared = np.where(known, (library - query) ** 2, 0.0)
+        counts = known.sum(axis=1)
+        distances = np.where(counts > 0, np.sqrt(squared.sum(axis=1) / np.maximum(counts, 1)), np.inf)
+
+        order = np.argsort(distances, kind="stable")[:k]
+        return [{**entries[i], "distance": round(float(distances[i]), 2)} for i in order if np.isfinite(distances[i])]
+
+    def warm_start(self, history, goals, k=2, today=None):
+        """The closest past plans, adapted to the weeks to the current main race."""
+        weeks = situation_features(history, goals, today)["weeks_to_race"]
+        return [
+            {
+                "version": entry["version"],
+                "accepted_at": entry["accepted_at"],
+                "distance": entry["distance"],
+                "planned_for": entry["situation"],
+                "plan": adapt_plan(entry["plan"], weeks),
+            }
+            for entry in self.nearest(history, goals, k, today)
+        ]
+
+
+def reference_plans_block(references):
+    """Prompt section with the warm-start plans, or an empty string."""
+    if not references:
+        return ""
+    return (
+        "\n\n### CLOSEST PAST ACCEPTED PLANS (phase durations already fitted to the weeks to the race)\n"
+        "Start from the first plan and edit it to the current situation and health report "
+        "instead of designing a new macrocycle from scratch.\n"
+        f"{json.dumps(references, indent=2)}\n"
+    )
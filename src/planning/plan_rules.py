@@ -0,0 +1,175 @@
+import datetime
+import math
+import re
+
+from .workout_generator import phase_kind
+
+# Hard limits: a violation rejects the plan without an LLM verification call
+MAX_PHASE_HOURS_INCREASE = 0.30   # +30% mid-range weekly hours from one loading phase to the next
+# Soft limits: reported as warnings, the LLM verifier still runs
+WARN_PHASE_HOURS_INCREASE = 0.15
+MAX_WEEKS_AFTER_RACE = 1          # plan may end at most one week after the main race
+WARN_WEEKS_BEFORE_RACE = 4        # plan ending more than 4 weeks before the race is suspicious
+STAT_TOLERANCE = 0.03             # referenced FTP / VO2max may deviate 3% from the known current-to-goal range
+
+_STAT_PATTERNS = {
+    "ftp": re.compile(r"\bFTP\b\D{0,12}?(\d{2,3}(?:\.\d+)?)\s*(?:w|watt)", re.IGNORECASE),
+    "vo2max": re.compile(r"\bVO2\s*-?\s*max\b\D{0,12}?(\d{2}(?:\.\d+)?)", re.IGNORECASE),
+}
+
+_DATE_FORMATS = ("%Y-%m-%d", "%m-%d-%Y", "%d.%m.%Y")
+
+
+def parse_race_date(date_str):
+    """Parses race dates as stored in goals.json (YYYY-MM-DD or MM-DD-YYYY). Returns None if unknown."""
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(date_str, fmt).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+def get_main_race(goals):
+    """Returns the highest priority race (lowest priority number) from the goals dict, or None."""
+    races = goals.get("races") or []
+    if not races:
+        return None
+    return min(races, key=lambda race: race.get("priority", math.inf))
+
+def phase_hours_midpoint(phase):
+    low, high = phase["target_weekly_hours_range"]
+    return (low + high) / 2
+
+
+def check_load_ramp(phases):
+    """
+    Flags phase-to-phase increases of the weekly hours midpoint and inverted hour ranges.
+    Recovery and transition phases are planned dips: the phase after one is compared with the
+    last loading phase before it, not with the dip itself.
+    """
+    hard, soft = [], []
+    for phase in phases:
+        low, high = phase["target_weekly_hours_range"]
+        if low > high:
+            hard.append(f"LOAD SPIKE: '{phase['phase_name']}' has an inverted hours range [{low}, {high}].")
+
+    loading = [phase for phase in phases if phase_kind(phase) not in ("recovery", "transition")]
+    for previous, current in zip(loading, loading[1:]):
+        previous_hours = phase_hours_midpoint(previous)
+        if previous_hours <= 0:
+            continue
+        increase = phase_hours_midpoint(current) / previous_hours - 1
+        message = (f"LOAD SPIKE: weekly hours rise {increase:.0%} from '{previous['phase_name']}' "
+                   f"to '{current['phase_name']}'")
+        if increase > MAX_PHASE_HOURS_INCREASE:
+            hard.append(f"{message} (limit {MAX_PHASE_HOURS_INCREASE:.0%}).")
+        elif increase > WARN_PHASE_HOURS_INCREASE:
+            soft.append(f"{message} (warning above {WARN_PHASE_HOURS_INCREASE:.0%}).")
+
+    if len(phases) > 1 and "taper" in phases[-1]["phase_name"].lower():
+        if phase_hours_midpoint(phases[-1]) >= phase_hours_midpoint(phases[-2]):
+            hard.append(f"LOAD SPIKE: taper phase '{phases[-1]['phase_name']}' does not reduce weekly hours.")
+    return hard, soft
+
+def check_race_alignment(phases, goals, today):
+    """Compares the total plan length with the weeks remaining until the main race."""
+    hard, soft = [], []
+    race = get_main_race(goals)
+    if race is None:
+        soft.append("OBJECTIVE MISMATCH: no main race in goals.json, plan length could not be checked.")
+        return hard, soft
+
+    race_date = parse_race_date(race.get("date"))
+    if race_date is None:
+        soft.append(f"OBJECTIVE MISMATCH: main race date '{race.get('date')}' could not be parsed.")
+        return hard, soft
+    if race_date <= today:
+        soft.append(f"OBJECTIVE MISMATCH: main race '{race.get('name')}' on {race_date} is in the past.")
+        return hard, soft
+
+    weeks_to_race = (race_date - today).days / 7
+    total_weeks = sum(phase["duration_weeks"] for phase in phases)
+    if total_weeks > weeks_to_race + MAX_WEEKS_AFTER_RACE:
+        hard.append(f"OBJECTIVE MISMATCH: plan lasts {total_weeks} weeks but '{race.get('name')}' "
+                    f"is only {weeks_to_race:.1f} weeks away.")
+    elif total_weeks < weeks_to_race - WARN_WEEKS_BEFORE_RACE:
+        soft.append(f"OBJECTIVE MISMATCH: plan ends {weeks_to_race - total_weeks:.1f} weeks "
+                    f"before '{race.get('name')}'.")
+    return hard, soft
+
+def check_hours_constraint(phases, goals):
+    """Flags phases whose upper weekly hours exceed the athlete's available hours (goals.json constraints)."""
+    hard = []
+    max_hours = (goals.get("constraints") or {}).get("max_weekly_hours")
+    if max_hours is None:
+        return hard, []
+    for phase in phases:
+        high = phase["target_weekly_hours_range"][1]
+        if high > max_hours:
+            hard.append(f"CONSTRAINT: '{phase['phase_name']}' targets up to {high} h/week, "
+                        f"athlete has {max_hours} h/week available.")
+    return hard, []
+
+def check_referenced_stats(season_plan_json, history, goals):
+    """
+    Flags FTP / VO2max values in the plan text that are not backed by the history.
+    Values between the current value and the goal are accepted as progression targets.
+    Without a current value (no history, or not measured) a mismatch is only a warning and
+    the LLM hallucination check decides.
+    """
+    hard, soft = [], []
+    current = {"ftp": history.get("ftp"), "vo2max": history.get("vo2max")}
+    goal = {"ftp": (goals.get("goals") or {}).get("ftp_goal"), "vo2max": None}
+    for text in _iter_strings(season_plan_json):
+        for stat, pattern in _STAT_PATTERNS.items():
+            for match in pattern.finditer(text):
+                value = float(match.group(1))
+                references = [ref for ref in (current[stat], goal[stat]) if ref]
+                if references and (
+                    min(references) * (1 - STAT_TOLERANCE) <= value <= max(references) * (1 + STAT_TOLERANCE)
+                ):
+                    continue
+                message = (f"HALLUCINATION: plan references {stat.upper()} {match.group(1)}, "
+                           f"known values are {references or 'none'}")
+                if current[stat]:
+                    hard.append(f"{message}.")
+                else:
+                    soft.append(f"{message} (current {stat.upper()} unknown, left to the verifier).")
+    return hard, soft
+
+def _iter_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_strings(item)
+
+
+def validate_plan_locally(season_plan_json, history, goals, today=None):
+    """
+    Deterministic pre-check of a macrocycle. Returns the same
+    is_valid/safety_score/flags/recommendation shape as SeasonContentCheckerAgent.check_plan.
+    is_valid is False only for hard rule violations; warnings are listed in flags.
+    """
+    today = today or datetime.date.today()
+    phases = season_plan_json.get("phases", [])
+
+    hard, soft = [], []
+    for rule_hard, rule_soft in (
+        check_load_ramp(phases),
+        check_race_alignment(phases, goals, today),
+        check_hours_constraint(phases, goals),
+        check_referenced_stats(season_plan_json, history, goals),
+    ):
+        hard.extend(rule_hard)
+        soft.extend(rule_soft)
+
+    return {
+        "is_valid": not hard,
+        "safety_score": max(1, 10 - 3 * len(hard) - len(soft)),
+        "flags": hard + soft,
+        "recommendation": " ".join(f"Fix: {flag}" for flag in hard),
+    }
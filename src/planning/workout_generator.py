@@ -0,0 +1,184 @@
+import datetime
+
+# Coggan power zones as fractions of FTP (Z7 is open ended)
+POWER_ZONES = {1: (0.0, 0.55), 2: (0.56, 0.75), 3: (0.76, 0.90), 4: (0.91, 1.05), 5: (1.06, 1.20), 6: (1.21, 1.50), 7: (1.51, 2.50)}
+# Friel heart rate zones as fractions of lactate threshold HR (no HR target above Z5)
+HR_ZONES = {1: (0.0, 0.81), 2: (0.81, 0.89), 3: (0.90, 0.93), 4: (0.94, 0.99), 5: (1.00, 1.06)}
+# Intensity factor used for the TSS estimate of time spent in each zone
+ZONE_IF = {1: 0.50, 2: 0.68, 3: 0.83, 4: 0.98, 5: 1.13, 6: 1.30, 7: 1.50}
+
+RECOVERY_WEEK_EVERY = 4          # 3 loading weeks : 1 recovery week
+RECOVERY_WEEK_FACTOR = 0.65      # recovery week hours as a fraction of the phase's lower bound
+TAPER_FACTORS = (0.7, 0.5, 0.4)  # taper week hours as a fraction of the phase's upper bound
+LONG_RIDE_SHARE = 0.30           # share of weekly hours in the weekend long ride
+MAX_LONG_RIDE_MIN = 330
+MIN_ENDURANCE_MIN = 45
+
+# Key sessions per zone: (name, [(repeats, work_min, work_zone, rest_min)]). Warm-up/cool-down are added.
+KEY_SESSIONS = {
+    3: [("Tempo 3x15", [(3, 15, 3, 5)]), ("Tempo 2x25", [(2, 25, 3, 5)]), ("Sweet Spot 3x12", [(3, 12, 4, 4)])],
+    4: [("Threshold 2x20", [(2, 20, 4, 5)]), ("Threshold 4x10", [(4, 10, 4, 4)]), ("Over-Unders 3x9", [(3, 9, 4, 5)])],
+    5: [("VO2max 5x4", [(5, 4, 5, 4)]), ("VO2max 4x5", [(4, 5, 5, 5)]), ("VO2max 6x3", [(6, 3, 5, 3)])],
+    6: [("Anaerobic 8x1", [(8, 1, 6, 3)]), ("Anaerobic 6x2", [(6, 2, 6, 4)])],
+    7: [("Sprints 8x15s", [(8, 0.25, 7, 4.75)]), ("Standing Starts 6x20s", [(6, 1 / 3, 7, 5)])],
+}
+WARMUP_MIN = 15
+COOLDOWN_MIN = 10
+
+# Weekly layout: Mon rest, Tue key, Wed endurance, Thu key, Fri recovery, Sat long, Sun endurance
+DAY_SLOTS = ("rest", "key", "endurance", "key", "recovery", "long", "endurance")
+
+
+def phase_kind(phase):
+    name = phase.get("phase_name", "").lower()
+    for kind in ("taper", "peak", "build", "base", "recovery", "transition"):
+        if kind in name:
+            return kind
+    return "build"
+
+
+def zone_targets(zone, ftp, lthr=None):
+    """Watt and (if the threshold HR is known) bpm ranges for a zone."""
+    low, high = POWER_ZONES[zone]
+    targets = {"zone": zone, "power_w": [round(low * ftp), round(high * ftp)]}
+    if lthr and zone in HR_ZONES:
+        hr_low, hr_high = HR_ZONES[zone]
+        targets["hr_bpm"] = [round(hr_low * lthr), round(hr_high * lthr)]
+    return targets
+
+
+def _tss(segments):
+    """Training stress estimate: hours x IF^2 x 100 over (minutes, zone) segments."""
+    return round(sum(minutes / 60 * ZONE_IF[zone] ** 2 * 100 for minutes, zone in segments))
+
+
+def weekly_hours(phase, week_index):
+    """Target hours for one week of a phase: progressive loading weeks, every 4th week easy, tapers decline."""
+    low, high = phase["target_weekly_hours_range"]
+    weeks = phase["duration_weeks"]
+    if phase_kind(phase) == "taper":
+        return high * TAPER_FACTORS[min(week_index, len(TAPER_FACTORS) - 1)]
+    if weeks >= RECOVERY_WEEK_EVERY and (week_index + 1) % RECOVERY_WEEK_EVERY == 0:
+        return low * RECOVERY_WEEK_FACTOR
+    loading_weeks = weeks - weeks // RECOVERY_WEEK_EVERY
+    step = week_index - week_index // RECOVERY_WEEK_EVERY
+    return low + (high - low) * (step / max(1, loading_weeks - 1))
+
+
+class WorkoutGenerator:
+    """
+    Deterministic expansion of a macrocycle into daily workouts. Each phase's priority zones
+    select the key sessions, its weekly hours range sets the volume (3:1 loading, declining taper)
+    and the athlete's FTP / threshold HR turn zones into targets. No LLM calls are involved.
+    """
+    def __init__(self, ftp, lthr=None):
+        self.ftp = ftp
+        self.lthr = lthr
+
+    def key_session(self, zone, rotation):
+        name, blocks = KEY_SESSIONS[zone][rotation % len(KEY_SESSIONS[zone])]
+        intervals = [{"segment": "warm-up", "minutes": WARMUP_MIN, **zone_targets(2, self.ftp, self.lthr)}]
+        segments = [(WARMUP_MIN, 2)]
+        for repeats, work_min, work_zone, rest_min in blocks:
+            intervals.append({
+                "segment": f"{repeats} x {work_min:g} min",
+                "repeats": repeats,
+                "minutes": work_min,
+                "recovery_minutes": rest_min,
+                **zone_targets(work_zone, self.ftp, self.lthr),
+            })
+            segments += [(repeats * work_min, work_zone), (repeats * rest_min, 1)]
+        intervals.append({"segment": "cool-down", "minutes": COOLDOWN_MIN, **zone_targets(1, self.ftp, self.lthr)})
+        segments.append((COOLDOWN_MIN, 1))
+        return name, intervals, segments
+
+    def steady_session(self, name, minutes, zone):
+        intervals = [{"segment": "steady", "minutes": round(minutes), **zone_targets(zone, self.ftp, self.lthr)}]
+        return name, intervals, [(minutes, zone)]
+
+    def plan_week(self, phase, week_index, week_start, rotation):
+        kind = phase_kind(phase)
+        hours = weekly_hours(phase, week_index)
+        recovery_week = hours < phase["target_weekly_hours_range"][0] and kind != "taper"
+        slots = list(DAY_SLOTS)
+        if hours < 6:
+            slots[4] = "rest"
+        key_days = [i for i, slot in enumerate(slots) if slot == "key"]
+
+        key_zones = sorted(set(z for z in phase["priority_zones"] if z >= 3))
+        if kind in ("base", "recovery", "transition") or recovery_week:
+            key_zones = key_zones[:1]
+        elif kind == "taper":
+            # Short openers keep the intensity while the volume drops
+            key_zones = [max(key_zones)] if key_zones else []
+        elif len(key_zones) > len(key_days):
+            # More priority zones than key days: rotate through them week by week so each one is trained
+            key_zones = sorted(key_zones[(week_index + k) % len(key_zones)] for k in range(len(key_days)))
+        for unused in key_days[len(key_zones):]:
+            slots[unused] = "endurance"
+
+        # Key sessions are fixed length; the long ride and endurance rides share the remaining time
+        total_min = hours * 60
+        planned = {}
+        for day, zone in zip(key_days, key_zones):
+            planned[day] = self.key_session(zone, rotation + day)
+        key_min = sum(sum(m for m, _ in p[2]) for p in planned.values())
+        recovery_min = 45 if "recovery" in slots else 0
+        long_min = min(MAX_LONG_RIDE_MIN, total_min * LONG_RIDE_SHARE)
+        remaining_min = max(0.0, total_min - key_min - recovery_min - long_min)
+        # Low-volume weeks get fewer, properly long endurance rides instead of many short ones
+        endurance_days = [i for i, slot in enumerate(slots) if slot == "endurance"]
+        while len(endurance_days) > 1 and remaining_min / len(endurance_days) < MIN_ENDURANCE_MIN:
+            slots[endurance_days.pop()] = "rest"
+        endurance_min = remaining_min / max(1, len(endurance_days))
+
+        days = []
+        for offset, slot in enumerate(slots):
+            date = week_start + datetime.timedelta(days=offset)
+            if slot == "key" and offset in planned:
+                name, intervals, segments = planned[offset]
+            elif slot == "long":
+                name, intervals, segments = self.steady_session("Long Endurance Ride", long_min, 2)
+            elif slot == "endurance" and endurance_min >= MIN_ENDURANCE_MIN / 2:
+                name, intervals, segments = self.steady_session("Endurance Ride", endurance_min, 2)
+            elif slot == "recovery":
+                name, intervals, segments = self.steady_session("Recovery Spin", recovery_min, 1)
+            else:
+                days.append({"date": date.isoformat(), "day": date.strftime("%A"), "workout": "Rest", "duration_min": 0, "tss": 0})
+                continue
+            days.append({
+                "date": date.isoformat(),
+                "day": date.strftime("%A"),
+                "workout": name,
+                "duration_min": round(sum(m for m, _ in segments)),
+                "tss": _tss(segments),
+                "intervals": intervals,
+            })
+
+        return {
+            "week_start": week_start.isoformat(),
+            "phase": phase["phase_name"],
+            "week_of_phase": week_index + 1,
+            "week_type": "recovery" if recovery_week else kind,
+            "target_hours": round(hours, 1),
+            "planned_hours": round(sum(d["duration_min"] for d in days) / 60, 1),
+            "planned_tss": sum(d["tss"] for d in days),
+            "days": days,
+        }
+
+    def generate(self, season_plan_json, start_date=None):
+        """Expands every phase into weeks of daily workouts, starting on the Monday on/after start_date."""
+        start_date = start_date or datetime.date.today()
+        week_start = start_date + datetime.timedelta(days=(7 - start_date.weekday()) % 7)
+        weeks = []
+        for phase in season_plan_json["phases"]:
+            for week_index in range(phase["duration_weeks"]):
+                weeks.append(self.plan_week(phase, week_index, week_start, rotation=len(weeks)))
+                week_start += datetime.timedelta(weeks=1)
+        return {
+            "macrocycle_id": season_plan_json.get("macrocycle_id"),
+            "ftp": self.ftp,
+            "lthr": self.lthr,
+            "power_zones_w": {z: zone_targets(z, self.ftp)["power_w"] for z in POWER_ZONES},
+            "weeks": weeks,
+        }
@@ -0,0 +1,196 @@
+import datetime
+import json
+import sqlite3
+
+DB_FILE = "memory/activities.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS activities (
+    activity_id INTEGER PRIMARY KEY,
+    type_key TEXT NOT NULL,
+    start_time_local TEXT NOT NULL,
+    start_time_gmt TEXT,
+    name TEXT,
+    duration_sec REAL,
+    distance_m REAL,
+    elevation_gain_m REAL,
+    training_load REAL,
+    avg_hr REAL,
+    avg_power REAL,
+    device_id INTEGER,
+    summary_json TEXT
+);
+-- Secondary indexes: (type, start time) for "last N of type X", start time for date-range paging
+CREATE INDEX IF NOT EXISTS idx_activities_type_start ON activities(type_key, start_time_local, activity_id);
+CREATE INDEX IF NOT EXISTS idx_activities_start ON activities(start_time_local, activity_id);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+UPSERT_SQL = """
+INSERT INTO activities VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(activity_id) DO UPDATE SET
+    type_key=excluded.type_key, start_time_local=excluded.start_time_local,
+    start_time_gmt=excluded.start_time_gmt, name=excluded.name,
+    duration_sec=excluded.duration_sec, distance_m=excluded.distance_m,
+    elevation_gain_m=excluded.elevation_gain_m, training_load=excluded.training_load,
+    avg_hr=excluded.avg_hr, avg_power=excluded.avg_power,
+    device_id=excluded.device_id, summary_json=excluded.summary_json
+"""
+
+_SUMMARY_COLUMNS = (
+    "activity_id, type_key, start_time_local, name, duration_sec, distance_m, "
+    "elevation_gain_m, training_load, avg_hr, avg_power"
+)
+
+
+def activity_row(activity):
+    """Maps an activity dict from Garmin's activity list endpoints to a table row."""
+    return (
+        activity["activityId"],
+        activity["activityType"]["typeKey"],
+        activity["startTimeLocal"],
+        activity.get("startTimeGMT"),
+        activity.get("activityName"),
+        activity.get("duration"),
+        activity.get("distance"),
+        activity.get("elevationGain"),
+        activity.get("activityTrainingLoad"),
+        activity.get("averageHR"),
+        activity.get("avgPower") or activity.get("averagePower"),
+        activity.get("deviceId"),
+        json.dumps(activity),
+    )
+
+
+class ActivityStore:
+    """
+    Local SQLite store of synced activity summaries. The (type, start time) index
+    turns "last N activities of type X" and date-range listings into B-tree lookups
+    instead of paging through the Garmin activity list.
+    """
+    def __init__(self, filename=DB_FILE):
+        self.filename = filename
+        # A store is used by one task at a time, but that task may hop to a worker thread
+        self.conn = sqlite3.connect(filename, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    # --- Writes ---
+
+    def upsert_activities(self, activities):
+        """Inserts or updates activity summaries in a single transaction. Returns the number of rows written."""
+        rows = [activity_row(a) for a in activities]
+        with self.conn:
+            self.conn.executemany(UPSERT_SQL, rows)
+        return len(rows)
+
+    def sync_recent(self, client, page_size=50, max_pages=None):
+        """
+        Pulls activities newer than the newest stored one (newest first) and upserts them.
+        On an empty store this walks the whole history once. Returns the IDs of the activities written.
+        """
+        newest = self.newest_start_time()
+        written = []
+        start = 0
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            activities = client.get_activities(start, page_size)
+            if not activities:
+                break
+            self.upsert_activities(activities)
+            written.extend(a["activityId"] for a in activities)
+            pages += 1
+            # The list is sorted newest first: stop once we reach already synced activities
+            if newest and activities[-1]["startTimeLocal"] <= newest:
+                break
+            start += page_size
+
+        self.set_state("last_sync", datetime.datetime.now().isoformat(timespec="seconds"))
+        return written
+
+    def set_state(self, key, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (key, value))
+
+    def get_state(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    # --- Reads ---
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM activities").fetchone()[0]
+
+    def newest_start_time(self):
+        row = self.conn.execute("SELECT MAX(start_time_local) FROM activities").fetchone()
+        return row[0]
+
+    def recent_by_type(self, type_key, count=3):
+        """Last `count` activities of one type, newest first (index range scan on type_key)."""
+        rows = self.conn.execute(
+            f"""
+            SELECT {_SUMMARY_COLUMNS} FROM activities
+            WHERE type_key = ?
+            ORDER BY start_time_local DESC, activity_id DESC
+            LIMIT ?
+            """,
+            (type_key, count),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_between(self, start_date, end_date, cursor=None, page_size=50, type_key=None):
+        """
+        Activities between two dates (YYYY-MM-DD, inclusive), oldest first, with keyset
+        pagination: pass the returned next_cursor to get the following page.
+        """
+        end_exclusive = (datetime.date.fromisoformat(end_date) + datetime.timedelta(days=1)).isoformat()
+        after_time, after_id = decode_cursor(cursor) if cursor else (start_date, -1)
+
+        query = f"""
+            SELECT {_SUMMARY_COLUMNS} FROM activities
+            WHERE (start_time_local, activity_id) > (?, ?) AND start_time_local < ?
+        """
+        params = [after_time, after_id, end_exclusive]
+        if type_key:
+            query += " AND type_key = ?"
+            params.append(type_key)
+        query += " ORDER BY start_time_local, activity_id LIMIT ?"
+        params.append(page_size + 1)
+
+        rows = [dict(row) for row in self.conn.execute(query, params).fetchall()]
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(rows[-1]["start_time_local"], rows[-1]["activity_id"])
+        return {"activities": rows, "next_cursor": next_cursor}
+
+    def activity_ids_between(self, start_date, end_date, type_key=None):
+        """All activity IDs between two dates (YYYY-MM-DD, inclusive), without a page limit."""
+        end_exclusive = (datetime.date.fromisoformat(end_date) + datetime.timedelta(days=1)).isoformat()
+        query = "SELECT activity_id FROM activities WHERE start_time_local >= ? AND start_time_local < ?"
+        params = [start_date, end_exclusive]
+        if type_key:
+            query += " AND type_key = ?"
+            params.append(type_key)
+        return [row[0] for row in self.conn.execute(query + " ORDER BY start_time_local", params)]
+
+
+def encode_cursor(start_time_local, activity_id):
+    return f"{start_time_local}|{activity_id}"
+
+def decode_cursor(cursor):
+    start_time_local, activity_id = cursor.rsplit("|", 1)
+    return start_time_local, int(activity_id)
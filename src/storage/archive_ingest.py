@@ -0,0 +1,257 @@
+"""
+Offline import of exported activity files (FIT, TCX, GPX, optionally .gz) into the local store.
+
+    python -m src.storage.archive_ingest <directory> [--workers N]
+
+Files are parsed in a process pool; summaries and the checkpoint rows of each batch are
+written in one transaction, so an interrupted import resumes where it stopped. Files that
+fail to parse are not checkpointed and are retried on the next run.
+"""
+import argparse
+import datetime
+import gzip
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from .activity_store import DB_FILE, UPSERT_SQL, ActivityStore, activity_row
+from .archive_parsers import iter_gpx_records, iter_tcx_records
+from .fit_decoder import SPORTS, iter_records
+from .stream_cache import STREAM_DIR, StreamCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested_files (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    status TEXT,
+    activity_id INTEGER
+);
+"""
+
+PARSERS = {".fit": iter_records, ".tcx": iter_tcx_records, ".gpx": iter_gpx_records}
+BATCH_SIZE = 200
+
+
+def find_archive_files(root):
+    """All supported files below root, sorted so runs are reproducible."""
+    found = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            lower = name.lower().removesuffix(".gz")
+            if os.path.splitext(lower)[1] in PARSERS:
+                found.append(os.path.abspath(os.path.join(directory, name)))
+    return sorted(found)
+
+
+def offline_activity_id(start_time, serial_number):
+    """
+    Deterministic id for an imported activity. Negative, so it never collides with Garmin ids,
+    and stable across runs, so re-importing a file overwrites instead of duplicating.
+    """
+    return -(int(start_time) * 1000 + (serial_number or 0) % 1000)
+
+
+def _summarize(cache, activity_id, metadata):
+    """Duration, distance, ascent and averages from the session message when present, else from the streams."""
+    session = (metadata.get("sessions") or [{}])[0]
+    channels = cache.load(activity_id, ["timestamp", "distance", "altitude", "heart_rate", "power"])
+    timestamps = channels["timestamp"]
+
+    def nan_stat(func, name):
+        values = channels[name]
+        if len(values) == 0 or np.isnan(values).all():
+            return None
+        return round(float(func(values)), 1)
+
+    altitude = channels["altitude"][~np.isnan(channels["altitude"])]
+    return {
+        "duration": session.get("total_elapsed_time", float(timestamps[-1] - timestamps[0])),
+        "distance": session.get("total_distance", nan_stat(np.nanmax, "distance")),
+        "elevationGain": session.get("total_ascent", round(float(np.clip(np.diff(altitude), 0, None).sum()), 1)),
+        "averageHR": session.get("avg_heart_rate", nan_stat(np.nanmean, "heart_rate")),
+        "avgPower": session.get("avg_power", nan_stat(np.nanmean, "power")),
+    }
+
+
+def ingest_file(path, stream_root=STREAM_DIR):
+    """
+    Worker: parses one file into the stream cache and returns a result dict with a
+    Garmin-style activity summary. Runs in a child process, so it never touches the database.
+    """
+    lower = path.lower()
+    extension = os.path.splitext(lower.removesuffix(".gz"))[1]
+    cache = StreamCache(stream_root)
+    staging_id = f"staging-{os.getpid()}"
+    metadata = {}
+    try:
+        opener = gzip.open if lower.endswith(".gz") else open
+        with opener(path, "rb") as stream:
+            metadata = cache.write_records(staging_id, PARSERS[extension](stream, metadata), metadata)
+        if metadata["samples"] == 0:
+            cache.remove(staging_id)
+            return {"path": path, "status": "empty"}
+
+        start_time = int(cache.load(staging_id, ["timestamp"])["timestamp"][0])
+        activity_id = offline_activity_id(start_time, metadata.get("serial_number"))
+        summary = _summarize(cache, staging_id, metadata)
+    except Exception as e:
+        cache.remove(staging_id)
+        return {"path": path, "status": "error", "error": str(e)}
+
+    # Move the finished streams into place (a re-import replaces the previous copy). If another
+    # worker is placing a copy of the same activity at the same time, that copy wins.
+    cache.remove(activity_id)
+    try:
+        os.replace(cache._dir(staging_id), cache._dir(activity_id))
+    except OSError:
+        cache.remove(staging_id)
+
+    session = (metadata.get("sessions") or [{}])[0]
+    sport = metadata.get("sport", session.get("sport"))
+    type_key = SPORTS.get(sport, "other") if isinstance(sport, int) else (sport or "other")
+    # Local start time in the activity's own time zone (FIT activity message or the offset in
+    # TCX/GPX times); files that only carry UTC fall back to this machine's time zone
+    utc_offset = metadata.get("utc_offset")
+    if utc_offset is not None:
+        started = datetime.datetime.fromtimestamp(start_time, datetime.timezone(datetime.timedelta(seconds=utc_offset)))
+    else:
+        started = datetime.datetime.fromtimestamp(start_time)
+    activity = {
+        "activityId": activity_id,
+        "activityType": {"typeKey": type_key},
+        "startTimeLocal": started.strftime("%Y-%m-%d %H:%M:%S"),
+        "startTimeGMT": datetime.datetime.fromtimestamp(start_time, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "activityName": f"{type_key.capitalize()} (imported {os.path.basename(path)})",
+        "deviceId": metadata.get("serial_number"),
+        "source": "archive",
+        **summary,
+    }
+    return {"path": path, "status": "ok", "activity": activity}
+
+
+def _find_duplicate(conn, activity):
+    """An already stored activity with the same start time, from the same device when both are known."""
+    row = conn.execute(
+        """
+        SELECT activity_id FROM activities
+        WHERE start_time_gmt = ? AND (device_id = ? OR device_id IS NULL OR ? IS NULL)
+        ORDER BY activity_id DESC LIMIT 1
+        """,
+        (activity["startTimeGMT"], activity["deviceId"], activity["deviceId"]),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _attach_streams(cache, imported_id, existing_id):
+    """Moves the imported streams to the stored activity unless it already has streams of its own."""
+    if cache.has(existing_id):
+        cache.remove(imported_id)
+        return
+    cache.remove(existing_id)
+    try:
+        os.replace(cache._dir(imported_id), cache._dir(existing_id))
+    except OSError:
+        cache.remove(imported_id)
+
+
+def _write_batch(store, cache, results):
+    """
+    Stores the summaries and checkpoint rows of one batch in a single transaction. Failed files
+    get no checkpoint row (an older one is dropped), so the next run tries them again.
+    """
+    counts = {}
+    with store.conn:
+        for result in results:
+            status = result["status"]
+            if status == "error":
+                counts["error"] = counts.get("error", 0) + 1
+                print(f"  Could not import {result['path']}: {result['error']}")
+                store.conn.execute("DELETE FROM ingested_files WHERE path = ?", (result["path"],))
+                continue
+            activity_id = None
+            if status == "ok":
+                activity = result["activity"]
+                activity_id = activity["activityId"]
+                existing = _find_duplicate(store.conn, activity)
+                if existing is not None and existing != activity_id:
+                    # Already synced from Garmin or imported from another file: keep the stored
+                    # summary, but give it the imported streams if it has none yet
+                    _attach_streams(cache, activity_id, existing)
+                    status, activity_id = "duplicate", existing
+                else:
+                    store.conn.execute(UPSERT_SQL, activity_row(activity))
+            stat = os.stat(result["path"])
+            store.conn.execute(
+                "INSERT OR REPLACE INTO ingested_files VALUES (?, ?, ?, ?, ?)",
+                (result["path"], stat.st_size, stat.st_mtime, status, activity_id),
+            )
+            counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def _pending_files(store, paths):
+    """Skips files that were already processed and have not changed since."""
+    done = {
+        row[0]: (row[1], row[2])
+        # Error rows may exist from older imports; those files are retried
+        for row in store.conn.execute("SELECT path, size, mtime FROM ingested_files WHERE status != 'error'")
+    }
+    pending = []
+    for path in paths:
+        stat = os.stat(path)
+        if done.get(path) != (stat.st_size, stat.st_mtime):
+            pending.append(path)
+    return pending
+
+
+def ingest_archive(root, workers=None, db_file=DB_FILE, stream_root=STREAM_DIR, batch_size=BATCH_SIZE):
+    """Imports every new or changed file below root. Returns {status: count} plus files and files_per_second."""
+    cache = StreamCache(stream_root)
+    os.makedirs(stream_root, exist_ok=True)
+    with ActivityStore(db_file) as store:
+        store.conn.executescript(SCHEMA)
+        paths = find_archive_files(root)
+        pending = _pending_files(store, paths)
+        print(f"{len(paths)} files found, {len(paths) - len(pending)} already imported, {len(pending)} to go.")
+
+        totals = {}
+        start = time.perf_counter()
+        batch = []
+        processed = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(ingest_file, pending, repeat(stream_root), chunksize=4):
+                batch.append(result)
+                processed += 1
+                if len(batch) >= batch_size or processed == len(pending):
+                    for status, count in _write_batch(store, cache, batch).items():
+                        totals[status] = totals.get(status, 0) + count
+                    batch = []
+                    rate = processed / max(time.perf_counter() - start, 1e-9)
+                    print(f"  {processed}/{len(pending)} files ({rate:.1f} files/s)")
+
+        elapsed = time.perf_counter() - start
+        totals["files"] = processed
+        totals["files_per_second"] = round(processed / elapsed, 1) if processed else 0.0
+        return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import exported FIT/TCX/GPX files into the local activity store.")
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    args = parser.parse_args()
+
+    totals = ingest_archive(args.directory, workers=args.workers)
+    print(
+        f"Imported {totals.get('ok', 0)} activities, skipped {totals.get('duplicate', 0)} duplicates, "
+        f"{totals.get('empty', 0)} empty and {totals.get('error', 0)} unreadable files "
+        f"({totals['files_per_second']} files/s)."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import datetime
+import math
+import xml.etree.ElementTree as ET
+
+# TCX / GPX sport names -> Garmin activity type keys
+SPORT_NAMES = {"biking": "cycling", "cycling": "cycling", "ride": "cycling", "running": "running", "run": "running"}
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+def _to_unix(text, metadata=None):
+    """Unix seconds of an ISO time; a non-UTC offset in the text is kept as the activity's utc_offset."""
+    moment = datetime.datetime.fromisoformat(text.strip().replace("Z", "+00:00"))
+    offset = moment.utcoffset()
+    if metadata is not None and offset and "utc_offset" not in metadata:
+        metadata["utc_offset"] = int(offset.total_seconds())
+    return int(moment.timestamp())
+
+def _number(element):
+    try:
+        return float(element.text)
+    except (TypeError, ValueError):
+        return None
+
+def _extension_values(point, names):
+    """Finds sensor values in a point's extensions regardless of the vendor namespace."""
+    values = {}
+    for child in point.iter():
+        name = _local_name(child.tag).lower()
+        if name in names and child.text and child.text.strip():
+            values[names[name]] = _number(child)
+    return values
+
+
+_TCX_EXTENSIONS = {"watts": "power", "speed": "speed"}
+
+def iter_tcx_records(stream, metadata):
+    """
+    Streams trackpoints from a TCX file with iterparse (finished trackpoints are cleared and
+    detached from their track, so memory stays flat). Yields channel dicts like the FIT decoder;
+    sport, device serial and UTC offset (if the times carry one) go into metadata.
+    """
+    parents = []
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        name = _local_name(element.tag)
+        if event == "start":
+            parents.append(element)
+            if name == "Activity" and "Sport" in element.attrib:
+                metadata["sport"] = SPORT_NAMES.get(element.attrib["Sport"].lower(), element.attrib["Sport"].lower())
+            continue
+
+        parents.pop()
+        if name == "Trackpoint":
+            record = {}
+            for child in element:
+                child_name = _local_name(child.tag)
+                if child_name == "Time":
+                    record["timestamp"] = _to_unix(child.text, metadata)
+                elif child_name == "HeartRateBpm":
+                    value = child.find("{*}Value")
+                    record["heart_rate"] = _number(value) if value is not None else None
+                elif child_name == "Cadence":
+                    record["cadence"] = _number(child)
+                elif child_name == "DistanceMeters":
+                    record["distance"] = _number(child)
+                elif child_name == "AltitudeMeters":
+                    record["altitude"] = _number(child)
+                elif child_name == "Extensions":
+                    record.update(_extension_values(child, _TCX_EXTENSIONS))
+            element.clear()
+            if parents:
+                parents[-1].remove(element)
+            yield {k: v for k, v in record.items() if v is not None}
+        elif name == "UnitId" and element.text:
+            metadata["serial_number"] = int(element.text)
+
+
+_GPX_EXTENSIONS = {"hr": "heart_rate", "heartrate": "heart_rate", "cad": "cadence", "cadence": "cadence",
+                   "power": "power", "watts": "power", "speed": "speed"}
+
+def _haversine_m(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 6371000 * 2 * math.asin(math.sqrt(a))
+
+def iter_gpx_records(stream, metadata):
+    """
+    Streams track points from a GPX file (time, elevation, sensor extensions and cumulative distance).
+    Finished points are cleared and detached like in iter_tcx_records.
+    """
+    parents = []
+    previous = None
+    distance = 0.0
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        name = _local_name(element.tag)
+        if event == "start":
+            parents.append(element)
+            if name == "gpx" and "creator" in element.attrib:
+                metadata["creator"] = element.attrib["creator"]
+            continue
+
+        parents.pop()
+        if name == "trkpt":
+            record = {}
+            if "lat" in element.attrib and "lon" in element.attrib:
+                position = (float(element.attrib["lat"]), float(element.attrib["lon"]))
+                if previous is not None:
+                    distance += _haversine_m(*previous, *position)
+                previous = position
+                record["distance"] = distance
+            for child in element:
+                child_name = _local_name(child.tag)
+                if child_name == "time":
+                    record["timestamp"] = _to_unix(child.text, metadata)
+                elif child_name == "ele":
+                    record["altitude"] = _number(child)
+                elif child_name == "extensions":
+                    record.update(_extension_values(child, _GPX_EXTENSIONS))
+            element.clear()
+            if parents:
+                parents[-1].remove(element)
+            yield {k: v for k, v in record.items() if v is not None}
+        elif name == "type" and element.text and "sport" not in metadata:
+            metadata["sport"] = SPORT_NAMES.get(element.text.strip().lower(), element.text.strip().lower())
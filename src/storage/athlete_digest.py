@@ -0,0 +1,280 @@
+import datetime
+import json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weekly_volume (
+    week_start TEXT PRIMARY KEY,
+    activities INTEGER,
+    hours REAL,
+    cycling_hours REAL,
+    distance_km REAL,
+    elevation_m REAL,
+    training_load REAL,
+    longest_ride_hours REAL
+);
+
+CREATE TABLE IF NOT EXISTS digest_dirty_weeks (
+    week_start TEXT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS athlete_stats (
+    key TEXT PRIMARY KEY,
+    value REAL,
+    updated_at TEXT
+);
+
+-- Every write to the activity index (sync, backfill, archive import) marks its week as dirty.
+-- (OR IGNORE would be overridden by the conflict policy of the outer upsert, hence NOT IN.)
+CREATE TRIGGER IF NOT EXISTS digest_activity_insert AFTER INSERT ON activities BEGIN
+    INSERT INTO digest_dirty_weeks SELECT w FROM (SELECT date(NEW.start_time_local, 'weekday 0', '-6 days') AS w)
+        WHERE w NOT IN (SELECT week_start FROM digest_dirty_weeks);
+END;
+CREATE TRIGGER IF NOT EXISTS digest_activity_update AFTER UPDATE ON activities BEGIN
+    INSERT INTO digest_dirty_weeks SELECT w FROM (SELECT date(OLD.start_time_local, 'weekday 0', '-6 days') AS w)
+        WHERE w NOT IN (SELECT week_start FROM digest_dirty_weeks);
+    INSERT INTO digest_dirty_weeks SELECT w FROM (SELECT date(NEW.start_time_local, 'weekday 0', '-6 days') AS w)
+        WHERE w NOT IN (SELECT week_start FROM digest_dirty_weeks);
+END;
+CREATE TRIGGER IF NOT EXISTS digest_activity_delete AFTER DELETE ON activities BEGIN
+    INSERT INTO digest_dirty_weeks SELECT w FROM (SELECT date(OLD.start_time_local, 'weekday 0', '-6 days') AS w)
+        WHERE w NOT IN (SELECT week_start FROM digest_dirty_weeks);
+END;
+"""
+
+CYCLING_TYPES = ("cycling", "road_biking", "virtual_ride", "indoor_cycling", "mountain_biking", "gravel_cycling")
+STATS_MAX_AGE = datetime.timedelta(hours=24)
+CTL_DAYS = 42
+ATL_DAYS = 7
+# Intensity factor assumed for activities with neither power (and FTP) nor heart rate (and LTHR)
+DEFAULT_INTENSITY_FACTOR = 0.7
+
+# Daily TSS estimate: hours x IF^2 x 100, IF from average power / FTP, else average HR / LTHR
+_DAILY_TSS = """
+SELECT substr(start_time_local, 1, 10), SUM(duration_sec / 3600.0 * 100 * CASE
+    WHEN avg_power > 0 AND :ftp > 0 THEN (avg_power / :ftp) * (avg_power / :ftp)
+    WHEN avg_hr > 0 AND :lthr > 0 THEN (avg_hr / :lthr) * (avg_hr / :lthr)
+    ELSE :default_if * :default_if END)
+FROM activities WHERE start_time_local >= :start GROUP BY 1
+"""
+
+_WEEK_AGGREGATE = f"""
+SELECT date(start_time_local, 'weekday 0', '-6 days') AS week_start,
+       COUNT(*),
+       COALESCE(SUM(duration_sec), 0) / 3600.0,
+       COALESCE(SUM(CASE WHEN type_key IN ({", ".join("?" * len(CYCLING_TYPES))}) THEN duration_sec END), 0) / 3600.0,
+       COALESCE(SUM(distance_m), 0) / 1000.0,
+       COALESCE(SUM(elevation_gain_m), 0),
+       COALESCE(SUM(training_load), 0),
+       COALESCE(MAX(CASE WHEN type_key IN ({", ".join("?" * len(CYCLING_TYPES))}) THEN duration_sec END), 0) / 3600.0
+FROM activities
+WHERE start_time_local >= ? AND start_time_local < ?
+GROUP BY week_start
+"""
+
+
+def week_start(day):
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def load_trend(daily_loads, start_date, end_date):
+    """
+    Exponentially weighted chronic (CTL, 42 d) and acute (ATL, 7 d) training load from a
+    {YYYY-MM-DD: load} dict. Returns the CTL series by day and the final CTL/ATL.
+    """
+    ctl = atl = 0.0
+    ctl_series = {}
+    day = start_date
+    while day <= end_date:
+        load = daily_loads.get(day.isoformat(), 0.0)
+        ctl += (load - ctl) / CTL_DAYS
+        atl += (load - atl) / ATL_DAYS
+        ctl_series[day] = ctl
+        day += datetime.timedelta(days=1)
+    return ctl_series, ctl, atl
+
+
+class AthleteDigest:
+    """
+    Materialized summary of the athlete's history for the planning agents. Weekly volume rows are
+    kept up to date incrementally: triggers on the activity index mark changed weeks dirty and only
+    those weeks are re-aggregated. The finished digest is cached until the data or the day changes.
+    """
+    def __init__(self, store):
+        self.store = store
+        self.conn = store.conn
+        self.conn.executescript(SCHEMA)
+        if store.get_state("digest_initialized") is None:
+            # Activities written before the triggers existed: aggregate every week once
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO digest_dirty_weeks "
+                    "SELECT DISTINCT date(start_time_local, 'weekday 0', '-6 days') FROM activities"
+                )
+            store.set_state("digest_initialized", datetime.datetime.now().isoformat(timespec="seconds"))
+
+    # --- Maintenance ---
+
+    def refresh_weeks(self):
+        """Re-aggregates the dirty weeks in one transaction. Returns how many weeks were rebuilt."""
+        dirty = [row[0] for row in self.conn.execute("SELECT week_start FROM digest_dirty_weeks") if row[0]]
+        if not dirty:
+            return 0
+        with self.conn:
+            for week in dirty:
+                week_end = (datetime.date.fromisoformat(week) + datetime.timedelta(days=7)).isoformat()
+                row = self.conn.execute(_WEEK_AGGREGATE, (*CYCLING_TYPES, *CYCLING_TYPES, week, week_end)).fetchone()
+                if row:
+                    self.conn.execute("INSERT OR REPLACE INTO weekly_volume VALUES (?, ?, ?, ?, ?, ?, ?, ?)", tuple(row))
+                else:
+                    self.conn.execute("DELETE FROM weekly_volume WHERE week_start = ?", (week,))
+            self.conn.execute("DELETE FROM digest_dirty_weeks")
+        return len(dirty)
+
+    def stats_stale(self, now=None):
+        now = now or datetime.datetime.now()
+        row = self.conn.execute("SELECT MIN(updated_at) FROM athlete_stats").fetchone()
+        return row[0] is None or now - datetime.datetime.fromisoformat(row[0]) > STATS_MAX_AGE
+
+    def refresh_stats(self, client):
+        """Stores the current FTP, VO2max and lactate threshold HR from Garmin (called at most once a day)."""
+        ftp = (client.get_cycling_ftp() or {}).get("functionalThresholdPower")
+        vo2 = (client.get_training_status(datetime.date.today().isoformat()) or {}).get("mostRecentVO2Max") or {}
+        user_data = (client.get_user_profile() or {}).get("userData") or {}
+        stats = {
+            "ftp": ftp,
+            "vo2max": (vo2.get("cycling") or {}).get("vo2MaxPreciseValue") or (vo2.get("generic") or {}).get("vo2MaxPreciseValue"),
+            "lthr": user_data.get("lactateThresholdHeartRate"),
+        }
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO athlete_stats VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in stats.items()],
+            )
+            self.conn.execute("DELETE FROM sync_state WHERE key = 'athlete_digest'")
+
+    def stats(self):
+        """The cached athlete stats ({"ftp", "vo2max", "lthr"}), without contacting Garmin."""
+        return {row[0]: row[1] for row in self.conn.execute("SELECT key, value FROM athlete_stats")}
+
+    # --- Digest ---
+
+    def get(self, today=None):
+        """The digest as a dict; rebuilt only when weeks were dirty or the cached one is from another day."""
+        today = today or datetime.date.today()
+        rebuilt_weeks = self.refresh_weeks()
+        cached = self.store.get_state("athlete_digest")
+        if cached and not rebuilt_weeks:
+            digest = json.loads(cached)
+            if digest.get("as_of") == today.isoformat():
+                return digest
+
+        digest = self.build(today)
+        self.store.set_state("athlete_digest", json.dumps(digest))
+        return digest
+
+    def build(self, today):
+        this_week = week_start(today)
+        first_week = this_week - datetime.timedelta(weeks=52)
+        weeks = {
+            row["week_start"]: dict(row)
+            for row in self.conn.execute(
+                "SELECT * FROM weekly_volume WHERE week_start >= ? ORDER BY week_start", (first_week.isoformat(),)
+            )
+        }
+        # Completed weeks only, oldest first; empty weeks count as zero volume
+        series = []
+        for i in range(52, 0, -1):
+            week = (this_week - datetime.timedelta(weeks=i)).isoformat()
+            series.append(weeks.get(week, {"week_start": week, "hours": 0.0, "cycling_hours": 0.0,
+                                           "distance_km": 0.0, "training_load": 0.0}))
+
+        def average(key, n):
+            return round(sum(w[key] for w in series[-n:]) / n, 1)
+
+        stats = self.stats()
+        return {
+            "as_of": today.isoformat(),
+            "ftp": stats.get("ftp"),
+            "vo2max": stats.get("vo2max"),
+            "lthr": stats.get("lthr"),
+            "volume": {
+                **{f"avg_weekly_hours_{n}w": average("hours", n) for n in (6, 12, 52)},
+                **{f"avg_weekly_cycling_hours_{n}w": average("cycling_hours", n) for n in (6, 12, 52)},
+                "avg_weekly_distance_km_12w": average("distance_km", 12),
+                "weekly_hours_last_12w": [round(w["hours"], 1) for w in series[-12:]],
+                "monthly_hours_last_12m": [round(sum(w["hours"] for w in series[i:i + 4]), 1) for i in range(4, 52, 4)],
+                "hours_this_week": round(weeks.get(this_week.isoformat(), {}).get("hours", 0.0), 1),
+            },
+            "load": self.load_summary(today),
+            "tss_load": self.tss_load_summary(today, stats),
+            "longest_rides": self.longest_rides(today - datetime.timedelta(weeks=52)),
+            "races": self.races(today - datetime.timedelta(weeks=104)),
+            "activities_indexed": self.store.count(),
+        }
+
+    def load_summary(self, today):
+        """CTL (fitness), ATL (fatigue), form and the weekly CTL ramp, from Garmin's per-activity training load."""
+        start = today - datetime.timedelta(days=4 * CTL_DAYS)
+        daily = {
+            row[0]: row[1] or 0.0
+            for row in self.conn.execute(
+                """
+                SELECT substr(start_time_local, 1, 10), SUM(training_load) FROM activities
+                WHERE start_time_local >= ? GROUP BY 1
+                """,
+                (start.isoformat(),),
+            )
+        }
+        ctl_series, ctl, atl = load_trend(daily, start, today)
+        ctl_4w_ago = ctl_series[today - datetime.timedelta(weeks=4)]
+        return {
+            "ctl": round(ctl, 1),
+            "atl": round(atl, 1),
+            "form": round(ctl - atl, 1),
+            "ctl_4_weeks_ago": round(ctl_4w_ago, 1),
+            "ctl_ramp_per_week": round((ctl - ctl_4w_ago) / 4, 1),
+        }
+
+    def tss_load_summary(self, today, stats):
+        """
+        CTL, ATL and form on a TSS scale, estimated per activity from duration and intensity
+        (Garmin's training load is EPOC-based and not comparable with planned TSS).
+        """
+        start = today - datetime.timedelta(days=4 * CTL_DAYS)
+        daily = {
+            row[0]: row[1] or 0.0
+            for row in self.conn.execute(_DAILY_TSS, {
+                "ftp": stats.get("ftp"), "lthr": stats.get("lthr"),
+                "default_if": DEFAULT_INTENSITY_FACTOR, "start": start.isoformat(),
+            })
+        }
+        _, ctl, atl = load_trend(daily, start, today)
+        return {"ctl": round(ctl, 1), "atl": round(atl, 1), "form": round(ctl - atl, 1)}
+
+    def longest_rides(self, since, limit=5):
+        rows = self.conn.execute(
+            f"""
+            SELECT substr(start_time_local, 1, 10) AS date, name, round(duration_sec / 3600.0, 1) AS hours,
+                   round(distance_m / 1000.0, 1) AS distance_km, elevation_gain_m, avg_power
+            FROM activities
+            WHERE type_key IN ({", ".join("?" * len(CYCLING_TYPES))}) AND start_time_local >= ?
+            ORDER BY duration_sec DESC LIMIT ?
+            """,
+            (*CYCLING_TYPES, since.isoformat(), limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def races(self, since):
+        """Activities Garmin has tagged with the 'race' event type."""
+        rows = self.conn.execute(
+            """
+            SELECT substr(start_time_local, 1, 10) AS date, name, type_key, round(duration_sec / 3600.0, 2) AS hours,
+                   round(distance_m / 1000.0, 1) AS distance_km, avg_power, avg_hr
+            FROM activities
+            WHERE start_time_local >= ? AND json_extract(summary_json, '$.eventType.typeKey') = 'race'
+            ORDER BY start_time_local
+            """,
+            (since.isoformat(),),
+        ).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,79 @@
+import datetime
+import json
+
+# Profile, FTP and name change rarely; they are refetched after a week or on explicit invalidation
+RESOURCE_MAX_AGE = datetime.timedelta(days=7)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS athlete_resources (
+    name TEXT PRIMARY KEY,
+    value TEXT,
+    fetched_at TEXT
+);
+"""
+
+
+def fetch_profile(client):
+    user_data = (client.get_user_profile() or {}).get("userData") or {}
+    return {
+        "gender": user_data.get("gender"),
+        "date_of_birth": user_data.get("birthDate"),
+        "height_cm": user_data.get("height"),
+        "weight_g": user_data.get("weight"),
+    }
+
+
+def fetch_ftp(client):
+    return {"cycling_ftp": (client.get_cycling_ftp() or {}).get("functionalThresholdPower")}
+
+
+def fetch_name(client):
+    return {"name": client.get_full_name()}
+
+
+FETCHERS = {
+    "profile": fetch_profile,
+    "ftp": fetch_ftp,
+    "name": fetch_name,
+}
+
+
+class AthleteResources:
+    """
+    Cache of the slowly changing Garmin athlete data (profile, FTP, name) in the activity index.
+    Values are served from the cache until they are older than RESOURCE_MAX_AGE or invalidated.
+    """
+    def __init__(self, store):
+        self.conn = store.conn
+        self.conn.executescript(SCHEMA)
+
+    def cached(self, name):
+        """(value, fetched_at) or (None, None)."""
+        row = self.conn.execute("SELECT value, fetched_at FROM athlete_resources WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row[0]), datetime.datetime.fromisoformat(row[1])
+
+    def get(self, name, get_client, now=None):
+        """The cached value; fetched from Garmin (get_client() is only called then) when missing or stale."""
+        now = now or datetime.datetime.now()
+        value, fetched_at = self.cached(name)
+        if value is None or now - fetched_at > RESOURCE_MAX_AGE:
+            value, _ = self.fetch(name, get_client(), now)
+        return value
+
+    def fetch(self, name, client, now=None):
+        """Fetches and stores one value. Returns (value, changed)."""
+        now = now or datetime.datetime.now()
+        previous, _ = self.cached(name)
+        value = FETCHERS[name](client)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO athlete_resources VALUES (?, ?, ?)",
+                (name, json.dumps(value), now.isoformat(timespec="seconds")),
+            )
+        return value, value != previous
+
+    def refresh(self, client, names=None):
+        """Refetches the given (default: all) values. Returns the names whose value changed."""
+        return [name for name in (names or FETCHERS) if self.fetch(name, client)[1]]
@@ -0,0 +1,271 @@
+"""
+First-time historical backfill of activities and daily wellness into the local store.
+
+    python -m src.storage.backfill [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--rate 4] [--shards 3]
+
+The history is split into month shards that are fetched concurrently under one shared
+request rate limit. Each shard is written in a single transaction together with its entry
+in backfill_shards, so an interrupted run resumes with the first unfinished shard. Days
+whose wellness fetch failed are recorded in backfill_failed_days; the rest of the month is
+written, and a later run only fetches the days still missing.
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import time
+
+from .activity_store import DB_FILE, UPSERT_SQL, ActivityStore, activity_row
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_wellness (
+    date TEXT PRIMARY KEY,
+    resting_hr REAL,
+    hrv_last_night REAL,
+    hrv_weekly_avg REAL,
+    hrv_status TEXT,
+    sleep_seconds REAL,
+    deep_sleep_seconds REAL,
+    sleep_score REAL,
+    avg_stress REAL,
+    max_stress REAL
+);
+
+CREATE TABLE IF NOT EXISTS backfill_shards (
+    shard TEXT PRIMARY KEY,
+    activities INTEGER,
+    days INTEGER,
+    completed_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS backfill_failed_days (
+    date TEXT PRIMARY KEY,
+    error TEXT,
+    failed_at TEXT
+);
+"""
+
+DEFAULT_YEARS = 3
+REQUESTS_PER_SECOND = 4
+BURST = 8
+MAX_CONCURRENT_SHARDS = 3
+MAX_ATTEMPTS = 4
+
+
+class TokenBucket:
+    """Async token bucket shared by all shards: at most `rate` requests per second on average, `burst` at once."""
+    def __init__(self, rate=REQUESTS_PER_SECOND, burst=BURST):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def month_shards(start_date, end_date):
+    """Splits [start_date, end_date] into (YYYY-MM, first_day, last_day) shards, oldest first."""
+    shards = []
+    first = start_date.replace(day=1)
+    while first <= end_date:
+        next_month = (first + datetime.timedelta(days=32)).replace(day=1)
+        last = next_month - datetime.timedelta(days=1)
+        shards.append((first.strftime("%Y-%m"), max(first, start_date), min(last, end_date)))
+        first = next_month
+    return shards
+
+
+async def _call(bucket, func, *args):
+    """One rate-limited Garmin call in a worker thread, retried with exponential backoff."""
+    for attempt in range(MAX_ATTEMPTS):
+        await bucket.acquire()
+        try:
+            return await asyncio.to_thread(func, *args)
+        except Exception as e:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            delay = 2 ** attempt
+            logger.warning(f"{func.__name__}{args} failed ({e}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+
+
+async def fetch_wellness_day(client, bucket, day):
+    """Resting HR and stress (daily summary), HRV and sleep for one day as a daily_wellness row."""
+    date_str = day.isoformat()
+    stats, hrv, sleep = await asyncio.gather(
+        _call(bucket, client.get_stats, date_str),
+        _call(bucket, client.get_hrv_data, date_str),
+        _call(bucket, client.get_sleep_data, date_str),
+    )
+    stats = stats or {}
+    hrv_summary = (hrv or {}).get("hrvSummary") or {}
+    sleep_dto = (sleep or {}).get("dailySleepDTO") or {}
+    sleep_score = ((sleep_dto.get("sleepScores") or {}).get("overall") or {}).get("value")
+    stress = stats.get("averageStressLevel")
+    return (
+        date_str,
+        stats.get("restingHeartRate"),
+        hrv_summary.get("lastNightAvg"),
+        hrv_summary.get("weeklyAvg"),
+        hrv_summary.get("status"),
+        sleep_dto.get("sleepTimeSeconds"),
+        sleep_dto.get("deepSleepSeconds"),
+        sleep_score,
+        stress if stress is None or stress >= 0 else None,  # -1/-2 mean "not enough data"
+        stats.get("maxStressLevel"),
+    )
+
+
+class Backfill:
+    """Resumable month-sharded backfill into the activity store database."""
+    def __init__(self, store, client, rate=REQUESTS_PER_SECOND, max_concurrent_shards=MAX_CONCURRENT_SHARDS):
+        self.store = store
+        self.client = client
+        self.bucket = TokenBucket(rate)
+        self.shard_slots = asyncio.Semaphore(max_concurrent_shards)
+        self.store.conn.executescript(SCHEMA)
+
+    def completed_shards(self):
+        return {row[0] for row in self.store.conn.execute("SELECT shard FROM backfill_shards")}
+
+    def stored_days(self, first, last):
+        return {
+            row[0] for row in self.store.conn.execute(
+                "SELECT date FROM daily_wellness WHERE date BETWEEN ? AND ?", (first.isoformat(), last.isoformat())
+            )
+        }
+
+    async def fetch_shard(self, first, last, days):
+        """
+        The shard's activities (None if that call failed) and its wellness for `days`, split into
+        rows and {date: error} for the days that failed.
+        """
+        activities, *results = await asyncio.gather(
+            _call(self.bucket, self.client.get_activities_by_date, first.isoformat(), last.isoformat()),
+            *(fetch_wellness_day(self.client, self.bucket, day) for day in days),
+            return_exceptions=True,
+        )
+        if isinstance(activities, Exception):
+            logger.error(f"Activities {first} - {last} failed: {activities}")
+            activities = None
+        elif activities is None:
+            activities = []
+        wellness = [row for row in results if not isinstance(row, Exception)]
+        failed = {day.isoformat(): str(row) for day, row in zip(days, results) if isinstance(row, Exception)}
+        return activities, wellness, failed
+
+    def write_shard(self, shard, first, last, activities, wellness, failed, complete):
+        """Activities, the wellness days that succeeded, the failed days and the shard checkpoint in one transaction."""
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        with self.store.conn:
+            self.store.conn.executemany(UPSERT_SQL, [activity_row(a) for a in activities or []])
+            self.store.conn.executemany(
+                "INSERT OR REPLACE INTO daily_wellness VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", wellness
+            )
+            self.store.conn.executemany("DELETE FROM backfill_failed_days WHERE date = ?", [(row[0],) for row in wellness])
+            self.store.conn.executemany(
+                "INSERT OR REPLACE INTO backfill_failed_days VALUES (?, ?, ?)",
+                [(date, error, now) for date, error in failed.items()],
+            )
+            if complete:
+                self.store.conn.execute(
+                    "INSERT OR REPLACE INTO backfill_shards VALUES (?, ?, ?, ?)",
+                    (shard, len(activities), len(self.stored_days(first, last)), now),
+                )
+
+    async def run(self, start_date, end_date, report=print):
+        """
+        Fetches every unfinished shard between the two dates. The shard containing today is
+        written but never marked complete, so later runs refresh it. A shard with failed days
+        keeps the days that succeeded and stays unfinished; the next run fetches its activities
+        and the missing days only. Returns a summary dict.
+        """
+        today = datetime.date.today()
+        done = self.completed_shards()
+        pending = [s for s in month_shards(start_date, end_date) if s[0] not in done]
+        report(f"{len(done)} shards already complete, {len(pending)} to fetch.")
+
+        started = time.monotonic()
+        progress = {"shards": 0, "activities": 0, "days": 0, "failed": [], "failed_days": []}
+
+        async def run_shard(shard, first, last):
+            async with self.shard_slots:
+                days = [first + datetime.timedelta(days=i) for i in range((last - first).days + 1)]
+                if last < today:
+                    # Days stored by an earlier, partly failed run are not fetched again
+                    stored = self.stored_days(first, last)
+                    days = [day for day in days if day.isoformat() not in stored]
+                try:
+                    activities, wellness, failed = await self.fetch_shard(first, last, days)
+                except Exception as e:
+                    logger.error(f"Shard {shard} failed: {e}")
+                    progress["failed"].append(shard)
+                    return
+                self.write_shard(shard, first, last, activities, wellness, failed,
+                                 complete=last < today and activities is not None and not failed)
+
+            progress["failed_days"] += sorted(failed)
+            if activities is None:
+                progress["failed"].append(shard)
+            else:
+                progress["shards"] += 1
+            progress["activities"] += len(activities or [])
+            progress["days"] += len(wellness)
+            finished = progress["shards"] + len(progress["failed"])
+            elapsed = time.monotonic() - started
+            eta = elapsed / finished * (len(pending) - finished)
+            report(
+                f"  [{finished}/{len(pending)}] {shard}: {len(activities or [])} activities, {len(wellness)} days"
+                f"{f', {len(failed)} days failed' if failed else ''} (elapsed {elapsed:.0f}s, ETA {eta:.0f}s)"
+            )
+
+        await asyncio.gather(*(run_shard(*s) for s in pending))
+        progress["elapsed_sec"] = round(time.monotonic() - started, 1)
+        return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill Garmin activities and daily wellness into the local store.")
+    parser.add_argument("--start", help="First day (YYYY-MM-DD), default: %d years ago" % DEFAULT_YEARS)
+    parser.add_argument("--end", help="Last day (YYYY-MM-DD), default: today")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND, help="Garmin requests per second")
+    parser.add_argument("--shards", type=int, default=MAX_CONCURRENT_SHARDS, help="Months fetched concurrently")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from ..tools.generic_tools import get_api
+    load_dotenv()
+
+    end_date = datetime.date.fromisoformat(args.end) if args.end else datetime.date.today()
+    start_date = (
+        datetime.date.fromisoformat(args.start) if args.start
+        else end_date.replace(year=end_date.year - DEFAULT_YEARS, day=1)
+    )
+    with ActivityStore(DB_FILE) as store:
+        backfill = Backfill(store, get_api(), rate=args.rate, max_concurrent_shards=args.shards)
+        result = asyncio.run(backfill.run(start_date, end_date))
+    print(
+        f"Backfilled {result['shards']} months ({result['activities']} activities, {result['days']} days) "
+        f"in {result['elapsed_sec']}s."
+    )
+    if result["failed"]:
+        print(f"Failed shards (run again to retry): {', '.join(sorted(result['failed']))}")
+    if result["failed_days"]:
+        print(f"{len(result['failed_days'])} days failed (run again to fetch only those): "
+              f"{', '.join(sorted(result['failed_days']))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import datetime
+import re
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetch_failures (
+    source TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    failed_at TEXT NOT NULL,
+    error TEXT,
+    PRIMARY KEY (source, item_key)
+);
+"""
+
+# Transient failures (network, rate limits, server errors) are retried after this long
+RETRY_AFTER = datetime.timedelta(hours=24)
+# 4xx answers that may succeed later
+TRANSIENT_CLIENT_STATUSES = (401, 408, 429)
+
+_STATUS_IN_MESSAGE = re.compile(r"\berror \((\d{3})\)")
+
+
+def http_status(error):
+    """The HTTP status behind a (possibly wrapped) Garmin client error, or None."""
+    while error is not None:
+        for holder in (error, getattr(error, "error", None)):
+            status = getattr(getattr(holder, "response", None), "status_code", None)
+            if status:
+                return status
+        match = _STATUS_IN_MESSAGE.search(str(error))
+        if match:
+            return int(match.group(1))
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def is_permanent(error):
+    """True if Garmin answered with a client error that will not change on retry (e.g. 404 for indoor rides)."""
+    status = http_status(error)
+    return status is not None and 400 <= status < 500 and status not in TRANSIENT_CLIENT_STATUSES
+
+
+class FailureLog:
+    """
+    Negative cache of failed per-item Garmin fetches for one source (e.g. "weather"), stored next
+    to the activity index, so a failing item is not refetched on every call but retried after RETRY_AFTER.
+    """
+    def __init__(self, store, source):
+        self.conn = store.conn
+        self.source = source
+        self.conn.executescript(SCHEMA)
+
+    def record(self, failures, now=None):
+        """failures: iterable of (item key, exception). Call inside or outside a transaction."""
+        now = (now or datetime.datetime.now()).isoformat(timespec="seconds")
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO fetch_failures VALUES (?, ?, ?, ?)",
+            [(self.source, str(key), now, str(error)[:500]) for key, error in failures],
+        )
+
+    def clear(self, keys):
+        self.conn.executemany(
+            "DELETE FROM fetch_failures WHERE source = ? AND item_key = ?",
+            [(self.source, str(key)) for key in keys],
+        )
+
+    def recent(self, now=None, retry_after=RETRY_AFTER):
+        """Keys of the items that failed within retry_after (as strings)."""
+        since = ((now or datetime.datetime.now()) - retry_after).isoformat(timespec="seconds")
+        return {
+            row[0] for row in self.conn.execute(
+                "SELECT item_key FROM fetch_failures WHERE source = ? AND failed_at > ?", (self.source, since)
+            )
+        }
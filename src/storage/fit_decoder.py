@@ -0,0 +1,211 @@
+import struct
+
+# Seconds between the Unix epoch and the FIT epoch (1989-12-31 00:00:00 UTC)
+FIT_EPOCH_OFFSET = 631065600
+
+# Global message numbers
+MESG_FILE_ID = 0
+MESG_SPORT = 12
+MESG_SESSION = 18
+MESG_RECORD = 20
+MESG_ACTIVITY = 34
+
+# base type -> (struct format char, invalid value)
+_BASE_TYPES = {
+    0x00: ("B", 0xFF),                # enum
+    0x01: ("b", 0x7F),                # sint8
+    0x02: ("B", 0xFF),                # uint8
+    0x83: ("h", 0x7FFF),              # sint16
+    0x84: ("H", 0xFFFF),              # uint16
+    0x85: ("i", 0x7FFFFFFF),          # sint32
+    0x86: ("I", 0xFFFFFFFF),          # uint32
+    0x88: ("f", None),                # float32
+    0x89: ("d", None),                # float64
+    0x0A: ("B", 0x00),                # uint8z
+    0x8B: ("H", 0x0000),              # uint16z
+    0x8C: ("I", 0x00000000),          # uint32z
+    0x8E: ("q", 0x7FFFFFFFFFFFFFFF),  # sint64
+    0x8F: ("Q", 0xFFFFFFFFFFFFFFFF),  # uint64
+    0x90: ("Q", 0x0000000000000000),  # uint64z
+}
+
+# record message field number -> (channel, scale, offset)
+RECORD_FIELDS = {
+    253: ("timestamp", 1, 0),
+    3: ("heart_rate", 1, 0),
+    4: ("cadence", 1, 0),
+    7: ("power", 1, 0),
+    6: ("speed", 1000, 0),
+    73: ("speed", 1000, 0),       # enhanced_speed
+    2: ("altitude", 5, 500),
+    78: ("altitude", 5, 500),     # enhanced_altitude
+    5: ("distance", 100, 0),
+}
+
+# session / sport / file_id fields kept as activity metadata
+SESSION_FIELDS = {
+    2: ("start_time", 1, 0),
+    5: ("sport", 1, 0),
+    7: ("total_elapsed_time", 1000, 0),
+    9: ("total_distance", 100, 0),
+    16: ("avg_heart_rate", 1, 0),
+    20: ("avg_power", 1, 0),
+    22: ("total_ascent", 1, 0),
+}
+# activity: timestamp (UTC) and local_timestamp give the activity's own UTC offset
+ACTIVITY_FIELDS = {
+    253: ("timestamp", 1, 0),
+    5: ("local_timestamp", 1, 0),
+}
+FILE_ID_FIELDS = {
+    3: ("serial_number", 1, 0),
+    4: ("time_created", 1, 0),
+}
+
+# FIT sport enum -> Garmin activity type key
+SPORTS = {1: "running", 2: "cycling", 5: "swimming", 11: "walking", 17: "hiking", 10: "training"}
+
+
+class FitDecodeError(Exception):
+    pass
+
+
+class _Definition:
+    """A compiled definition message: one struct call decodes a whole data message."""
+    def __init__(self, global_num, little_endian, fields, dev_size):
+        self.global_num = global_num
+        self.field_nums = []
+        self.invalid = []
+        fmt = "<" if little_endian else ">"
+        for field_num, size, base_type in fields:
+            char, invalid = _BASE_TYPES.get(base_type, (None, None))
+            if char is None or struct.calcsize(char) != size:
+                # Strings, byte arrays and array fields are skipped as padding
+                fmt += f"{size}x"
+                continue
+            fmt += char
+            self.field_nums.append(field_num)
+            self.invalid.append(invalid)
+        fmt += f"{dev_size}x"
+        self.struct = struct.Struct(fmt)
+
+    def decode(self, data):
+        values = self.struct.unpack(data)
+        return {
+            num: value for num, value, invalid in zip(self.field_nums, values, self.invalid)
+            if value != invalid and value == value  # drop invalid markers and float NaN
+        }
+
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise FitDecodeError("unexpected end of FIT file")
+    return data
+
+def _definition(definitions, local_type):
+    definition = definitions.get(local_type)
+    if definition is None:
+        raise FitDecodeError(f"data message for undefined local type {local_type}")
+    return definition
+
+def iter_fit_messages(stream):
+    """
+    Decodes a FIT file from a binary stream message by message, without reading
+    the whole file into memory. Yields (global_message_number, {field_number: raw_value}).
+    Handles chained FIT files and compressed timestamp headers.
+    """
+    while True:
+        header_size = stream.read(1)
+        if not header_size:
+            return
+        header = header_size + _read_exact(stream, header_size[0] - 1)
+        if header[8:12] != b".FIT":
+            raise FitDecodeError("not a FIT file")
+        data_size = struct.unpack("<I", header[4:8])[0]
+
+        definitions = {}
+        last_timestamp = None
+        consumed = 0
+        while consumed < data_size:
+            record_header = _read_exact(stream, 1)[0]
+            consumed += 1
+
+            if record_header & 0x80:
+                # Compressed timestamp header: data message with a 5-bit time offset
+                local_type = (record_header >> 5) & 0x03
+                definition = _definition(definitions, local_type)
+                fields = definition.decode(_read_exact(stream, definition.struct.size))
+                consumed += definition.struct.size
+                if last_timestamp is not None:
+                    offset = record_header & 0x1F
+                    timestamp = (last_timestamp & ~0x1F) + offset
+                    if offset < (last_timestamp & 0x1F):
+                        timestamp += 0x20
+                    fields[253] = last_timestamp = timestamp
+                yield definition.global_num, fields
+                continue
+
+            local_type = record_header & 0x0F
+            if record_header & 0x40:
+                fixed = _read_exact(stream, 5)
+                little_endian = fixed[1] == 0
+                global_num = struct.unpack("<H" if little_endian else ">H", fixed[2:4])[0]
+                field_count = fixed[4]
+                raw_fields = _read_exact(stream, field_count * 3)
+                consumed += 5 + field_count * 3
+                fields = [tuple(raw_fields[i:i + 3]) for i in range(0, len(raw_fields), 3)]
+
+                dev_size = 0
+                if record_header & 0x20:
+                    dev_count = _read_exact(stream, 1)[0]
+                    dev_fields = _read_exact(stream, dev_count * 3)
+                    consumed += 1 + dev_count * 3
+                    dev_size = sum(dev_fields[i + 1] for i in range(0, len(dev_fields), 3))
+                definitions[local_type] = _Definition(global_num, little_endian, fields, dev_size)
+            else:
+                definition = _definition(definitions, local_type)
+                fields = definition.decode(_read_exact(stream, definition.struct.size))
+                consumed += definition.struct.size
+                if 253 in fields:
+                    last_timestamp = fields[253]
+                yield definition.global_num, fields
+
+        stream.read(2)  # file CRC
+
+
+def _scaled(fields, mapping):
+    values = {}
+    for num, (name, scale, offset) in mapping.items():
+        if num in fields:
+            values[name] = fields[num] / scale - offset if scale != 1 or offset else fields[num]
+    return values
+
+def iter_records(stream, metadata):
+    """
+    Yields one dict of scaled channel values per record message (timestamps as Unix seconds).
+    File, session, sport and UTC offset (seconds) information is collected into the metadata dict
+    as it streams past.
+    """
+    for global_num, fields in iter_fit_messages(stream):
+        if global_num == MESG_RECORD:
+            record = _scaled(fields, RECORD_FIELDS)
+            if "timestamp" in record:
+                record["timestamp"] += FIT_EPOCH_OFFSET
+            yield record
+        elif global_num == MESG_SESSION:
+            session = _scaled(fields, SESSION_FIELDS)
+            if "start_time" in session:
+                session["start_time"] += FIT_EPOCH_OFFSET
+            metadata.setdefault("sessions", []).append(session)
+        elif global_num == MESG_ACTIVITY:
+            activity = _scaled(fields, ACTIVITY_FIELDS)
+            if "timestamp" in activity and "local_timestamp" in activity:
+                metadata["utc_offset"] = activity["local_timestamp"] - activity["timestamp"]
+        elif global_num == MESG_SPORT and 0 in fields:
+            metadata["sport"] = fields[0]
+        elif global_num == MESG_FILE_ID:
+            file_id = _scaled(fields, FILE_ID_FIELDS)
+            if "time_created" in file_id:
+                file_id["time_created"] += FIT_EPOCH_OFFSET
+            metadata.update(file_id)
@@ -0,0 +1,132 @@
+import array
+import io
+import json
+import os
+import shutil
+import zipfile
+
+import numpy as np
+
+from .fit_decoder import iter_records
+
+STREAM_DIR = "memory/streams"
+
+# channel -> (numpy dtype, array.array typecode). Sensor channels are float32 so gaps can be NaN.
+CHANNELS = {
+    "timestamp": ("<i8", "q"),
+    "power": ("<f4", "f"),
+    "heart_rate": ("<f4", "f"),
+    "cadence": ("<f4", "f"),
+    "speed": ("<f4", "f"),
+    "altitude": ("<f4", "f"),
+    "distance": ("<f4", "f"),
+}
+FLUSH_EVERY = 4096  # records buffered per channel before they are appended to disk
+
+
+def open_fit_payload(payload):
+    """Returns a binary stream over the FIT file in a Garmin download (a zip with one .fit) or raw FIT bytes."""
+    if payload[:2] == b"PK":
+        archive = zipfile.ZipFile(io.BytesIO(payload))
+        name = next(n for n in archive.namelist() if n.lower().endswith(".fit"))
+        return archive.open(name)
+    return io.BytesIO(payload)
+
+
+class StreamCache:
+    """
+    Per-activity cache of per-second channels. Each channel is a raw fixed-dtype file
+    (memory/streams/<activity_id>/<channel>.bin) that is read back with np.memmap, so an
+    analysis only touches the channels it needs and never holds whole rides in RAM.
+    """
+    def __init__(self, root=STREAM_DIR):
+        self.root = root
+
+    def _dir(self, activity_id):
+        return os.path.join(self.root, str(activity_id))
+
+    def has(self, activity_id):
+        return os.path.exists(os.path.join(self._dir(activity_id), "meta.json"))
+
+    def metadata(self, activity_id):
+        with open(os.path.join(self._dir(activity_id), "meta.json"), "r") as f:
+            return json.load(f)
+
+    def write_fit(self, activity_id, stream):
+        """Decodes a FIT stream into the cache. Returns the metadata dict."""
+        metadata = {}
+        return self.write_records(activity_id, iter_records(stream, metadata), metadata)
+
+    def write_records(self, activity_id, records, metadata):
+        """
+        Appends each channel of a record iterator to its file in chunks while the source is decoded.
+        meta.json is written last, so an interrupted write is never mistaken for a cached activity.
+        Returns the metadata dict.
+        """
+        target = self._dir(activity_id)
+        os.makedirs(target, exist_ok=True)
+        files = {name: open(os.path.join(target, f"{name}.bin"), "wb") for name in CHANNELS}
+        buffers = {name: array.array(typecode) for name, (_, typecode) in CHANNELS.items()}
+        samples = 0
+        try:
+            for record in records:
+                if "timestamp" not in record:
+                    continue
+                for name, buffer in buffers.items():
+                    buffer.append(record.get(name, np.nan) if name != "timestamp" else int(record["timestamp"]))
+                samples += 1
+                if samples % FLUSH_EVERY == 0:
+                    for name, buffer in buffers.items():
+                        buffer.tofile(files[name])
+                        del buffer[:]
+            for name, buffer in buffers.items():
+                buffer.tofile(files[name])
+        finally:
+            for f in files.values():
+                f.close()
+
+        metadata["samples"] = samples
+        metadata["channels"] = {name: dtype for name, (dtype, _) in CHANNELS.items()}
+        with open(os.path.join(target, "meta.json"), "w") as f:
+            json.dump(metadata, f)
+        return metadata
+
+    def load(self, activity_id, channels):
+        """Returns {channel: read-only np.memmap} for the requested channels only."""
+        target = self._dir(activity_id)
+        loaded = {}
+        for name in channels:
+            dtype = CHANNELS[name][0]
+            path = os.path.join(target, f"{name}.bin")
+            if os.path.getsize(path) == 0:
+                loaded[name] = np.zeros(0, dtype=dtype)
+            else:
+                loaded[name] = np.memmap(path, dtype=dtype, mode="r")
+        return loaded
+
+    def remove(self, activity_id):
+        shutil.rmtree(self._dir(activity_id), ignore_errors=True)
+
+
+def to_one_hz(timestamps, values):
+    """
+    Places samples on a 1 s grid from the first timestamp; gaps (pauses, smart recording) become 0.
+    Samples stamped before the first one (out-of-order records) are dropped.
+    """
+    if len(timestamps) == 0:
+        return np.zeros(0)
+    offsets = np.asarray(timestamps - timestamps[0], dtype=np.int64)
+    keep = offsets >= 0
+    offsets, values = offsets[keep], np.asarray(values)[keep]
+    grid = np.zeros(int(offsets.max()) + 1)
+    grid[offsets] = np.nan_to_num(values)
+    return grid
+
+def mean_max(values_1hz, durations):
+    """Best average over each duration (seconds) via a cumulative sum, e.g. a power curve."""
+    cumulative = np.concatenate(([0.0], np.cumsum(values_1hz)))
+    best = {}
+    for duration in durations:
+        if duration <= len(values_1hz):
+            best[duration] = float((cumulative[duration:] - cumulative[:-duration]).max() / duration)
+    return best
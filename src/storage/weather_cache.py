@@ -0,0 +1,135 @@
+import asyncio
+import datetime
+import logging
+
+from .fetch_failures import FailureLog, is_permanent
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS activity_weather (
+    activity_id INTEGER PRIMARY KEY,
+    temperature_c REAL,
+    apparent_temperature_c REAL,
+    relative_humidity REAL
+);
+"""
+
+HEAT_THRESHOLDS_C = (25, 30)
+HEAT_LOAD_BASE_C = 20  # degrees above this count towards the heat load
+
+
+def fahrenheit_to_celsius(value):
+    return None if value is None else round((value - 32) * 5 / 9, 1)
+
+
+class WeatherCache:
+    """
+    Per-activity weather (temperature, apparent temperature, humidity) stored next to the activity index.
+    Activities without weather (indoor rides, or Garmin answering with a client error) are stored with
+    empty values so they are not refetched; other failed fetches are retried after a day.
+    """
+    def __init__(self, store):
+        self.conn = store.conn
+        self.conn.executescript(SCHEMA)
+        self.failures = FailureLog(store, "weather")
+
+    def missing(self, activity_ids):
+        cached = {row[0] for row in self.conn.execute("SELECT activity_id FROM activity_weather")}
+        failed = self.failures.recent()
+        return [a_id for a_id in activity_ids if a_id not in cached and str(a_id) not in failed]
+
+    async def fetch_missing(self, client, activity_ids, max_concurrency=8):
+        """
+        Fetches weather for uncached activities from Garmin concurrently and stores it in one transaction.
+        Returns the number of activities stored (including the ones stored as empty).
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        failed = []
+
+        async def fetch(activity_id):
+            async with semaphore:
+                try:
+                    weather = await asyncio.to_thread(client.get_activity_weather, activity_id)
+                except Exception as e:
+                    if not is_permanent(e):
+                        logger.warning(f"Could not fetch weather for activity {activity_id}: {e}")
+                        failed.append((activity_id, e))
+                        return None
+                    weather = None
+            weather = weather or {}
+            # Garmin reports activity weather temperatures in Fahrenheit
+            return (
+                activity_id,
+                fahrenheit_to_celsius(weather.get("temp")),
+                fahrenheit_to_celsius(weather.get("apparentTemp")),
+                weather.get("relativeHumidity"),
+            )
+
+        rows = [r for r in await asyncio.gather(*(fetch(a_id) for a_id in self.missing(activity_ids))) if r]
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO activity_weather VALUES (?, ?, ?, ?)", rows)
+            self.failures.record(failed)
+            self.failures.clear(row[0] for row in rows)
+        return len(rows)
+
+    def daily_heat_exposure(self, start_date, end_date, thresholds=HEAT_THRESHOLDS_C):
+        """
+        Rolls per-activity weather into a daily heat-exposure series between two dates (YYYY-MM-DD, inclusive).
+        Per day: training minutes in the heat, minutes above each threshold and a duration-weighted
+        heat load (hours x degrees above 20 C, using the apparent temperature when available).
+        """
+        end_exclusive = (datetime.date.fromisoformat(end_date) + datetime.timedelta(days=1)).isoformat()
+        rows = self.conn.execute(
+            """
+            SELECT substr(a.start_time_local, 1, 10) AS day, a.duration_sec,
+                   w.temperature_c, w.apparent_temperature_c, w.relative_humidity
+            FROM activities a JOIN activity_weather w ON w.activity_id = a.activity_id
+            WHERE a.start_time_local >= ? AND a.start_time_local < ? AND w.temperature_c IS NOT NULL
+            ORDER BY a.start_time_local
+            """,
+            (start_date, end_exclusive),
+        ).fetchall()
+
+        days = {}
+        for day, duration_sec, temperature, apparent, humidity in rows:
+            minutes = (duration_sec or 0) / 60
+            felt = apparent if apparent is not None else temperature
+            entry = days.setdefault(day, {
+                "date": day,
+                "outdoor_minutes": 0.0,
+                **{f"minutes_above_{t}c": 0.0 for t in thresholds},
+                "heat_load": 0.0,
+                "max_temperature_c": temperature,
+                "_humidity_minutes": 0.0,
+            })
+            entry["outdoor_minutes"] += minutes
+            for t in thresholds:
+                if felt >= t:
+                    entry[f"minutes_above_{t}c"] += minutes
+            entry["heat_load"] += minutes / 60 * max(0.0, felt - HEAT_LOAD_BASE_C)
+            entry["max_temperature_c"] = max(entry["max_temperature_c"], temperature)
+            entry["_humidity_minutes"] += minutes * (humidity or 0)
+
+        series = []
+        for entry in days.values():
+            humidity_minutes = entry.pop("_humidity_minutes")
+            entry["avg_relative_humidity"] = round(humidity_minutes / entry["outdoor_minutes"], 1) if entry["outdoor_minutes"] else None
+            for key, value in entry.items():
+                if isinstance(value, float):
+                    entry[key] = round(value, 1)
+            series.append(entry)
+        return series
+
+
+def summarize_heat_exposure(series, end_date, thresholds=HEAT_THRESHOLDS_C):
+    """Totals over the series plus the heat load of the last 14 days before end_date."""
+    recent_start = (datetime.date.fromisoformat(end_date) - datetime.timedelta(days=13)).isoformat()
+    hot_days = [d["date"] for d in series if d[f"minutes_above_{thresholds[0]}c"] > 0]
+    return {
+        "days_with_outdoor_training": len(series),
+        **{f"hours_above_{t}c": round(sum(d[f"minutes_above_{t}c"] for d in series) / 60, 1) for t in thresholds},
+        "total_heat_load": round(sum(d["heat_load"] for d in series), 1),
+        "heat_load_last_14_days": round(sum(d["heat_load"] for d in series if d["date"] >= recent_start), 1),
+        "last_hot_session": hot_days[-1] if hot_days else None,
+    }
@@ -0,0 +1,142 @@
+import asyncio
+import datetime
+
+import numpy as np
+
+from .backfill import SCHEMA as WELLNESS_SCHEMA, TokenBucket, fetch_wellness_day
+
+BASELINE_DAYS = 28      # rolling baseline window before the recent days
+RECENT_DAYS = 3         # days compared against the baseline
+MIN_BASELINE_SAMPLES = 14
+REFRESH_DAYS = 3        # most recent days are refetched, Garmin keeps updating them
+YELLOW_Z = 1.5
+RED_Z = 2.5
+MIN_SLEEP_HOURS = 6
+
+# column -> (label, unit scale, direction in which a deviation is bad: +1 high is bad, -1 low is bad)
+METRICS = {
+    "hrv_last_night": ("HRV", 1, -1),
+    "resting_hr": ("Resting HR", 1, +1),
+    "sleep_seconds": ("Sleep", 1 / 3600, -1),
+    "avg_stress": ("Stress", 1, +1),
+}
+
+
+class WellnessMonitor:
+    """
+    Local screen of the daily wellness series (daily_wellness table): each metric's recent
+    average is compared with its rolling baseline as a z-score. Normal days produce a
+    Health Clearance draft without any LLM call.
+    """
+    def __init__(self, store):
+        self.conn = store.conn
+        self.conn.executescript(WELLNESS_SCHEMA)
+
+    async def refresh(self, client, today=None, days=BASELINE_DAYS + RECENT_DAYS):
+        """Fetches days missing from the window (and always the last few) from Garmin. Returns the number fetched."""
+        today = today or datetime.date.today()
+        window = [today - datetime.timedelta(days=i) for i in range(days)]
+        stored = {
+            row[0] for row in self.conn.execute(
+                "SELECT date FROM daily_wellness WHERE date >= ?", (window[-1].isoformat(),)
+            )
+        }
+        recent = set(window[:REFRESH_DAYS])
+        missing = [day for day in window if day.isoformat() not in stored or day in recent]
+
+        bucket = TokenBucket()
+        rows = await asyncio.gather(*(fetch_wellness_day(client, bucket, day) for day in missing))
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO daily_wellness VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def series(self, today, days):
+        """(days,) float arrays per metric, oldest first, NaN where no value was recorded."""
+        start = today - datetime.timedelta(days=days - 1)
+        index = {(start + datetime.timedelta(days=i)).isoformat(): i for i in range(days)}
+        values = {column: np.full(days, np.nan) for column in METRICS}
+        statuses = {}
+        rows = self.conn.execute(
+            f"SELECT date, hrv_status, {', '.join(METRICS)} FROM daily_wellness WHERE date >= ? AND date <= ?",
+            (start.isoformat(), today.isoformat()),
+        )
+        for row in rows:
+            i = index[row[0]]
+            statuses[row[0]] = row[1]
+            for j, column in enumerate(METRICS):
+                if row[j + 2] is not None:
+                    values[column][i] = row[j + 2]
+        return values, statuses
+
+    def detect(self, today=None):
+        """
+        Z-scores of the last RECENT_DAYS against the preceding BASELINE_DAYS for HRV, resting HR,
+        sleep and stress, plus Garmin's HRV status and a short-sleep rule. Returns
+        {"flagged", "insufficient_data", "metrics", "red_flags", "draft_clearance"}.
+        """
+        today = today or datetime.date.today()
+        values, statuses = self.series(today, BASELINE_DAYS + RECENT_DAYS)
+
+        metrics, flags = {}, []
+        severity = 0  # 0 green, 1 yellow, 2 red
+        insufficient = []
+        for column, (label, scale, direction) in METRICS.items():
+            series = values[column] * scale
+            baseline, recent = series[:BASELINE_DAYS], series[BASELINE_DAYS:]
+            samples = int(np.count_nonzero(~np.isnan(baseline)))
+            if samples < MIN_BASELINE_SAMPLES or np.isnan(recent).all():
+                insufficient.append(label)
+                metrics[column] = {"baseline_samples": samples}
+                continue
+
+            mean, sd = float(np.nanmean(baseline)), float(np.nanstd(baseline))
+            recent_mean = float(np.nanmean(recent))
+            z = (recent_mean - mean) / sd if sd > 0 else 0.0
+            metrics[column] = {
+                "recent_avg": round(recent_mean, 1),
+                "baseline_avg": round(mean, 1),
+                "baseline_sd": round(sd, 1),
+                "z_score": round(z, 2),
+            }
+            adverse = z * direction
+            if adverse >= YELLOW_Z:
+                level = 2 if adverse >= RED_Z else 1
+                severity = max(severity, level)
+                trend = "above" if z > 0 else "below"
+                flags.append(f"{label} {recent_mean:.1f} over the last {RECENT_DAYS} days is {abs(z):.1f} SD "
+                             f"{trend} the {BASELINE_DAYS}-day baseline ({mean:.1f}).")
+
+        recent_sleep = values["sleep_seconds"][BASELINE_DAYS:] / 3600
+        if np.count_nonzero(recent_sleep < MIN_SLEEP_HOURS) >= 2:
+            severity = max(severity, 1)
+            flags.append(f"Less than {MIN_SLEEP_HOURS} h of sleep on {np.count_nonzero(recent_sleep < MIN_SLEEP_HOURS)} "
+                         f"of the last {RECENT_DAYS} nights.")
+        last_status = statuses.get(today.isoformat()) or statuses.get((today - datetime.timedelta(days=1)).isoformat())
+        if last_status in ("LOW", "POOR"):
+            severity = max(severity, 1)
+            flags.append(f"Garmin HRV status is {last_status}.")
+
+        return {
+            "flagged": bool(flags) or bool(insufficient),
+            "insufficient_data": insufficient,
+            "metrics": metrics,
+            "red_flags": flags,
+            "draft_clearance": draft_clearance(severity, flags, metrics),
+        }
+
+
+def draft_clearance(severity, flags, metrics):
+    """A Health Clearance (HEALTH_CLEARANCE_SCHEMA shape) from the detector result."""
+    worst_z = max([abs(m["z_score"]) for m in metrics.values() if "z_score" in m] or [0.0])
+    readiness = int(max(0, min(100, 90 - 15 * len(flags) - 5 * max(0.0, worst_z - 1))))
+    status, restrictions = {
+        0: ("Green", "No restrictions. All biometrics are within the athlete's normal range."),
+        1: ("Yellow", "Reduce intensity: endurance only until the flagged metrics return to baseline."),
+        2: ("Red", "No structured training. Rest or easy recovery only until the flagged metrics normalize."),
+    }[severity]
+    return {
+        "health_status": status,
+        "readiness_score (0-100)": readiness,
+        "biometric_red_flags": flags,
+        "coach_restrictions": restrictions,
+    }
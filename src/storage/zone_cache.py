@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+import math
+
+import numpy as np
+
+from .fetch_failures import FailureLog, is_permanent
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS activity_zones (
+    activity_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    secs_json TEXT NOT NULL,
+    bounds_json TEXT NOT NULL,
+    PRIMARY KEY (activity_id, kind)
+);
+"""
+
+# Garmin endpoint per zone kind
+ZONE_FETCHERS = {
+    "hr": "get_activity_hr_in_timezones",
+    "power": "get_activity_power_in_timezones",
+}
+
+# Zone indices mapped onto the low / moderate / high intensity model used for the polarization index
+THREE_ZONE_MODEL = {
+    "hr": ([0, 1], [2], [3, 4]),
+    "power": ([0, 1], [2, 3], [4, 5, 6]),
+}
+
+
+def zone_vectors(zones):
+    """Converts Garmin's time-in-zone list into (seconds, lower boundaries), for any number of zones."""
+    zones = sorted(zones or [], key=lambda z: z.get("zoneNumber", 0))
+    return [z.get("secsInZone") or 0 for z in zones], [z.get("zoneLowBoundary") for z in zones]
+
+
+class ZoneCache:
+    """
+    Per-activity HR and power time-in-zone vectors cached in the activity database.
+    Activities without data (e.g. no power meter, or Garmin answering with a client error) are cached as
+    empty vectors so they are not refetched; other failed fetches are retried after a day.
+    """
+    def __init__(self, store):
+        self.conn = store.conn
+        self.conn.executescript(SCHEMA)
+        self.failures = FailureLog(store, "zones")
+
+    def missing(self, activity_ids, kind):
+        cached = {row[0] for row in self.conn.execute("SELECT activity_id FROM activity_zones WHERE kind = ?", (kind,))}
+        failed = self.failures.recent()
+        return [a_id for a_id in activity_ids if a_id not in cached and f"{a_id}:{kind}" not in failed]
+
+    def put(self, rows, failed=()):
+        """rows: iterable of (activity_id, kind, seconds, bounds); failed: iterable of (activity_id, kind, error)."""
+        rows = list(rows)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO activity_zones VALUES (?, ?, ?, ?)",
+                [(a_id, kind, json.dumps(secs), json.dumps(bounds)) for a_id, kind, secs, bounds in rows],
+            )
+            self.failures.record((f"{a_id}:{kind}", error) for a_id, kind, error in failed)
+            self.failures.clear(f"{a_id}:{kind}" for a_id, kind, _, _ in rows)
+
+    def matrix(self, activity_ids, kind):
+        """Returns (activities x zones seconds matrix, lower bounds of the most recent activity)."""
+        if not activity_ids:
+            return np.zeros((0, 0)), []
+        placeholders = ",".join("?" * len(activity_ids))
+        rows = self.conn.execute(
+            f"SELECT activity_id, secs_json, bounds_json FROM activity_zones "
+            f"WHERE kind = ? AND activity_id IN ({placeholders})",
+            [kind, *activity_ids],
+        ).fetchall()
+        order = {a_id: i for i, a_id in enumerate(activity_ids)}
+        vectors = [(order[row[0]], json.loads(row[1]), json.loads(row[2])) for row in rows]
+        vectors = [v for v in vectors if v[1]]
+        if not vectors:
+            return np.zeros((0, 0)), []
+
+        width = max(len(secs) for _, secs, _ in vectors)
+        matrix = np.zeros((len(vectors), width))
+        for row, (_, secs, _) in enumerate(vectors):
+            matrix[row, :len(secs)] = secs
+        latest_bounds = max(vectors, key=lambda v: v[0])[2]
+        return matrix, latest_bounds
+
+    async def fetch_missing(self, client, activity_ids, kinds=("hr", "power"), max_concurrency=8):
+        """Fetches uncached zone vectors from Garmin concurrently and stores them. Returns the number fetched."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        failed = []
+
+        async def fetch(activity_id, kind):
+            async with semaphore:
+                try:
+                    zones = await asyncio.to_thread(getattr(client, ZONE_FETCHERS[kind]), activity_id)
+                except Exception as e:
+                    if not is_permanent(e):
+                        logger.warning(f"Could not fetch {kind} zones for activity {activity_id}: {e}")
+                        failed.append((activity_id, kind, e))
+                        return None
+                    zones = None
+            secs, bounds = zone_vectors(zones)
+            return activity_id, kind, secs, bounds
+
+        jobs = [fetch(a_id, kind) for kind in kinds for a_id in self.missing(activity_ids, kind)]
+        results = [r for r in await asyncio.gather(*jobs) if r is not None]
+        self.put(results, failed)
+        return len(results)
+
+
+def polarization_index(low, moderate, high):
+    """
+    Polarization index (Treff et al. 2019): log10(low / moderate * high * 100) on time fractions.
+    Values above 2.0 indicate a polarized distribution. None if there is no high-intensity time.
+    """
+    total = low + moderate + high
+    if total <= 0 or high <= 0:
+        return None
+    f_low, f_moderate, f_high = low / total, moderate / total, high / total
+    f_moderate = max(f_moderate, 0.01)  # Treff et al.: avoid division by zero
+    return round(math.log10(f_low / f_moderate * f_high * 100), 2)
+
+def summarize_zones(matrix, bounds, kind):
+    """Vectorized sum of the per-activity zone matrix into totals, percentages and intensity distribution."""
+    if matrix.size == 0:
+        return {"activities_with_data": 0}
+
+    totals = matrix.sum(axis=0)
+    total_time = totals.sum()
+    percent = totals / total_time * 100 if total_time else np.zeros_like(totals)
+
+    low_idx, moderate_idx, high_idx = THREE_ZONE_MODEL[kind]
+    width = len(totals)
+    low, moderate, high = (float(totals[[i for i in idx if i < width]].sum()) for idx in (low_idx, moderate_idx, high_idx))
+    three_zone_total = low + moderate + high
+
+    unit = "bpm" if kind == "hr" else "watts"
+    return {
+        "activities_with_data": int(matrix.shape[0]),
+        "total_time_sec": float(total_time),
+        "zone_seconds": {f"Zone {i + 1}": float(s) for i, s in enumerate(totals)},
+        "zone_percent": {f"Zone {i + 1}": round(float(p), 1) for i, p in enumerate(percent)},
+        "latest_zone_lower_bounds": {f"Zone {i + 1} ({unit})": b for i, b in enumerate(bounds)},
+        "three_zone_percent": {
+            name: round(value / three_zone_total * 100, 1) if three_zone_total else 0.0
+            for name, value in (("low", low), ("moderate", moderate), ("high", high))
+        },
+        "polarization_index": polarization_index(low, moderate, high),
+    }
@@ -0,0 +1,149 @@
+import asyncio
+import datetime
+import logging
+from fastmcp import Context
+
+from storage.activity_store import ActivityStore
+from storage.athlete_digest import AthleteDigest
+from storage.wellness_anomalies import WellnessMonitor
+from storage.zone_cache import ZoneCache, summarize_zones
+from storage.weather_cache import WeatherCache, summarize_heat_exposure
+from tools.generic_tools import get_api
+
+logger = logging.getLogger(__name__)
+
+def register_activity_index_tools(mcp):
+    """
+    Registers the tools backed by the local activity index to the provided MCP server instance.
+    """
+    @mcp.tool()
+    async def sync_activities(ctx: Context) -> str:
+        """
+        Syncs new Garmin activities (and their weather) into the local activity index.
+        The first sync pulls the whole activity history.
+        """
+        logger.info("Syncing activities into the local index")
+
+        client = await asyncio.to_thread(get_api)
+        with ActivityStore() as store:
+            synced_ids = await asyncio.to_thread(store.sync_recent, client)
+            # Weather is fetched in bulk alongside the sync instead of one tool call per activity
+            weather_fetched = await WeatherCache(store).fetch_missing(client, synced_ids)
+            total = store.count()
+        return (f"Synced {len(synced_ids)} activities ({weather_fetched} with new weather data). "
+                f"The local index holds {total} activities.")
+
+    @mcp.tool()
+    def get_recent_activities_by_type(activity_type: str, count: int = 3, ctx: Context = None) -> list:
+        """
+        Returns the last 'count' activities of a specific type (e.g. 'cycling', 'virtual_ride', 'running')
+        from the local activity index, newest first.
+        """
+        logger.info(f"Fetching last {count} activities of type {activity_type} from the index")
+
+        with ActivityStore() as store:
+            return store.recent_by_type(activity_type, count)
+
+    @mcp.tool()
+    def list_activities_between_dates(start_date_str: str, end_date_str: str, cursor: str = None,
+                                      page_size: int = 50, activity_type: str = None, ctx: Context = None) -> dict:
+        """
+        Lists activities between two dates (YYYY-MM-DD, inclusive) from the local activity index, oldest first.
+        Results are paginated: pass 'next_cursor' from the response as 'cursor' to get the next page.
+        Optionally filter by activity type.
+        """
+        logger.info(f"Listing activities between {start_date_str} and {end_date_str} (cursor={cursor})")
+
+        with ActivityStore() as store:
+            return store.list_between(start_date_str, end_date_str, cursor, page_size, activity_type)
+
+    @mcp.tool()
+    async def get_time_in_zones_for_range(start_date_str: str, end_date_str: str, activity_type: str = None,
+                                          ctx: Context = None) -> dict:
+        """
+        Aggregates heart rate and power time-in-zone over all indexed activities between two dates
+        (YYYY-MM-DD, inclusive), optionally for one activity type. Reports per-zone totals and percentages,
+        the low/moderate/high intensity distribution and the polarization index (>2.0 = polarized).
+        Zone data missing from the local cache is fetched from Garmin concurrently.
+        """
+        logger.info(f"Aggregating time in zones between {start_date_str} and {end_date_str} ({activity_type or 'all types'})")
+
+        with ActivityStore() as store:
+            activity_ids = store.activity_ids_between(start_date_str, end_date_str, activity_type)
+            zone_cache = ZoneCache(store)
+
+            fetched = 0
+            if zone_cache.missing(activity_ids, "hr") or zone_cache.missing(activity_ids, "power"):
+                # Login (behind a lock) blocks, so it runs off the event loop like the fetches
+                client = await asyncio.to_thread(get_api)
+                fetched = await zone_cache.fetch_missing(client, activity_ids)
+
+            result = {"activity_count": len(activity_ids), "zone_vectors_fetched": fetched}
+            for kind in ("hr", "power"):
+                matrix, bounds = zone_cache.matrix(activity_ids, kind)
+                result[kind] = summarize_zones(matrix, bounds, kind)
+
+        if not activity_ids:
+            result["hint"] = "No indexed activities in this range. Run sync_activities first."
+        return result
+
+    @mcp.tool()
+    async def get_heat_exposure(start_date_str: str, end_date_str: str, ctx: Context = None) -> dict:
+        """
+        Returns the athlete's heat exposure between two dates (YYYY-MM-DD, inclusive): a daily series of
+        outdoor training minutes, minutes above 25 C / 30 C (apparent temperature), a duration-weighted heat load
+        and totals incl. the heat load of the last 14 days. Use it to judge heat preparation for a hot race.
+        """
+        logger.info(f"Computing heat exposure between {start_date_str} and {end_date_str}")
+
+        with ActivityStore() as store:
+            weather = WeatherCache(store)
+            activity_ids = store.activity_ids_between(start_date_str, end_date_str)
+            fetched = 0
+            if weather.missing(activity_ids):
+                fetched = await weather.fetch_missing(await asyncio.to_thread(get_api), activity_ids)
+            series = weather.daily_heat_exposure(start_date_str, end_date_str)
+
+        return {
+            "summary": summarize_heat_exposure(series, end_date_str),
+            "daily_series": series,
+            "weather_records_fetched": fetched,
+        }
+
+    @mcp.tool()
+    async def get_athlete_digest(ctx: Context = None) -> dict:
+        """
+        Returns the athlete's training history digest in one call: current FTP and VO2max, average weekly
+        hours over the last 6/12/52 weeks, weekly and monthly volume series, training load trend
+        (CTL fitness, ATL fatigue, form, weekly CTL ramp), the longest rides of the last year and recent races.
+        """
+        logger.info("Building the athlete digest")
+
+        with ActivityStore() as store:
+            digest = AthleteDigest(store)
+            last_sync = store.get_state("last_sync")
+            client = None
+            if last_sync is None or last_sync[:10] != datetime.date.today().isoformat():
+                # At most one incremental sync per day; the digest itself only reads the local index
+                client = await asyncio.to_thread(get_api)
+                await asyncio.to_thread(store.sync_recent, client)
+            if digest.stats_stale():
+                client = client or await asyncio.to_thread(get_api)
+                await asyncio.to_thread(digest.refresh_stats, client)
+            return digest.get()
+
+    @mcp.tool()
+    async def get_wellness_anomalies(ctx: Context = None) -> dict:
+        """
+        Screens the athlete's recent HRV, resting HR, sleep and stress against their 28-day rolling baseline
+        (z-scores) and returns the per-metric comparison, any red flags and a draft Health Clearance.
+        'flagged' is false when every metric is within the normal range and the draft can be used as is.
+        """
+        logger.info("Screening wellness data for anomalies")
+
+        with ActivityStore() as store:
+            monitor = WellnessMonitor(store)
+            fetched = await monitor.refresh(await asyncio.to_thread(get_api))
+            result = monitor.detect()
+        result["days_fetched"] = fetched
+        return result
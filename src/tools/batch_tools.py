@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from fastmcp import Context
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_CALLS = 32
+MAX_CONCURRENT_CALLS = 8
+
+async def run_batch(mcp, calls, max_concurrency=MAX_CONCURRENT_CALLS):
+    """
+    Runs [{"tool": name, "arguments": {...}}, ...] concurrently on this server (sync tools run in
+    worker threads and share the process-wide Garmin session). Returns one result per call, in order:
+    {"tool", "ok": True, "result": text} or {"tool", "ok": False, "error": message}.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(call):
+        name = call.get("tool") if isinstance(call, dict) else None
+        if not name:
+            return {"tool": name, "ok": False, "error": "Each call needs a 'tool' name."}
+        if name == "batch_call":
+            return {"tool": name, "ok": False, "error": "batch_call cannot be nested."}
+        tool = await mcp.get_tool(name)
+        if tool is None:
+            return {"tool": name, "ok": False, "error": f"Unknown tool '{name}'."}
+
+        async with semaphore:
+            try:
+                result = await tool.run(call.get("arguments") or {})
+            except Exception as e:
+                logger.warning(f"Batched call to {name} failed: {e}")
+                return {"tool": name, "ok": False, "error": str(e)}
+        text = "\n".join(c.text for c in result.content if getattr(c, "text", None))
+        return {"tool": name, "ok": True, "result": text}
+
+    return await asyncio.gather(*(run_one(call) for call in calls))
+
+def register_batch_tools(mcp):
+    """
+    Registers the batch tool-call endpoint to the provided MCP server instance.
+    """
+    @mcp.tool()
+    async def batch_call(calls: list[dict], ctx: Context = None) -> list:
+        """
+        Runs several tool calls in one request, concurrently, e.g. the same tool for several dates.
+        'calls' is a list of {"tool": "<tool name>", "arguments": {...}} (at most 32).
+        Returns one entry per call in the same order: {"tool", "ok": true, "result"} or {"tool", "ok": false, "error"}.
+        """
+        logger.info(f"Running a batch of {len(calls)} tool calls")
+
+        if len(calls) > MAX_BATCH_CALLS:
+            return [{"tool": None, "ok": False, "error": f"At most {MAX_BATCH_CALLS} calls per batch, got {len(calls)}."}]
+        return await run_batch(mcp, calls)
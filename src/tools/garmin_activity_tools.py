@@ -1,27 +1,27 @@
 import logging
 from fastmcp import Context
-import os
 
-from garminconnect import Garmin
 import calendar
 import datetime
 
-logger = logging.getLogger(__name__)
+from storage.zone_cache import zone_vectors
+from tools.generic_tools import get_api
 
-def get_api():
-    token_dir = os.path.expanduser("~/.garminconnect")
-    email = os.getenv("GARMIN_EMAIL")
-    password = os.getenv("GARMIN_PASSWORD")
-    # 1. Initialize and Login
-    client = Garmin() # (email, password) if token expired
-    client.login(tokenstore=token_dir)
-    
-    # Save tokens to the default directory (~/.garminconnect)
-    token_dir = os.path.expanduser("~/.garminconnect")
-    os.makedirs(token_dir, exist_ok=True)
-    client.garth.dump(token_dir)
+logger = logging.getLogger(__name__)
 
-    return client
+def format_time_in_zones(zones, unit):
+    """
+    Formats Garmin's time-in-zone list as {"Zone n (low-high unit)": seconds},
+    for however many zones the activity has.
+    """
+    seconds, bounds = zone_vectors(zones)
+    formatted = {}
+    for i, secs in enumerate(seconds):
+        if i + 1 < len(bounds):
+            formatted[f"Zone {i + 1} ({bounds[i]}-{bounds[i + 1]} {unit})"] = secs
+        else:
+            formatted[f"Zone {i + 1} (>{bounds[i]} {unit})"] = secs
+    return formatted
 
 def register_garmin_activity_tools(mcp):
     """
@@ -109,24 +109,7 @@ def register_garmin_activity_tools(mcp):
 
         client = get_api()
         hr_in_time_zones = client.get_activity_hr_in_timezones(activity_id)
-        time_zone_1 = hr_in_time_zones[0].get("secsInZone")
-        zone_1_lower_bound = hr_in_time_zones[0].get("zoneLowBoundary")
-        time_zone_2 = hr_in_time_zones[1].get("secsInZone")
-        zone_2_lower_bound = hr_in_time_zones[1].get("zoneLowBoundary")
-        time_zone_3 = hr_in_time_zones[2].get("secsInZone")
-        zone_3_lower_bound = hr_in_time_zones[2].get("zoneLowBoundary")
-        time_zone_4 = hr_in_time_zones[3].get("secsInZone")
-        zone_4_lower_bound = hr_in_time_zones[3].get("zoneLowBoundary")
-        time_zone_5 = hr_in_time_zones[4].get("secsInZone")
-        zone_5_lower_bound = hr_in_time_zones[4].get("zoneLowBoundary")
-
-        return {
-            f"Zone 1 ({zone_1_lower_bound}-{zone_2_lower_bound} bpm)": time_zone_1,
-            f"Zone 2 ({zone_2_lower_bound}-{zone_3_lower_bound} bpm)": time_zone_2,
-            f"Zone 3 ({zone_3_lower_bound}-{zone_4_lower_bound} bpm)": time_zone_3,
-            f"Zone 4 ({zone_4_lower_bound}-{zone_5_lower_bound} bpm)": time_zone_4,
-            f"Zone 5 (>{zone_5_lower_bound} bpm)": time_zone_5
-        }
+        return format_time_in_zones(hr_in_time_zones, "bpm")
     
     @mcp.tool()
     def get_power_in_time_zones(activity_id, ctx: Context) -> dict:
@@ -137,30 +120,7 @@ def register_garmin_activity_tools(mcp):
 
         client = get_api()
         time_in_power_zones = client.get_activity_power_in_timezones(activity_id)
-        time_zone_1 = time_in_power_zones[0].get("secsInZone")
-        zone_1_lower_bound = time_in_power_zones[0].get("zoneLowBoundary")
-        time_zone_2 = time_in_power_zones[1].get("secsInZone")
-        zone_2_lower_bound = time_in_power_zones[1].get("zoneLowBoundary")
-        time_zone_3 = time_in_power_zones[2].get("secsInZone")
-        zone_3_lower_bound = time_in_power_zones[2].get("zoneLowBoundary")
-        time_zone_4 = time_in_power_zones[3].get("secsInZone")
-        zone_4_lower_bound = time_in_power_zones[3].get("zoneLowBoundary")
-        time_zone_5 = time_in_power_zones[4].get("secsInZone")
-        zone_5_lower_bound = time_in_power_zones[4].get("zoneLowBoundary")  
-        time_zone_6 = time_in_power_zones[5].get("secsInZone")
-        zone_6_lower_bound = time_in_power_zones[5].get("zoneLowBoundary")
-        time_zone_7 = time_in_power_zones[6].get("secsInZone")
-        zone_7_lower_bound = time_in_power_zones[6].get("zoneLowBoundary")
-
-        return {
-            f"Zone 1 ({zone_1_lower_bound}-{zone_2_lower_bound} watts)": time_zone_1,
-            f"Zone 2 ({zone_2_lower_bound}-{zone_3_lower_bound} watts)": time_zone_2,
-            f"Zone 3 ({zone_3_lower_bound}-{zone_4_lower_bound} watts)": time_zone_3,
-            f"Zone 4 ({zone_4_lower_bound}-{zone_5_lower_bound} watts)": time_zone_4,
-            f"Zone 5 ({zone_5_lower_bound}-{zone_6_lower_bound} watts)": time_zone_5,
-            f"Zone 6 ({zone_6_lower_bound}-{zone_7_lower_bound} watts)": time_zone_6,
-            f"Zone 7 (>{zone_7_lower_bound} watts)": time_zone_7
-        }
+        return format_time_in_zones(time_in_power_zones, "watts")
 
     @mcp.tool()
     def get_activity_weather(activity_id, ctx: Context) -> dict:
@@ -1,26 +1,10 @@
 import logging
 from fastmcp import Context
 
-from garminconnect import Garmin
-import os
+from tools.generic_tools import get_api, athlete_resource
 
 logger = logging.getLogger(__name__)
 
-def get_api():
-    token_dir = os.path.expanduser("~/.garminconnect")
-    email = os.getenv("GARMIN_EMAIL")
-    password = os.getenv("GARMIN_PASSWORD")
-    # 1. Initialize and Login
-    client = Garmin() # (email, password) if token expired
-    client.login(tokenstore=token_dir)
-    
-    # Save tokens to the default directory (~/.garminconnect)
-    token_dir = os.path.expanduser("~/.garminconnect")
-    os.makedirs(token_dir, exist_ok=True)
-    client.garth.dump(token_dir)
-
-    return client
-
 def register_garmin_health_tools(mcp):
     """
     Registers all Garmin-Health-related tools to the provided MCP server instance.
@@ -115,21 +99,8 @@ def register_garmin_health_tools(mcp):
     @mcp.tool()
     def get_user_profile(ctx: Context) -> dict:
         """
-        Fetches gender, weight, height and date of birth of the user.
+        Fetches gender, weight, height and date of birth of the user (cached, also available as the athlete://profile resource).
         """
         logger.info(f"Fetching user profile data")
 
-        client = get_api()
-        profile = client.get_user_profile()
-        
-        gender = profile.get("userData").get("gender")
-        height_cm = profile.get("userData").get("height")
-        weight_g = profile.get("userData").get("weight")
-        date_of_birth = profile.get("userData").get("birthDate")
-
-        return {
-            "gender": gender,
-            "date_of_birth": date_of_birth,
-            "height_cm": height_cm,
-            "weight_g": weight_g,
-        }
\ No newline at end of file
+        return athlete_resource("profile")
\ No newline at end of file
@@ -1,28 +1,10 @@
 import logging
 from fastmcp import Context
 
-from garminconnect import Garmin
-import os
-
-from garth import client
+from tools.generic_tools import get_api, athlete_resource
 
 logger = logging.getLogger(__name__)
 
-def get_api():
-    token_dir = os.path.expanduser("~/.garminconnect")
-    email = os.getenv("GARMIN_EMAIL")
-    password = os.getenv("GARMIN_PASSWORD")
-    # 1. Initialize and Login
-    client = Garmin() # (email, password) if token expired
-    client.login(tokenstore=token_dir)
-    
-    # Save tokens to the default directory (~/.garminconnect)
-    token_dir = os.path.expanduser("~/.garminconnect")
-    os.makedirs(token_dir, exist_ok=True)
-    client.garth.dump(token_dir)
-
-    return client
-
 def register_garmin_performance_tools(mcp):
     """
     Registers all Garmin-Performance-related tools to the provided MCP server instance.
@@ -47,13 +29,11 @@ def register_garmin_performance_tools(mcp):
     @mcp.tool()
     def get_cycling_ftp(ctx: Context) -> dict:
         """
-        Fetches user's current cycling FTP.
+        Fetches user's current cycling FTP (cached, also available as the athlete://ftp resource).
         """
         logger.info("Fetching cycling FTP")
 
-        client = get_api()
-        ftp = client.get_cycling_ftp().get("functionalThresholdPower")
-        return {"cycling_ftp": ftp}
+        return athlete_resource("ftp")
     
     @mcp.tool()
     def get_altitude_acclimation(date_str, ctx: Context) -> dict:
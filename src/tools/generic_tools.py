@@ -3,27 +3,59 @@ from fastmcp import Context
 
 from garminconnect import Garmin
 import os
-
-from garth import client
+import threading
 
 from datetime import date
 
 logger = logging.getLogger(__name__)
 
+_client = None
+_client_lock = threading.Lock()
+
 def get_api():
-    token_dir = os.path.expanduser("~/.garminconnect")
-    email = os.getenv("GARMIN_EMAIL")
-    password = os.getenv("GARMIN_PASSWORD")
-    # 1. Initialize and Login
-    client = Garmin() # (email, password) if token expired
-    client.login(tokenstore=token_dir)
-    
-    # Save tokens to the default directory (~/.garminconnect)
-    token_dir = os.path.expanduser("~/.garminconnect")
-    os.makedirs(token_dir, exist_ok=True)
-    client.garth.dump(token_dir)
+    """
+    The Garmin client shared by all tools of this process. The first call logs in with the
+    stored tokens; later calls (also from concurrent tool calls) reuse the same session.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            token_dir = os.path.expanduser("~/.garminconnect")
+            # 1. Initialize and Login
+            client = Garmin() # (email, password) if token expired
+            client.login(tokenstore=token_dir)
+
+            # Save tokens to the default directory (~/.garminconnect)
+            os.makedirs(token_dir, exist_ok=True)
+            client.garth.dump(token_dir)
+            _client = client
+        return _client
+
+ATHLETE_RESOURCE_URIS = {
+    "name": "athlete://name",
+    "profile": "athlete://profile",
+    "ftp": "athlete://ftp",
+    "goals": "athlete://goals",
+}
+
+def athlete_resource(name):
+    """A cached athlete resource value (profile, ftp, name); Garmin is only contacted when it is stale."""
+    # Imported here: get_api is also used as src.tools.generic_tools (e.g. by the backfill CLI),
+    # where the server's top-level storage package is not importable
+    from storage.activity_store import ActivityStore
+    from storage.athlete_resources import AthleteResources
+
+    with ActivityStore() as store:
+        return AthleteResources(store).get(name, get_api)
 
-    return client
+async def notify_resource_updated(ctx, name):
+    """Sends a resources/updated notification for an athlete resource to the connected client."""
+    if ctx is None:
+        return
+    try:
+        await ctx.session.send_resource_updated(ATHLETE_RESOURCE_URIS[name])
+    except Exception as e:
+        logger.warning(f"Could not notify the client about the {name} update: {e}")
 
 def register_generic_tools(mcp):
     """
@@ -42,10 +74,9 @@ def register_generic_tools(mcp):
     @mcp.tool()
     def get_user_name(ctx: Context) -> str:
         """
-        Returns the user's name from environment variable.
+        Returns the user's name (cached, also available as the athlete://name resource).
         """
         logger.info("Fetching user's name")
 
-        client = get_api()
-        name = client.get_full_name()
+        name = athlete_resource("name")["name"]
         return f"The user's name is {name}."
@@ -1,25 +1,30 @@
 import logging
 from fastmcp import Context
 
-from garminconnect import Garmin
 import os
-
-from garth import client
-
-from datetime import date
 import json
 
+from tools.generic_tools import notify_resource_updated
+
 METRICS_FILE = "memory/goals.json"
+# Parsed goals, keyed by the file's modification time (edits outside the server are picked up too)
+_goals_cache = {"mtime": None, "data": {}}
+
 # Helper functions (internal to the server)
 def load_metrics():
     if not os.path.exists(METRICS_FILE):
         return {}
-    with open(METRICS_FILE, 'r') as f:
-        return json.load(f)
+    mtime = os.path.getmtime(METRICS_FILE)
+    if _goals_cache["mtime"] != mtime:
+        with open(METRICS_FILE, 'r') as f:
+            _goals_cache["data"] = json.load(f)
+        _goals_cache["mtime"] = mtime
+    return _goals_cache["data"]
 
 def save_metrics(data):
     with open(METRICS_FILE, 'w') as f:
         json.dump(data, f, indent=2)
+    _goals_cache["mtime"] = None
 
 logger = logging.getLogger(__name__)
 
@@ -34,18 +39,21 @@ def register_goal_tools(mcp):
         return json.dumps(data, indent=2)
     
     @mcp.tool()
-    def update_user_goals(data: dict) -> str:
+    async def update_user_goals(data: dict, ctx: Context = None) -> str:
         """Updates the user's fitness goals."""
         save_metrics(data)
+        await notify_resource_updated(ctx, "goals")
         return "User goals updated successfully."
 
     @mcp.tool()
-    def add_race_goal(name: str, priority: int, date: str, distance_km: float, goal_desc: str) -> str:
+    async def add_race_goal(name: str, priority: int, date: str, distance_km: float, goal_desc: str,
+                            ctx: Context = None) -> str:
         """Adds a new race (YYYY-MM-DD) to the user's calendar."""
         data = load_metrics()
         if "races" not in data: data["races"] = []
         new_race = {"name": name, "priority": priority, "date": date, "distance_km": distance_km, "goal": goal_desc}
         data["races"].append(new_race)
         save_metrics(data)
+        await notify_resource_updated(ctx, "goals")
         return f"Added race: {name} on {date}."
 
@@ -0,0 +1,54 @@
+import asyncio
+import json
+import logging
+from fastmcp import Context
+
+from storage.activity_store import ActivityStore
+from storage.athlete_resources import AthleteResources, FETCHERS
+from tools.generic_tools import get_api, athlete_resource, notify_resource_updated
+from tools.goal_tools import load_metrics
+
+logger = logging.getLogger(__name__)
+
+def register_athlete_resources(mcp):
+    """
+    Registers the slowly changing athlete data (name, profile, FTP, goals) as cached MCP resources,
+    plus the tool that refreshes them.
+    """
+    @mcp.resource("athlete://name", mime_type="application/json")
+    def athlete_name() -> str:
+        """The athlete's full name."""
+        return json.dumps(athlete_resource("name"))
+
+    @mcp.resource("athlete://profile", mime_type="application/json")
+    def athlete_profile() -> str:
+        """Gender, date of birth, height (cm) and weight (g) of the athlete."""
+        return json.dumps(athlete_resource("profile"))
+
+    @mcp.resource("athlete://ftp", mime_type="application/json")
+    def athlete_ftp() -> str:
+        """The athlete's current cycling FTP in watts."""
+        return json.dumps(athlete_resource("ftp"))
+
+    @mcp.resource("athlete://goals", mime_type="application/json")
+    def athlete_goals() -> str:
+        """The athlete's fitness goals and upcoming races."""
+        return json.dumps(load_metrics())
+
+    @mcp.tool()
+    async def refresh_athlete_resources(ctx: Context = None) -> str:
+        """
+        Refetches the athlete's name, profile and FTP from Garmin, e.g. after a new FTP test.
+        Clients are notified about every resource whose value changed.
+        """
+        logger.info("Refreshing the cached athlete resources")
+
+        def refresh():
+            with ActivityStore() as store:
+                return AthleteResources(store).refresh(get_api())
+
+        changed = await asyncio.to_thread(refresh)
+        for name in changed:
+            await notify_resource_updated(ctx, name)
+        unchanged = [name for name in FETCHERS if name not in changed]
+        return f"Refreshed athlete resources. Changed: {', '.join(changed) or 'none'}; unchanged: {', '.join(unchanged) or 'none'}."
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from fastmcp import Context
+
+import numpy as np
+from garminconnect import Garmin
+
+from storage.activity_store import ActivityStore
+from storage.stream_cache import StreamCache, CHANNELS, open_fit_payload, to_one_hz, mean_max
+from tools.generic_tools import get_api
+
+logger = logging.getLogger(__name__)
+
+POWER_CURVE_DURATIONS = [5, 60, 300, 1200, 3600]
+
+async def cache_missing_streams(client, activity_ids, cache, max_concurrency=4):
+    """Downloads the original FIT files of uncached activities concurrently and decodes them into the stream cache."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    def download_and_decode(activity_id):
+        payload = client.download_activity(activity_id, dl_fmt=Garmin.ActivityDownloadFormat.ORIGINAL)
+        with open_fit_payload(payload) as stream:
+            cache.write_fit(activity_id, stream)
+
+    async def cache_one(activity_id):
+        async with semaphore:
+            try:
+                await asyncio.to_thread(download_and_decode, activity_id)
+                return True
+            except Exception as e:
+                logger.warning(f"Could not cache streams for activity {activity_id}: {e}")
+                cache.remove(activity_id)
+                return False
+
+    results = await asyncio.gather(*(cache_one(a_id) for a_id in activity_ids if not cache.has(a_id)))
+    return sum(results)
+
+def register_stream_tools(mcp):
+    """
+    Registers the per-second activity stream tools to the provided MCP server instance.
+    """
+    @mcp.tool()
+    async def cache_activity_streams(activity_id: int, ctx: Context = None) -> dict:
+        """
+        Downloads the original FIT file of an activity and caches its per-second channels
+        (power, heart rate, cadence, speed, altitude, distance) for stream analyses.
+        """
+        logger.info(f"Caching streams for Activity ID {activity_id}")
+
+        cache = StreamCache()
+        cached = await cache_missing_streams(await asyncio.to_thread(get_api), [activity_id], cache)
+        metadata = cache.metadata(activity_id) if cache.has(activity_id) else {}
+        return {"newly_cached": bool(cached), "samples": metadata.get("samples", 0)}
+
+    @mcp.tool()
+    def get_activity_stream_summary(activity_id: int, channels: list = None, ctx: Context = None) -> dict:
+        """
+        Summarizes cached per-second channels of one activity (samples, mean, max; best efforts for power).
+        Available channels: power, heart_rate, cadence, speed, altitude, distance.
+        Call cache_activity_streams first if the activity is not cached.
+        """
+        logger.info(f"Summarizing streams for Activity ID {activity_id}")
+
+        cache = StreamCache()
+        if not cache.has(activity_id):
+            return {"error": f"Streams for activity {activity_id} are not cached. Call cache_activity_streams first."}
+
+        channels = [c for c in (channels or ["power", "heart_rate", "cadence", "speed"]) if c in CHANNELS and c != "timestamp"]
+        data = cache.load(activity_id, ["timestamp", *channels])
+        summary = {}
+        for name in channels:
+            values = data[name]
+            valid = values[~np.isnan(values)]
+            summary[name] = {
+                "samples": int(valid.size),
+                "mean": round(float(valid.mean()), 1) if valid.size else None,
+                "max": round(float(valid.max()), 1) if valid.size else None,
+            }
+        if "power" in channels:
+            best = mean_max(to_one_hz(data["timestamp"], data["power"]), POWER_CURVE_DURATIONS)
+            summary["power"]["best_efforts_w"] = {f"{d}s": round(v) for d, v in best.items()}
+        return summary
+
+    @mcp.tool()
+    async def get_power_curve_for_range(start_date_str: str, end_date_str: str, activity_type: str = "cycling",
+                                        ctx: Context = None) -> dict:
+        """
+        Computes the mean-max power curve (best 5 s, 1 min, 5 min, 20 min, 60 min) over all indexed activities
+        of one type between two dates (YYYY-MM-DD, inclusive), from cached per-second power streams.
+        Uncached FIT files are downloaded concurrently first.
+        """
+        logger.info(f"Computing power curve between {start_date_str} and {end_date_str} for {activity_type}")
+
+        with ActivityStore() as store:
+            activity_ids = store.activity_ids_between(start_date_str, end_date_str, activity_type)
+
+        cache = StreamCache()
+        newly_cached = 0
+        if any(not cache.has(a_id) for a_id in activity_ids):
+            newly_cached = await cache_missing_streams(await asyncio.to_thread(get_api), activity_ids, cache)
+
+        best = {}
+        best_activity = {}
+        for activity_id in activity_ids:
+            if not cache.has(activity_id):
+                continue
+            # Only the two channels needed are mapped from disk
+            data = cache.load(activity_id, ["timestamp", "power"])
+            for duration, watts in mean_max(to_one_hz(data["timestamp"], data["power"]), POWER_CURVE_DURATIONS).items():
+                if watts > best.get(duration, 0):
+                    best[duration] = watts
+                    best_activity[duration] = activity_id
+
+        return {
+            "activities": len(activity_ids),
+            "newly_cached": newly_cached,
+            "power_curve_w": {f"{d}s": {"watts": round(best[d]), "activity_id": best_activity[d]} for d in sorted(best)},
+        }
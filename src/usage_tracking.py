@@ -0,0 +1,188 @@
+"""
+Token, latency and cost accounting for every Gemini call.
+
+Each call appends one JSON line to memory/llm_usage.jsonl. The process-wide `tracker`
+keeps running totals for the current session and enforces an optional budget.
+Report: python -m src.usage_tracking [--session ID | --all]
+"""
+import argparse
+import datetime
+import json
+import os
+import time
+
+USAGE_FILE = "memory/llm_usage.jsonl"
+
+# USD per 1M tokens (input, output); thinking tokens are billed as output
+MODEL_PRICES = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+
+class UsageBudgetExceeded(Exception):
+    pass
+
+
+def usage_counts(usage_metadata):
+    """Token counts from a response's usage_metadata (missing fields count as 0)."""
+    def count(name):
+        return getattr(usage_metadata, name, None) or 0
+
+    return {
+        "prompt_tokens": count("prompt_token_count"),
+        "cached_tokens": count("cached_content_token_count"),
+        "tool_prompt_tokens": count("tool_use_prompt_token_count"),
+        "output_tokens": count("candidates_token_count"),
+        "thinking_tokens": count("thoughts_token_count"),
+        "total_tokens": count("total_token_count"),
+    }
+
+
+def estimate_cost(model, counts):
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    billed_input = counts["prompt_tokens"] + counts["tool_prompt_tokens"]
+    billed_output = counts["output_tokens"] + counts["thinking_tokens"]
+    return round((billed_input * input_price + billed_output * output_price) / 1_000_000, 6)
+
+
+class UsageTracker:
+    """
+    Records one entry per Gemini call and keeps per-agent totals for the session.
+    The budget (tokens and/or USD, from LLM_SESSION_TOKEN_BUDGET / LLM_SESSION_COST_BUDGET_USD)
+    is checked before each call, so a finished call is never thrown away.
+    """
+    def __init__(self, filename=USAGE_FILE, token_budget=None, cost_budget=None):
+        self.filename = filename
+        self.session_id = datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        self.token_budget = token_budget
+        self.cost_budget = cost_budget
+        self.budget_from_env = token_budget is None and cost_budget is None
+        self.totals = {}
+
+    def configure_budget_from_env(self):
+        # Read lazily: the agents call load_dotenv() after this module is imported
+        tokens = os.getenv("LLM_SESSION_TOKEN_BUDGET")
+        cost = os.getenv("LLM_SESSION_COST_BUDGET_USD")
+        self.token_budget = int(tokens) if tokens else None
+        self.cost_budget = float(cost) if cost else None
+
+    def session_totals(self):
+        tokens = sum(t["total_tokens"] for t in self.totals.values())
+        cost = sum(t["cost_usd"] for t in self.totals.values())
+        return tokens, cost
+
+    def check_budget(self):
+        """Raises UsageBudgetExceeded once the session has used up its budget."""
+        if self.budget_from_env:
+            self.configure_budget_from_env()
+        tokens, cost = self.session_totals()
+        if self.token_budget is not None and tokens >= self.token_budget:
+            raise UsageBudgetExceeded(f"Session token budget exhausted ({tokens}/{self.token_budget} tokens).")
+        if self.cost_budget is not None and cost >= self.cost_budget:
+            raise UsageBudgetExceeded(f"Session cost budget exhausted (${cost:.4f}/${self.cost_budget:.2f}).")
+
+    def record(self, agent, model, usage_metadata, latency_s, call, first_token_s=None):
+        counts = usage_counts(usage_metadata)
+        entry = {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "session_id": self.session_id,
+            "agent": agent,
+            "call": call,
+            "model": model,
+            **counts,
+            "latency_s": round(latency_s, 3),
+            "first_token_s": round(first_token_s, 3) if first_token_s is not None else None,
+            "cost_usd": estimate_cost(model, counts),
+        }
+        totals = self.totals.setdefault(agent, _empty_totals())
+        _add(totals, entry)
+
+        os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+        with open(self.filename, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def start(self):
+        """Budget check before a call; returns the start time for the latency measurement."""
+        self.check_budget()
+        return time.perf_counter()
+
+    def finish(self, started, agent, model, usage_metadata, call, first_token_at=None):
+        """Records a finished call that was started with start()."""
+        now = time.perf_counter()
+        first_token_s = first_token_at - started if first_token_at is not None else None
+        return self.record(agent, model, usage_metadata, now - started, call, first_token_s)
+
+    def print_session_report(self):
+        print(f"\n--- LLM usage (session {self.session_id}) ---")
+        print(format_report(self.totals))
+
+
+def _empty_totals():
+    return {"calls": 0, "prompt_tokens": 0, "output_tokens": 0, "thinking_tokens": 0,
+            "total_tokens": 0, "latency_s": 0.0, "cost_usd": 0.0}
+
+def _add(totals, entry):
+    totals["calls"] += 1
+    for key in ("prompt_tokens", "output_tokens", "thinking_tokens", "total_tokens", "latency_s", "cost_usd"):
+        totals[key] += entry[key] or 0
+
+
+def format_report(totals_by_agent):
+    """Table of per-agent totals plus a total line."""
+    header = f"{'agent':<28}{'calls':>6}{'prompt':>10}{'output':>9}{'thinking':>10}{'total':>10}{'latency s':>11}{'cost $':>10}"
+    lines = [header, "-" * len(header)]
+    overall = _empty_totals()
+    for agent, t in sorted(totals_by_agent.items(), key=lambda item: -item[1]["total_tokens"]):
+        lines.append(f"{agent:<28}{t['calls']:>6}{t['prompt_tokens']:>10}{t['output_tokens']:>9}{t['thinking_tokens']:>10}"
+                     f"{t['total_tokens']:>10}{t['latency_s']:>11.1f}{t['cost_usd']:>10.4f}")
+        overall["calls"] += t["calls"]
+        for key in ("prompt_tokens", "output_tokens", "thinking_tokens", "total_tokens", "latency_s", "cost_usd"):
+            overall[key] += t[key]
+    lines.append("-" * len(header))
+    lines.append(f"{'TOTAL':<28}{overall['calls']:>6}{overall['prompt_tokens']:>10}{overall['output_tokens']:>9}"
+                 f"{overall['thinking_tokens']:>10}{overall['total_tokens']:>10}{overall['latency_s']:>11.1f}{overall['cost_usd']:>10.4f}")
+    return "\n".join(lines)
+
+
+def load_totals(filename=USAGE_FILE, session_id=None):
+    """Per-session, per-agent totals from the usage log: {session_id: {agent: totals}}."""
+    sessions = {}
+    if not os.path.exists(filename):
+        return sessions
+    with open(filename, "r") as f:
+        for line in f:
+            entry = json.loads(line)
+            if session_id and entry["session_id"] != session_id:
+                continue
+            agents = sessions.setdefault(entry["session_id"], {})
+            _add(agents.setdefault(entry["agent"], _empty_totals()), entry)
+    return sessions
+
+
+# One tracker per process, shared by all agents
+tracker = UsageTracker()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM usage report per session and agent.")
+    parser.add_argument("--session", help="Only this session id")
+    parser.add_argument("--all", action="store_true", help="All sessions (default: the last 5)")
+    args = parser.parse_args()
+
+    sessions = load_totals(session_id=args.session)
+    if not sessions:
+        print(f"No usage recorded in {USAGE_FILE}.")
+        return
+    session_ids = sorted(sessions)
+    if not (args.all or args.session):
+        session_ids = session_ids[-5:]
+    for session_id in session_ids:
+        print(f"\nSession {session_id}")
+        print(format_report(sessions[session_id]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from google.genai import types
+
+from src.agents.history_compaction import MAX_RESPONSE_CHARS, compact_history
+
+
+def user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def model(text):
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+def tool_round(name, args, payload):
+    call = types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))])
+    response = types.Content(role="user", parts=[types.Part.from_function_response(name=name, response={"result": payload})])
+    return [call, response]
+
+
+def responses(history):
+    return [p.function_response.response for c in history for p in c.parts if p.function_response]
+
+
+def test_compaction_is_idempotent_over_many_turns():
+    history = [user("turn 1"), *tool_round("get_sleep_data", {"date_str": "2026-10-01"}, "x" * 3000), model("q1")]
+    savings = []
+    for turn in range(2, 7):
+        history += [user(f"turn {turn}"), model(f"q{turn}")]
+        history, saved = compact_history(history)
+        savings.append(saved)
+
+    # Compacted once, as soon as the tool round falls out of the last KEEP_TURNS turns
+    assert savings[0] == 0
+    assert savings[1] > 0
+    assert all(saved == 0 for saved in savings[2:])
+    [response] = responses(history)
+    assert response["compacted"] is True
+    assert response["summary"].startswith('{"result": "xxx')
+    assert len(response["summary"]) < MAX_RESPONSE_CHARS + 100
+
+
+def test_superseded_call_is_dropped_with_its_response():
+    history = [
+        user("turn 1"), *tool_round("get_hrv_data", {"date_str": "2026-10-01"}, "a"), model("q1"),
+        user("turn 2"), *tool_round("get_hrv_data", {"date_str": "2026-10-01"}, "b"), model("q2"),
+        user("turn 3"), model("q3"),
+        user("turn 4"), model("q4"),
+    ]
+    compacted, saved = compact_history(history)
+
+    assert saved > 0
+    assert responses(compacted) == [{"result": "b"}]
+    assert sum(1 for c in compacted for p in c.parts if p.function_call) == 1
+
+
+def test_small_responses_are_left_alone():
+    history = [user("turn 1"), *tool_round("get_todays_date", {}, "2026-10-19"), model("q1"),
+               user("turn 2"), model("q2"), user("turn 3"), model("q3")]
+    compacted, saved = compact_history(history)
+
+    assert saved == 0
+    assert compacted is history
@@ -0,0 +1,62 @@
+import asyncio
+import copy
+
+import pytest
+
+from src.agents import season_planner_verification_agent as verifier
+from src.agents.season_planner_verification_agent import SeasonContentCheckerAgent
+from src.planning.plan_diff import IncrementalVerification
+
+PLAN = {"phases": [
+    {"phase_name": "Base 1", "duration_weeks": 4, "target_weekly_hours_range": [6, 8]},
+    {"phase_name": "Base 2", "duration_weeks": 4, "target_weekly_hours_range": [7, 9]},
+    {"phase_name": "Build", "duration_weeks": 4, "target_weekly_hours_range": [8, 10]},
+    {"phase_name": "Taper", "duration_weeks": 1, "target_weekly_hours_range": [4, 5]},
+]}
+
+
+@pytest.fixture(autouse=True)
+def goals(monkeypatch):
+    # Normally read from memory/goals.json by the agent's constructor
+    monkeypatch.setattr(verifier, "athlete_goals", {}, raising=False)
+
+
+def passing(indices):
+    return {"passed": True, "safety_score": 9, "flags": [], "recommendation": "",
+            "phase_verdicts": [{"phase_index": i, "is_valid": True, "flags": []} for i in indices]}
+
+
+def checker(run_check):
+    agent = SeasonContentCheckerAgent.__new__(SeasonContentCheckerAgent)
+    agent.run_check = run_check
+    return agent
+
+
+def test_phases_missed_by_a_failed_check_stay_unverified():
+    async def run_check(name, sections):
+        if name == "hallucination":
+            raise TimeoutError("timed out")
+        return passing(range(4))
+
+    verification = IncrementalVerification()
+    checked = verification.phases_to_check(PLAN)
+    result = asyncio.run(checker(run_check).check_plan(PLAN, {}, {}, checked))
+    assert result["phase_verdicts"] == []
+
+    merged = verification.merge(PLAN, checked, result)
+    assert not merged["is_valid"]
+    assert merged["unverified_phases"] == [0, 1, 2, 3]
+
+    # After a one-phase edit the phases the failed check never saw are checked again
+    edited = copy.deepcopy(PLAN)
+    edited["phases"][3]["duration_weeks"] = 2
+    assert verification.phases_to_check(edited) == [0, 1, 2, 3]
+
+
+def test_phase_left_out_by_one_check_is_not_emitted():
+    async def run_check(name, sections):
+        return passing([0, 1, 2] if name == "objective" else range(4))
+
+    result = asyncio.run(checker(run_check).check_plan(PLAN, {}, {}, [0, 1, 2, 3]))
+    assert result["is_valid"]
+    assert [v["phase_index"] for v in result["phase_verdicts"]] == [0, 1, 2]